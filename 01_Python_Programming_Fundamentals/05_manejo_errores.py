@@ -3,6 +3,12 @@ Manejo de Errores en Python
 Try, except, finally y creación de excepciones personalizadas
 """
 
+import os
+import stat
+import tempfile
+
+from lector_archivos import leer_archivo
+
 # 1. MANEJO BÁSICO DE EXCEPCIONES
 # -------------------------------
 print("=== MANEJO BÁSICO DE EXCEPCIONES ===")
@@ -62,10 +68,25 @@ for entrada in entradas_prueba:
 print("\n=== BLOQUES ELSE Y FINALLY ===")
 
 
-def leer_archivo_simple(nombre_archivo):
-    """Intenta leer un archivo usando else y finally"""
+def leer_archivo_simple(nombre_archivo, modo='completo', procesar=None):
+    """
+    Intenta leer un archivo usando else y finally. En 'bloques' y 'lineas'
+    cada parte se entrega a procesar(parte) dentro del try, que es donde
+    aparecen los errores de lectura y decodificación, y se devuelve cuántas
+    partes se procesaron (el archivo no se carga entero en memoria)
+    """
+    por_partes = modo in ('bloques', 'lineas')
+    if por_partes and procesar is None:
+        raise ValueError("En los modos 'bloques' y 'lineas' hace falta 'procesar'")
+
     try:
-        archivo = open(nombre_archivo, 'r', encoding='utf-8')
+        contenido = leer_archivo(nombre_archivo, modo)
+        if por_partes:
+            partes = 0
+            for parte in contenido:
+                procesar(parte)
+                partes += 1
+            contenido = partes
     except FileNotFoundError:
         print(f"Error: El archivo '{nombre_archivo}' no existe")
         return None
@@ -74,8 +95,6 @@ def leer_archivo_simple(nombre_archivo):
         return None
     else:
         # Este bloque se ejecuta solo si no hubo excepciones
-        contenido = archivo.read()
-        archivo.close()
         print(f"Archivo '{nombre_archivo}' leído exitosamente")
         return contenido
     finally:
@@ -207,21 +226,113 @@ print("\n=== CONTEXT MANAGERS ===")
 
 
 class GestorArchivo:
-    """Context manager personalizado para manejar archivos"""
+    """
+    Context manager personalizado para manejar archivos.
+    - atomico=True: escribe en un temporal del mismo directorio y, solo si
+      el bloque termina bien, hace fsync y lo renombra sobre el destino
+    - buffering: tamaño del buffer de open() para escrituras secuenciales
+    - usar_mmap=True: lectura sin copia, devuelve un memoryview del archivo
+    """
+
+    def __init__(self, nombre_archivo, modo, atomico=False, buffering=-1, usar_mmap=False):
+        if atomico and not any(letra in modo for letra in 'wax'):
+            raise ValueError("El modo atómico requiere un modo de escritura")
+        if atomico and 'a' in modo:
+            raise ValueError("El modo atómico no admite 'a' (reescribe el archivo completo)")
+        if usar_mmap and modo not in ('r', 'rb'):
+            raise ValueError("El modo mmap es solo de lectura ('r' o 'rb')")
 
-    def __init__(self, nombre_archivo, modo):
         self.nombre_archivo = nombre_archivo
         self.modo = modo
+        self.atomico = atomico
+        self.buffering = buffering
+        self.usar_mmap = usar_mmap
         self.archivo = None
+        self.temporal = None
+        self.mapa = None
 
     def __enter__(self):
         """Se ejecuta al entrar al bloque with"""
-        self.archivo = open(self.nombre_archivo, self.modo, encoding='utf-8')
-        print(f"Archivo '{self.nombre_archivo}' abierto en modo '{self.modo}'")
+        if self.usar_mmap:
+            return self._abrir_mmap()
+
+        ruta = self.nombre_archivo
+        if self.atomico:
+            if 'x' in self.modo and os.path.exists(self.nombre_archivo):
+                raise FileExistsError(f"El archivo '{self.nombre_archivo}' ya existe")
+            directorio = os.path.dirname(os.path.abspath(self.nombre_archivo))
+            descriptor, ruta = tempfile.mkstemp(
+                dir=directorio, prefix=f".{os.path.basename(self.nombre_archivo)}.", suffix='.tmp')
+            os.close(descriptor)
+            self.temporal = ruta
+
+        modo_apertura = self.modo.replace('x', 'w') if self.atomico else self.modo
+        encoding = None if 'b' in self.modo else 'utf-8'
+        self.archivo = open(ruta, modo_apertura, buffering=self.buffering, encoding=encoding)
+        print(f"Archivo '{self.nombre_archivo}' abierto en modo '{self.modo}'"
+              + (" (atómico)" if self.atomico else ""))
         return self.archivo
 
+    def _abrir_mmap(self):
+        """Mapea el archivo en memoria y devuelve un memoryview de solo lectura"""
+        self.mapa = leer_archivo(self.nombre_archivo, 'mmap')
+        self.archivo = self.mapa.archivo
+        print(f"Archivo '{self.nombre_archivo}' mapeado en memoria ({len(self.mapa.vista)} bytes)")
+        return self.mapa.vista
+
+    def _permisos_destino(self):
+        """Permisos del archivo destino, o los que le daría open() si es nuevo"""
+        try:
+            return stat.S_IMODE(os.stat(self.nombre_archivo).st_mode)
+        except FileNotFoundError:
+            mascara = os.umask(0)
+            os.umask(mascara)
+            return 0o666 & ~mascara
+
+    def _confirmar(self):
+        """Hace durable el temporal y lo coloca en su sitio con un rename atómico"""
+        try:
+            self.archivo.flush()
+            # mkstemp crea el temporal con 0o600: se le dan los permisos del destino
+            os.chmod(self.temporal, self._permisos_destino())
+            os.fsync(self.archivo.fileno())
+            self.archivo.close()
+            os.replace(self.temporal, self.nombre_archivo)
+        except BaseException:
+            # El destino queda intacto y el temporal no se abandona
+            try:
+                self.archivo.close()
+            except OSError:
+                pass
+            os.remove(self.temporal)
+            raise
+
+        # Sincronizar el directorio para que el rename también sobreviva a un corte
+        if hasattr(os, 'O_DIRECTORY'):
+            directorio = os.open(os.path.dirname(os.path.abspath(self.nombre_archivo)),
+                                 os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directorio)
+            finally:
+                os.close(directorio)
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Se ejecuta al salir del bloque with"""
+        if self.mapa is not None:
+            # Libera la vista y el mmap antes de cerrar el archivo
+            self.mapa.close()
+            self.mapa = None
+
+        if self.temporal is not None:
+            if exc_type is None:
+                self._confirmar()
+            else:
+                # El destino original queda intacto
+                self.archivo.close()
+                os.remove(self.temporal)
+                print(f"Escritura de '{self.nombre_archivo}' descartada")
+            self.temporal = None
+
         if self.archivo:
             self.archivo.close()
             print(f"Archivo '{self.nombre_archivo}' cerrado")
@@ -249,6 +360,20 @@ try:
 except Exception as e:
     print(f"Error general: {e}")
 
+# Escritura atómica: si el bloque falla, 'ejemplo.txt' conserva su contenido
+try:
+    with GestorArchivo("ejemplo.txt", "w", atomico=True, buffering=1024 * 1024) as archivo:
+        archivo.write("Este contenido nunca llega al disco\n")
+        resultado = 10 / 0
+except ZeroDivisionError as e:
+    print(f"Error simulado: {e}")
+
+# Lectura sin copia con mmap: se trabaja sobre bytes sin crear un str
+with GestorArchivo("ejemplo.txt", "rb", usar_mmap=True) as vista:
+    cabecera = bytes(vista[:200])  # Solo se copian los bytes que se usan
+    primera_linea = cabecera.split(b'\n', 1)[0].decode('utf-8')
+    print(f"Primera línea (mmap): {primera_linea}")
+
 # 7. EJEMPLO PRÁCTICO: VALIDACIÓN DE DATOS DE USUARIO
 # ---------------------------------------------------
 print("\n=== VALIDACIÓN DE DATOS DE USUARIO ===")
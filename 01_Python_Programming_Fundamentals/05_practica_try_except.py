@@ -10,10 +10,14 @@ si el archivo no existe.
 
 '''
 
+from lector_archivos import leer_archivo
+
+
 def read_file_contents(file_path):
     try:
-        with open(file_path, 'r') as file:
-            content = file.read()
-            print(content)
+        # Por bloques: el archivo nunca se carga entero en memoria
+        for bloque in leer_archivo(file_path, 'bloques', encoding=None):
+            print(bloque, end='')
+        print()
     except FileNotFoundError:
         print('Error: File not found - /Users/Example/Documents/my_file.txt')
\ No newline at end of file
@@ -4,9 +4,48 @@ Lectura, escritura y manipulación de archivos
 """
 
 import os
+import io
+import atexit
+import calendar
+import ctypes
 import json
 import csv
+import errno
+import gzip
+import hashlib
+import itertools
+import math
+import re
+import select
+import shutil
+import stat
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from escaneo_logs import escanear_log_paralelo, parsear_linea_log
+from lector_archivos import leer_archivo
+
+try:
+    import zstandard  # Opcional: compresión zstd de segmentos de log
+except ImportError:
+    zstandard = None
+
+
+def mostrar_resultados(resultados, formato='.4f', sangria='   '):
+    """Imprime el dict de un benchmark, con 'formato' para los tiempos y tasas"""
+    for clave, valor in resultados.items():
+        if isinstance(valor, float):
+            print(f"{sangria}{clave}: {valor:{formato}}")
+        else:
+            print(f"{sangria}{clave}: {valor}")
+
 
 # 1. OPERACIONES BÁSICAS CON ARCHIVOS
 # ------------------------------------
@@ -62,13 +101,27 @@ demostracion_archivos_basicos()
 print("\n=== MANEJO DE ERRORES EN ARCHIVOS ===")
 
 
-def leer_archivo_seguro(nombre_archivo):
+def leer_archivo_seguro(nombre_archivo, modo='completo', procesar=None):
     """
-    Intenta leer un archivo de forma segura con manejo de errores
+    Intenta leer un archivo de forma segura con manejo de errores.
+    'modo' es el de leer_archivo: 'completo', 'bloques', 'lineas' o 'mmap'.
+    En 'bloques' y 'lineas' cada parte se entrega a procesar(parte) dentro
+    del try (un UnicodeDecodeError aparece al leerla), sin cargar el archivo
+    entero en memoria, y se devuelve cuántas partes se procesaron
     """
+    por_partes = modo in ('bloques', 'lineas')
+    if por_partes and procesar is None:
+        raise ValueError("En los modos 'bloques' y 'lineas' hace falta 'procesar'")
+
     try:
-        with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-            return archivo.read()
+        contenido = leer_archivo(nombre_archivo, modo)
+        if por_partes:
+            partes = 0
+            for parte in contenido:
+                procesar(parte)
+                partes += 1
+            return partes
+        return contenido
 
     except FileNotFoundError:
         return f"Error: El archivo '{nombre_archivo}' no existe"
@@ -96,6 +149,327 @@ for archivo in archivos_prueba:
 print("=== TRABAJANDO CON ARCHIVOS JSON ===")
 
 
+class AlmacenJSONL:
+    """
+    Almacén de registros en formato JSON Lines: un objeto JSON por línea.
+    Agregar es un append O(1) y la lectura es un iterador que parsea un
+    registro cada vez. Los borrados se anotan como offsets en un archivo
+    auxiliar ('<ruta>.eliminados') hasta que compactar() los aplica
+    """
+
+    def __init__(self, ruta, clave='id'):
+        self.ruta = ruta
+        self.clave = clave
+        self.archivo_eliminados = ruta + '.eliminados'
+        self.eliminados = set()
+        if os.path.exists(self.archivo_eliminados):
+            with open(self.archivo_eliminados, 'r', encoding='utf-8') as archivo:
+                self.eliminados = set(json.load(archivo))
+
+    def agregar(self, registro):
+        """Añade un registro al final del archivo sin leer lo anterior"""
+        self.agregar_lote([registro])
+
+    def agregar_lote(self, registros):
+        """Añade varios registros con una sola escritura"""
+        with open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(''.join(json.dumps(registro, ensure_ascii=False) + '\n'
+                                  for registro in registros))
+
+    def _lineas(self):
+        """Genera (offset, línea en bytes) de cada registro vigente"""
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, 'rb') as archivo:
+            offset = 0
+            for linea in archivo:
+                if offset not in self.eliminados and linea.strip():
+                    yield offset, linea
+                offset += len(linea)
+
+    def __iter__(self):
+        """Recorre los registros uno a uno con memoria acotada"""
+        for _, linea in self._lineas():
+            yield json.loads(linea)
+
+    def buscar(self, valor):
+        """Devuelve el primer registro cuya clave coincide, o None"""
+        for registro in self:
+            if registro.get(self.clave) == valor:
+                return registro
+        return None
+
+    def _guardar_eliminados(self):
+        temporal = self.archivo_eliminados + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(sorted(self.eliminados), archivo)
+        os.replace(temporal, self.archivo_eliminados)
+
+    def eliminar(self, valor):
+        """Marca como eliminados los registros con esa clave; devuelve cuántos"""
+        marcados = 0
+        for offset, linea in self._lineas():
+            if json.loads(linea).get(self.clave) == valor:
+                self.eliminados.add(offset)
+                marcados += 1
+        if marcados:
+            self._guardar_eliminados()
+        return marcados
+
+    def actualizar(self, registro):
+        """Sustituye el registro con la misma clave añadiendo la versión nueva"""
+        self.eliminar(registro[self.clave])
+        self.agregar(registro)
+
+    def compactar(self):
+        """Reescribe el archivo sin los registros eliminados (atómico)"""
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'wb') as destino:
+            for _, linea in self._lineas():
+                destino.write(linea)
+            destino.flush()
+            os.fsync(destino.fileno())
+        os.replace(temporal, self.ruta)
+
+        self.eliminados = set()
+        if os.path.exists(self.archivo_eliminados):
+            os.remove(self.archivo_eliminados)
+
+    def importar_json(self, ruta_json, campo='estudiantes'):
+        """Añade los registros de un documento JSON con formato {campo: [...]}"""
+        with open(ruta_json, 'r', encoding='utf-8') as archivo:
+            registros = json.load(archivo)[campo]
+        self.agregar_lote(registros)
+        return len(registros)
+
+    def exportar_json(self, ruta_json, campo='estudiantes'):
+        """
+        Escribe el formato de documento único ({campo: [...], total_...})
+        recorriendo el almacén en streaming, sin materializar la lista
+        """
+        total = 0
+        with open(ruta_json, 'w', encoding='utf-8') as archivo:
+            archivo.write(f'{{\n  "{campo}": [')
+            for registro in self:
+                archivo.write((',\n    ' if total else '\n    ') +
+                              json.dumps(registro, ensure_ascii=False))
+                total += 1
+            archivo.write(f'\n  ],\n  "total_{campo}": {total},\n'
+                          f'  "fecha_actualizacion": "{datetime.now().isoformat()}"\n}}\n')
+        return total
+
+
+# Tipos de campo del codificador compilado; con '?' final admiten None
+TIPOS_CAMPO_JSON = ['entero', 'decimal', 'texto', 'booleano', 'lista_texto', 'json']
+
+
+def _literal_fstring(texto):
+    """Escapa texto fijo para insertarlo en el código de un f-string"""
+    return (texto.replace('\\', '\\\\').replace('\n', '\\n').replace("'", "\\'")
+            .replace('{', '{{').replace('}', '}}'))
+
+
+def _entero_json(valor):
+    """
+    Formato de un 'entero'; como json.dumps, con int.__repr__. Cualquier
+    otro tipo se rechaza: str(valor) dejaría pasar texto que rompe el JSON
+    o le añade campos, y un bool daría 'True'
+    """
+    if not isinstance(valor, int) or isinstance(valor, bool):
+        raise TypeError(f"Se esperaba un entero JSON: {valor!r}")
+    return int.__repr__(valor)
+
+
+def _decimal_json(valor):
+    """Formato de un 'decimal'; como json.dumps(allow_nan=False), sin NaN ni infinitos"""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise TypeError(f"Se esperaba un decimal JSON: {valor!r}")
+    if isinstance(valor, int):
+        return int.__repr__(valor)
+    if not math.isfinite(valor):
+        raise ValueError(f"Valor decimal fuera de rango para JSON: {valor!r}")
+    return float.__repr__(valor)
+
+
+def _booleano_json(valor):
+    """Formato de un 'booleano'; solo True o False, no cualquier valor verdadero"""
+    if valor is True:
+        return 'true'
+    if valor is False:
+        return 'false'
+    raise TypeError(f"Se esperaba un booleano JSON: {valor!r}")
+
+
+def compilar_codificador(esquema, indent=None, nivel=0, ensure_ascii=False):
+    """
+    Genera una función registro → texto JSON especializada para un
+    esquema {campo: tipo}: las claves van ya escapadas dentro de un
+    f-string y cada valor usa el formato de su tipo. El resultado es
+    idéntico al de json.dumps con los mismos indent/ensure_ascii y
+    allow_nan=False: NaN e infinitos se rechazan, y un valor que no es
+    del tipo del campo (un bool en un entero, un texto en un decimal,
+    un 1 en un booleano) lanza TypeError
+    """
+    escapar = encode_basestring_ascii if ensure_ascii else encode_basestring
+    if indent is None:
+        apertura, separador, cierre = '{', ', ', '}'
+        sangria_lista = None
+    else:
+        interior = '\n' + ' ' * (indent * (nivel + 1))
+        apertura, separador, cierre = '{' + interior, ',' + interior, '\n' + ' ' * (indent * nivel) + '}'
+        sangria_lista = (',\n' + ' ' * (indent * (nivel + 2)),
+                         '[\n' + ' ' * (indent * (nivel + 2)),
+                         '\n' + ' ' * (indent * (nivel + 1)) + ']')
+
+    def lista_texto(valores):
+        if sangria_lista is None:
+            return '[' + ', '.join(map(escapar, valores)) + ']'
+        if not valores:
+            return '[]'
+        return sangria_lista[1] + sangria_lista[0].join(map(escapar, valores)) + sangria_lista[2]
+
+    def generico(valor):
+        texto = json.dumps(valor, indent=indent, ensure_ascii=ensure_ascii, allow_nan=False)
+        if indent is None:
+            return texto
+        return texto.replace('\n', '\n' + ' ' * (indent * (nivel + 1)))
+
+    # Tipos con formato en línea dentro del f-string ('V' es el valor)
+    expresiones = {
+        'entero': '{_e(V)}',
+        'decimal': '{_d(V)}',
+        'booleano': '{_b(V)}',
+        'texto': '{_s(V)}',
+        'lista_texto': '{_l(V)}',
+        'json': '{_g(V)}'
+    }
+    formateadores = {
+        'entero': _entero_json,
+        'decimal': _decimal_json,
+        'booleano': _booleano_json,
+        'texto': escapar,
+        'lista_texto': lista_texto,
+        'json': generico
+    }
+
+    espacio = {'_s': escapar, '_l': lista_texto, '_g': generico,
+               '_e': _entero_json, '_d': _decimal_json, '_b': _booleano_json}
+    partes = []
+    parametros = ['_s=_s', '_l=_l', '_g=_g', '_e=_e', '_d=_d', '_b=_b']
+    for posicion, (campo, tipo) in enumerate(esquema.items()):
+        admite_nulo = tipo.endswith('?')
+        tipo = tipo.rstrip('?')
+        if tipo not in TIPOS_CAMPO_JSON:
+            raise ValueError(f"Tipo de campo debe ser uno de: {TIPOS_CAMPO_JSON}")
+
+        valor = f'r[_k{posicion}]'
+        if admite_nulo:
+            formatear = formateadores[tipo]
+            espacio[f'_f{posicion}'] = lambda v, formatear=formatear: 'null' if v is None else formatear(v)
+            parametros.append(f'_f{posicion}=_f{posicion}')
+            expresion = f'{{_f{posicion}({valor})}}'
+        else:
+            expresion = expresiones[tipo].replace('V', valor)
+
+        clave = escapar(campo) + ': '
+        partes.append(_literal_fstring((apertura if posicion == 0 else separador) + clave) + expresion)
+        parametros.append(f'_k{posicion}={campo!r}')
+
+    fin = _literal_fstring(cierre if esquema else '{}')
+    codigo = (f"def codificar(r, {', '.join(parametros)}):\n"
+              f"    return f'{''.join(partes)}{fin}'\n")
+    exec(codigo, espacio)
+    return espacio['codificar']
+
+
+def escribir_registros_json(archivo, registros, esquema, indent=None, nivel=0,
+                            ensure_ascii=False, registros_por_escritura=10_000):
+    """
+    Escribe en 'archivo' una lista JSON con los registros, usando el
+    codificador compilado y un único buffer que se vuelca cada
+    registros_por_escritura registros. Devuelve cuántos escribió
+    """
+    codificar = compilar_codificador(esquema, indent, nivel + 1, ensure_ascii)
+    if indent is None:
+        separador, apertura, cierre = ', ', '[', ']'
+    else:
+        separador = ',\n' + ' ' * (indent * (nivel + 1))
+        apertura = '[\n' + ' ' * (indent * (nivel + 1))
+        cierre = '\n' + ' ' * (indent * nivel) + ']'
+
+    total = 0
+    buffer = []
+    for registro in registros:
+        buffer.append(codificar(registro))
+        if len(buffer) == registros_por_escritura:
+            archivo.write((separador if total else apertura) + separador.join(buffer))
+            total += len(buffer)
+            buffer.clear()
+    if buffer:
+        archivo.write((separador if total else apertura) + separador.join(buffer))
+        total += len(buffer)
+    archivo.write(cierre if total else '[]')
+    return total
+
+
+def volcar_documento_json(archivo, campo, registros, esquema, extra=None,
+                          indent=2, ensure_ascii=False):
+    """
+    Equivale a json.dump({campo: registros, **extra}, archivo, indent=...)
+    pero serializa los registros con el codificador compilado
+    """
+    escapar = encode_basestring_ascii if ensure_ascii else encode_basestring
+    interior = '\n' + ' ' * indent if indent is not None else ''
+    separador = ',' + interior if indent is not None else ', '
+
+    archivo.write('{' + interior + escapar(campo) + ': ')
+    total = escribir_registros_json(archivo, registros, esquema, indent, 1 if indent is not None else 0,
+                                    ensure_ascii)
+    for clave, valor in (extra or {}).items():
+        texto = json.dumps(valor, indent=indent, ensure_ascii=ensure_ascii, allow_nan=False)
+        if indent is not None:
+            texto = texto.replace('\n', interior)
+        archivo.write(separador + escapar(clave) + ': ' + texto)
+    archivo.write(('\n' if indent is not None else '') + '}')
+    return total
+
+
+ESQUEMA_ESTUDIANTE = {'id': 'entero', 'nombre': 'texto', 'edad': 'entero', 'carrera': 'texto',
+                      'materias': 'lista_texto', 'activo': 'booleano'}
+
+
+def benchmark_codificador_json(n_registros=1_000_000, ruta='benchmark_estudiantes.json'):
+    """Compara json.dump(indent=2) con el codificador compilado sobre n_registros"""
+    carreras = ['Ingeniería', 'Medicina', 'Derecho', 'Administración']
+    estudiantes = [{
+        "id": i,
+        "nombre": f"Estudiante {i}",
+        "edad": 18 + i % 10,
+        "carrera": carreras[i % len(carreras)],
+        "materias": ["Matemáticas", "Física"][:i % 3],
+        "activo": i % 5 != 0
+    } for i in range(n_registros)]
+    extra = {"total_estudiantes": n_registros, "fecha_actualizacion": datetime.now().isoformat()}
+
+    resultados = {}
+    inicio = time.perf_counter()
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({"estudiantes": estudiantes, **extra}, archivo, indent=2, ensure_ascii=False)
+    resultados['json_dump_s'] = time.perf_counter() - inicio
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        esperado = archivo.read()
+
+    inicio = time.perf_counter()
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        volcar_documento_json(archivo, "estudiantes", estudiantes, ESQUEMA_ESTUDIANTE, extra)
+    resultados['compilado_s'] = time.perf_counter() - inicio
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        resultados['salida_identica'] = archivo.read() == esperado
+
+    os.remove(ruta)
+    return resultados
+
+
 def demostracion_json():
     """Demuestra lectura y escritura de archivos JSON"""
 
@@ -164,14 +538,266 @@ def demostracion_json():
 
     print("3. Datos actualizados guardados en 'estudiantes_actualizado.json'")
 
+    # El mismo flujo con JSON Lines: agregar no reescribe el archivo
+    if os.path.exists('estudiantes.jsonl'):
+        os.remove('estudiantes.jsonl')
+    almacen = AlmacenJSONL('estudiantes.jsonl')
+    importados = almacen.importar_json('estudiantes.json')
+    almacen.agregar({
+        "id": 5,
+        "nombre": "Lucía Fernández",
+        "edad": 24,
+        "carrera": "Arquitectura",
+        "materias": ["Dibujo", "Estructuras"],
+        "activo": True
+    })
+    almacen.actualizar({**almacen.buscar(3), "activo": True})
+    almacen.eliminar(2)
+    almacen.compactar()
+
+    print(f"4. JSON Lines: {importados} importados desde 'estudiantes.json'")
+    for estudiante in almacen:
+        estado = "Activo" if estudiante['activo'] else "Inactivo"
+        print(f"   - {estudiante['nombre']} ({estudiante['carrera']}) - {estado}")
+    total = almacen.exportar_json('estudiantes_exportado.json')
+    print(f"   {total} estudiantes exportados a 'estudiantes_exportado.json'")
+
 
 # Ejecutar demostración JSON
 demostracion_json()
 
+# Los benchmarks solo se ejecutan al lanzar el script, no al importarlo
+if __name__ == '__main__':
+    print("5. Codificador JSON compilado por esquema (benchmark reducido, 1M con el valor por defecto):")
+    mostrar_resultados(benchmark_codificador_json(n_registros=100_000))
+
 # 4. TRABAJANDO CON ARCHIVOS CSV
 # ------------------------------
 print("\n=== TRABAJANDO CON ARCHIVOS CSV ===")
 
+# Tipos de columna: entero → array('q'), decimal → array('d'),
+# fecha → array('q') con segundos epoch (UTC), categoria → str internados
+TIPOS_COLUMNA = ['entero', 'decimal', 'fecha', 'categoria', 'texto']
+PATRON_FECHA = re.compile(r'\d{4}-\d{2}-\d{2}$')
+
+
+def _tipo_de_valores(valores):
+    """Deduce el tipo de una columna a partir de una muestra de textos"""
+    if valores and all(PATRON_FECHA.match(valor) for valor in valores):
+        return 'fecha'
+    for tipo, conversion in (('entero', int), ('decimal', float)):
+        try:
+            for valor in valores:
+                conversion(valor)
+            return tipo
+        except ValueError:
+            pass
+    if '' in valores:
+        # Un número con huecos se lee como decimal con NaN
+        try:
+            for valor in valores:
+                if valor:
+                    float(valor)
+            return 'decimal'
+        except ValueError:
+            pass
+
+    distintos = len(set(valores))
+    if distintos < len(valores) and (distintos <= 32 or distintos <= len(valores) // 2):
+        return 'categoria'
+    return 'texto'
+
+
+def _filas_numeradas(lector, encabezados):
+    """
+    Genera (número de fila, fila) saltando las filas vacías (una línea en
+    blanco al final, por ejemplo). Una fila con otro número de campos que
+    el encabezado es un error: zip(*filas) recortaría todas las columnas
+    """
+    for numero, fila in enumerate(lector, 2):
+        if not fila:
+            continue
+        if len(fila) != len(encabezados):
+            raise ValueError(f"Fila {numero}: tiene {len(fila)} campos y el encabezado "
+                             f"{len(encabezados)}")
+        yield numero, fila
+
+
+def inferir_esquema(ruta, muestra=1000, esquema=None):
+    """Infiere {columna: tipo} con las primeras filas; 'esquema' fija tipos"""
+    with open(ruta, 'r', newline='', encoding='utf-8') as archivo:
+        lector = csv.reader(archivo)
+        encabezados = next(lector)
+        filas = [fila for _, fila in itertools.islice(_filas_numeradas(lector, encabezados), muestra)]
+
+    esquema = esquema or {}
+    columnas = list(zip(*filas)) if filas else [()] * len(encabezados)
+    return {nombre: esquema.get(nombre) or _tipo_de_valores(list(valores))
+            for nombre, valores in zip(encabezados, columnas)}
+
+
+def _fecha_a_epoch(texto, cache):
+    epoch = cache.get(texto)
+    if epoch is None:
+        epoch = calendar.timegm((int(texto[:4]), int(texto[5:7]), int(texto[8:10]), 0, 0, 0))
+        cache[texto] = epoch
+    return epoch
+
+
+def _convertir_columna(valores, tipo, cache):
+    """Convierte una tupla de textos a la columna tipada correspondiente"""
+    if tipo == 'entero':
+        return array('q', map(int, valores))
+    if tipo == 'decimal':
+        return array('d', [float(valor) if valor else float('nan') for valor in valores])
+    if tipo == 'fecha':
+        return array('q', [_fecha_a_epoch(valor, cache) for valor in valores])
+    if tipo == 'categoria':
+        # El dict de la columna hace de tabla de internado entre lotes
+        return [cache.setdefault(valor, sys.intern(valor)) for valor in valores]
+    return list(valores)
+
+
+def _error_de_conversion(nombre, valores, tipo, numeros):
+    """ValueError que señala la primera celda de la columna que no es de 'tipo'"""
+    for numero, valor in zip(numeros, valores):
+        try:
+            _convertir_columna((valor,), tipo, {})
+        except ValueError:
+            return ValueError(
+                f"Fila {numero}, columna '{nombre}': {valor!r} no es "
+                f"de tipo '{tipo}' (inferido de las primeras filas); fija el tipo con "
+                f"esquema={{{nombre!r}: 'texto'}}")
+    return ValueError(f"Columna '{nombre}': no se pudo convertir a '{tipo}'")
+
+
+def leer_csv_columnar(ruta, esquema=None, tamaño_lote=65536):
+    """
+    Lee un CSV por lotes y genera diccionarios {columna: columna tipada}.
+    Cada valor se convierte una sola vez, al leerlo. Si una fila posterior
+    a la muestra no encaja con el tipo inferido se lanza ValueError con la
+    fila (contando el encabezado como la 1) y la columna. Las filas vacías
+    se saltan y una fila con otro número de campos también es un ValueError
+    """
+    esquema = inferir_esquema(ruta, esquema=esquema)
+    tipos = list(esquema.values())
+    caches = [{} for _ in tipos]
+
+    with open(ruta, 'r', newline='', encoding='utf-8') as archivo:
+        lector = csv.reader(archivo)
+        encabezados = next(lector)
+        filas_numeradas = _filas_numeradas(lector, encabezados)
+        while True:
+            pares = list(itertools.islice(filas_numeradas, tamaño_lote))
+            if not pares:
+                break
+            numeros, filas = zip(*pares)
+            lote = {}
+            for nombre, valores, tipo, cache in zip(encabezados, zip(*filas), tipos, caches):
+                try:
+                    lote[nombre] = _convertir_columna(valores, tipo, cache)
+                except ValueError:
+                    raise _error_de_conversion(nombre, valores, tipo, numeros) from None
+            yield lote
+
+
+def escribir_csv_columnar(ruta, lotes, esquema, modo='w'):
+    """Escribe lotes columnares (como los de leer_csv_columnar) en un CSV"""
+    caches_fecha = {nombre: {} for nombre, tipo in esquema.items() if tipo == 'fecha'}
+    filas_escritas = 0
+
+    with open(ruta, modo, newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        if modo == 'w':
+            escritor.writerow(list(esquema))
+        for lote in lotes:
+            columnas = []
+            for nombre in esquema:
+                columna = lote[nombre]
+                if nombre in caches_fecha:
+                    cache = caches_fecha[nombre]
+                    columna = [cache.get(epoch) or cache.setdefault(
+                        epoch, time.strftime('%Y-%m-%d', time.gmtime(epoch))) for epoch in columna]
+                columnas.append(columna)
+            filas = list(zip(*columnas))
+            escritor.writerows(filas)
+            filas_escritas += len(filas)
+    return filas_escritas
+
+
+def _pico_rss_mb(reiniciar=False):
+    """
+    Pico de memoria residente del proceso en MB. En Linux se puede
+    reiniciar el pico (clear_refs) para medir cada fase por separado
+    """
+    try:
+        if reiniciar:
+            with open('/proc/self/clear_refs', 'w') as archivo:
+                archivo.write('5')
+        with open('/proc/self/status') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_csv_columnar(n_filas=5_000_000, ruta='benchmark_empleados.csv'):
+    """
+    Compara cargar un CSV de n_filas con DictReader (convirtiendo Salario y
+    la fecha en cada consumidor) frente al lector columnar tipado
+    """
+    import random
+
+    departamentos = ['Ventas', 'TI', 'Marketing', 'Finanzas', 'RRHH']
+    esquema = {'ID': 'entero', 'Nombre': 'texto', 'Departamento': 'categoria',
+               'Salario': 'decimal', 'Fecha_Contratacion': 'fecha'}
+    fechas = array('q', [calendar.timegm((2015 + i % 10, 1 + i % 12, 1 + i % 28, 0, 0, 0))
+                         for i in range(1000)])
+    lotes = ({'ID': array('q', range(inicio, inicio + 100_000)),
+              'Nombre': [f'Empleado {i}' for i in range(inicio, inicio + 100_000)],
+              'Departamento': [random.choice(departamentos) for _ in range(100_000)],
+              'Salario': array('d', [round(random.uniform(30_000, 90_000), 2) for _ in range(100_000)]),
+              'Fecha_Contratacion': array('q', (fechas[i % 1000] for i in range(100_000)))}
+             for inicio in range(0, n_filas, 100_000))
+    escribir_csv_columnar(ruta, lotes, esquema)
+
+    resultados = {}
+
+    _pico_rss_mb(reiniciar=True)
+    base = _pico_rss_mb()
+    inicio = time.perf_counter()
+    with open(ruta, 'r', newline='', encoding='utf-8') as archivo:
+        filas = list(csv.DictReader(archivo))
+    total_dictreader = sum(float(fila['Salario']) for fila in filas)
+    antiguedad = [datetime.strptime(fila['Fecha_Contratacion'], '%Y-%m-%d').year for fila in filas]
+    duracion = time.perf_counter() - inicio
+    resultados['dictreader_filas_s'] = len(filas) / duracion
+    resultados['dictreader_pico_mb'] = _pico_rss_mb() - base
+    del filas, antiguedad
+
+    _pico_rss_mb(reiniciar=True)
+    base = _pico_rss_mb()
+    inicio = time.perf_counter()
+    columnas = None
+    for lote in leer_csv_columnar(ruta, esquema):
+        if columnas is None:
+            columnas = lote
+        else:
+            for nombre, columna in lote.items():
+                columnas[nombre].extend(columna)
+    total_columnar = sum(columnas['Salario'])
+    duracion = time.perf_counter() - inicio
+    resultados['columnar_filas_s'] = len(columnas['ID']) / duracion
+    resultados['columnar_pico_mb'] = _pico_rss_mb() - base
+    resultados['mismo_total'] = abs(total_dictreader - total_columnar) < 1e-3 * n_filas
+    del columnas
+
+    os.remove(ruta)
+    return resultados
+
 
 def demostracion_csv():
     """Demuestra lectura y escritura de archivos CSV"""
@@ -220,15 +846,185 @@ def demostracion_csv():
         writer.writerows(nuevos_empleados)
     print("\n4. Nuevos empleados agregados al CSV")
 
+    # Lectura columnar tipada: Salario y fechas se convierten una sola vez
+    print("\n5. Leyendo CSV por columnas tipadas:")
+    print(f"   Esquema inferido: {inferir_esquema('empleados.csv')}")
+    for lote in leer_csv_columnar('empleados.csv', tamaño_lote=4):
+        print(f"   Lote de {len(lote['ID'])} filas - salario medio: "
+              f"{sum(lote['Salario']) / len(lote['Salario']):,.0f}")
+
 
 # Ejecutar demostración CSV
 demostracion_csv()
 
+if __name__ == '__main__':
+    print("\n6. CSV columnar vs DictReader (benchmark reducido, 5M filas con el valor por defecto):")
+    mostrar_resultados(benchmark_csv_columnar(n_filas=200_000), ',.1f')
+
 # 5. OPERACIONES CON EL SISTEMA DE ARCHIVOS
 # -----------------------------------------
 print("\n=== OPERACIONES CON EL SISTEMA DE ARCHIVOS ===")
 
 
+class InstantaneaMetadatos:
+    """
+    Instantánea de los metadatos de un árbol de directorios, construida
+    con un solo stat por entrada (os.scandir) y guardada en JSON entre
+    ejecuciones. Al actualizar solo se relee un directorio si cambió su
+    mtime, es decir, si se crearon, borraron o renombraron entradas; los
+    cambios de contenido dentro de un archivo existente no lo alteran, así
+    que la instantánea no los ve. Guardarla fuera del árbol evita que el
+    propio guardado obligue a releer su directorio en la siguiente carga
+    """
+
+    def __init__(self, raiz='.', archivo=None):
+        self.raiz = raiz
+        self.archivo = archivo
+        # ruta relativa del directorio → {'mtime_ns', 'archivos', 'subdirectorios'}
+        self.directorios = {}
+        self._totales = None
+        self.directorios_leidos = 0
+
+        # Directorio del árbol que contiene la instantánea (None si está fuera):
+        # allí se omiten el archivo y su temporal
+        self._directorio_archivo = None
+        if archivo is not None:
+            relativa = os.path.relpath(os.path.dirname(os.path.abspath(archivo)),
+                                       os.path.abspath(raiz))
+            if relativa != os.pardir and not relativa.startswith(os.pardir + os.sep):
+                self._directorio_archivo = '' if relativa == '.' else relativa
+            self._excluidos = {os.path.basename(archivo), os.path.basename(archivo) + '.tmp'}
+
+        if archivo is not None and os.path.exists(archivo):
+            with open(archivo, 'r', encoding='utf-8') as entrada:
+                datos = json.load(entrada)
+            if datos.get('raiz') == os.path.abspath(raiz):
+                self.directorios = datos['directorios']
+
+    def _leer_directorio(self, relativa, mtime_ns):
+        """Un os.scandir y un stat por entrada (sin seguir enlaces)"""
+        archivos = {}
+        subdirectorios = []
+        with os.scandir(os.path.join(self.raiz, relativa)) as entradas:
+            for entrada in entradas:
+                if relativa == self._directorio_archivo and entrada.name in self._excluidos:
+                    continue
+                if entrada.is_dir(follow_symlinks=False):
+                    subdirectorios.append(entrada.name)
+                else:
+                    info = entrada.stat(follow_symlinks=False)
+                    archivos[entrada.name] = [info.st_size, info.st_mtime_ns]
+        self.directorios_leidos += 1
+        return {'mtime_ns': mtime_ns, 'archivos': archivos, 'subdirectorios': sorted(subdirectorios)}
+
+    def actualizar(self):
+        """
+        Recorre el árbol con un stat por directorio y solo vuelve a leer
+        los directorios nuevos o cuyo mtime cambió
+        """
+        anteriores = self.directorios
+        self.directorios = {}
+        self._totales = None
+        self.directorios_leidos = 0
+
+        pendientes = ['']
+        while pendientes:
+            relativa = pendientes.pop()
+            try:
+                mtime_ns = os.stat(os.path.join(self.raiz, relativa)).st_mtime_ns
+            except OSError:
+                continue  # Borrado mientras se recorría
+
+            anterior = anteriores.get(relativa)
+            if anterior is not None and anterior['mtime_ns'] == mtime_ns:
+                directorio = anterior
+            else:
+                try:
+                    directorio = self._leer_directorio(relativa, mtime_ns)
+                except OSError as e:
+                    print(f"   ✗ Error leyendo {relativa or self.raiz}: {e}")
+                    continue
+
+            self.directorios[relativa] = directorio
+            pendientes.extend(os.path.join(relativa, nombre) for nombre in directorio['subdirectorios'])
+        return self
+
+    def guardar(self):
+        """
+        Persiste la instantánea de forma atómica. Si está dentro del árbol,
+        el rename cambia el mtime de su directorio: esta instancia lo anota
+        para no releerlo en el próximo actualizar (una carga nueva sí lo relee)
+        """
+        contenedor = self.directorios.get(self._directorio_archivo)
+        ruta_contenedor = os.path.dirname(os.path.abspath(self.archivo))
+        # Solo si el directorio sigue como se leyó: si no, hay cambios que releer
+        vigente = contenedor is not None and \
+            contenedor['mtime_ns'] == os.stat(ruta_contenedor).st_mtime_ns
+
+        temporal = self.archivo + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as salida:
+            json.dump({'raiz': os.path.abspath(self.raiz), 'directorios': self.directorios}, salida)
+        os.replace(temporal, self.archivo)
+
+        if vigente:
+            contenedor['mtime_ns'] = os.stat(ruta_contenedor).st_mtime_ns
+
+    def info(self, ruta):
+        """(tamaño, mtime_ns, es_directorio) de una ruta relativa, o None si no existe"""
+        ruta = os.path.normpath(ruta)
+        if ruta == '.':
+            ruta = ''
+        if ruta in self.directorios:
+            return self.tamaño_total(ruta), self.directorios[ruta]['mtime_ns'], True
+
+        padre, nombre = os.path.split(ruta)
+        directorio = self.directorios.get(padre)
+        if directorio is None or nombre not in directorio['archivos']:
+            return None
+        tamaño, mtime_ns = directorio['archivos'][nombre]
+        return tamaño, mtime_ns, False
+
+    def tamaño_total(self, ruta=''):
+        """Bytes de todo el subárbol (como du), calculados una vez por instantánea"""
+        if self._totales is None:
+            self._totales = {}
+            # Los hijos tienen rutas más largas: se suman antes que sus padres
+            for relativa in sorted(self.directorios, key=len, reverse=True):
+                directorio = self.directorios[relativa]
+                total = sum(tamaño for tamaño, _ in directorio['archivos'].values())
+                total += sum(self._totales.get(os.path.join(relativa, nombre), 0)
+                             for nombre in directorio['subdirectorios'])
+                self._totales[relativa] = total
+        return self._totales.get(os.path.normpath(ruta) if ruta not in ('', '.') else '', 0)
+
+    def archivos(self):
+        """Diccionario plano {ruta relativa: (tamaño, mtime_ns)}"""
+        return {os.path.join(relativa, nombre): tuple(datos)
+                for relativa, directorio in self.directorios.items()
+                for nombre, datos in directorio['archivos'].items()}
+
+    def diferencias(self, anterior):
+        """
+        Compara con otra instantánea: archivos y directorios nuevos o
+        eliminados. No hay 'modificados': un directorio solo se relee si
+        cambia su listado, así que el tamaño y el mtime de un archivo que
+        se reescribe quedan como estaban
+        """
+        actuales = self.archivos()
+        previos = anterior.archivos()
+        return {
+            'nuevos': sorted(actuales.keys() - previos.keys()),
+            'eliminados': sorted(previos.keys() - actuales.keys()),
+            'directorios_nuevos': sorted(self.directorios.keys() - anterior.directorios.keys())
+        }
+
+    def copia(self):
+        """Copia independiente (para comparar antes y después de actualizar)"""
+        duplicado = InstantaneaMetadatos(self.raiz)
+        duplicado.directorios = json.loads(json.dumps(self.directorios))
+        return duplicado
+
+
 def demostracion_sistema_archivos():
     """Demuestra operaciones con el sistema de archivos"""
 
@@ -236,13 +1032,20 @@ def demostracion_sistema_archivos():
     directorio_actual = os.getcwd()
     print(f"   Directorio actual: {directorio_actual}")
 
+    # Una instantánea con un stat por entrada sustituye a las llamadas
+    # sueltas a exists/getsize/getmtime/isfile/isdir
+    instantanea = InstantaneaMetadatos('.', '.instantanea_metadatos.json').actualizar()
+    print(f"   Instantánea: {len(instantanea.directorios)} directorios, "
+          f"{instantanea.directorios_leidos} leídos de disco")
+
     print("\n2. LISTANDO ARCHIVOS EN EL DIRECTORIO:")
-    archivos = os.listdir('.')
+    raiz = instantanea.directorios['']
+    archivos = list(raiz['archivos']) + raiz['subdirectorios']
     print(f"   Archivos en el directorio actual ({len(archivos)} encontrados):")
 
     for archivo in sorted(archivos)[:10]:  # Mostrar solo los primeros 10
-        if os.path.isfile(archivo):
-            tamaño = os.path.getsize(archivo)
+        if archivo in raiz['archivos']:
+            tamaño = raiz['archivos'][archivo][0]
             print(f"     📄 {archivo} ({tamaño} bytes)")
         else:
             print(f"     📁 {archivo}/")
@@ -251,11 +1054,11 @@ def demostracion_sistema_archivos():
     archivos_verificar = ['ejemplo.txt', 'estudiantes.json', 'empleados.csv']
 
     for archivo in archivos_verificar:
-        if os.path.exists(archivo):
-            tamaño = os.path.getsize(archivo)
-            modificado = datetime.fromtimestamp(os.path.getmtime(archivo))
-            es_archivo = os.path.isfile(archivo)
-            es_directorio = os.path.isdir(archivo)
+        info = instantanea.info(archivo)
+        if info is not None:
+            tamaño, mtime_ns, es_directorio = info
+            modificado = datetime.fromtimestamp(mtime_ns / 1e9)
+            es_archivo = not es_directorio
 
             print(f"   {archivo}:")
             print(f"     Existe: Sí")
@@ -274,13 +1077,18 @@ def demostracion_sistema_archivos():
         os.makedirs(directorio, exist_ok=True)
         print(f"   Directorio creado: {directorio}")
 
-    # Verificar creación
+    # Verificar creación: solo se releen los directorios cuyo mtime cambió
     print("\n5. VERIFICANDO DIRECTORIOS CREADOS:")
-    for root, dirs, files in os.walk('.'):
-        nivel = root.count(os.sep)
+    anterior = instantanea.copia()
+    instantanea.actualizar()
+    instantanea.guardar()
+
+    for relativa in sorted(instantanea.directorios):
+        nivel = relativa.count(os.sep) + 1 if relativa else 0
         indentacion = ' ' * 2 * nivel
-        print(f"{indentacion}📁 {os.path.basename(root)}/")
+        print(f"{indentacion}📁 {os.path.basename(relativa) or '.'}/")
 
+        files = list(instantanea.directorios[relativa]['archivos'])
         sub_indentacion = ' ' * 2 * (nivel + 1)
         for archivo in files[:3]:  # Mostrar solo primeros 3 archivos por directorio
             print(f"{sub_indentacion}📄 {archivo}")
@@ -288,6 +1096,12 @@ def demostracion_sistema_archivos():
         if len(files) > 3:
             print(f"{sub_indentacion}... y {len(files) - 3} más")
 
+    print("\n6. TAMAÑOS ACUMULADOS Y DIFERENCIAS ENTRE INSTANTÁNEAS:")
+    print(f"   Directorios releídos al actualizar: {instantanea.directorios_leidos}")
+    print(f"   Tamaño total del árbol: {instantanea.tamaño_total():,} bytes")
+    cambios = instantanea.diferencias(anterior)
+    print(f"   Directorios nuevos: {cambios['directorios_nuevos']}")
+
 
 # Ejecutar demostración del sistema de archivos
 demostracion_sistema_archivos()
@@ -297,31 +1111,998 @@ demostracion_sistema_archivos()
 print("\n=== SISTEMA DE REGISTRO DE LOGS ===")
 
 
+def leer_lineas_en_reversa(ruta, tamaño_bloque=64 * 1024):
+    """
+    Generador que devuelve las líneas de un archivo (en bytes, sin el salto
+    de línea) desde la última hasta la primera, leyendo bloques fijos desde EOF
+    """
+    with open(ruta, 'rb') as archivo:
+        posicion = archivo.seek(0, os.SEEK_END)
+        resto = b''
+
+        while posicion > 0:
+            leer = min(tamaño_bloque, posicion)
+            posicion -= leer
+            archivo.seek(posicion)
+            bloque = archivo.read(leer) + resto
+
+            # La primera línea del bloque puede estar incompleta
+            lineas = bloque.split(b'\n')
+            resto = lineas.pop(0)
+
+            for linea in reversed(lineas):
+                if linea:
+                    yield linea
+
+        if resto:
+            yield resto
+
+
+def lineas_completas_desde(ruta, offset):
+    """
+    Generador de las líneas completas (en bytes) a partir de un offset.
+    Una última línea sin salto de línea está a medio escribir y se omite
+    """
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(offset)
+        for linea in archivo:
+            if not linea.endswith(b'\n'):
+                break
+            yield linea
+
+
+class IndiceLogs:
+    """
+    Índice disperso guardado junto al log ('<log>.idx'). Divide el archivo en
+    bloques de N líneas y recuerda en qué bloques aparece cada nivel, cada
+    usuario y cada hora, para leer solo las regiones que pueden coincidir
+    """
+
+    def __init__(self, archivo_log, lineas_por_bloque=1000):
+        self.archivo_log = archivo_log
+        self.archivo_indice = archivo_log + '.idx'
+        self.lineas_por_bloque = lineas_por_bloque
+        self._reiniciar()
+
+        if os.path.exists(self.archivo_indice):
+            with open(self.archivo_indice, 'r', encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+            if datos.get('lineas_por_bloque') == lineas_por_bloque:
+                self.bloques = datos['bloques']
+                self.tamaño_indexado = datos['tamaño_indexado']
+                self.lineas_en_bloque = datos['lineas_en_bloque']
+                self.por_nivel = datos['por_nivel']
+                self.por_usuario = datos['por_usuario']
+                self.por_hora = datos['por_hora']
+        # Lo escrito después del último guardado se indexa al leer (sincronizar)
+
+    def _reiniciar(self):
+        """Deja el índice vacío"""
+        self.bloques = []  # offset de inicio de cada bloque
+        self.tamaño_indexado = 0
+        self.lineas_en_bloque = 0
+        self.por_nivel = {}
+        self.por_usuario = {}
+        self.por_hora = {}
+
+    @staticmethod
+    def _marcar(mapa, clave, bloque):
+        """Anota que la clave aparece en el bloque (los bloques crecen en orden)"""
+        lista = mapa.get(clave)
+        if lista is None:
+            mapa[clave] = [bloque]
+        elif lista[-1] != bloque:
+            lista.append(bloque)
+
+    def agregar(self, timestamp, nivel, usuario, inicio, fin):
+        """
+        Registra una línea ya escrita en [inicio, fin) del log. Si hay un hueco
+        desde lo indexado (otro proceso escribió, o aún no se ha sincronizado)
+        la línea no se anota: la próxima sincronización la lee del archivo,
+        así los offsets de los bloques siguen siendo los reales
+        """
+        if inicio != self.tamaño_indexado:
+            return
+        self._indexar(timestamp, nivel, usuario, fin - inicio)
+
+    def _indexar(self, timestamp, nivel, usuario, tamaño_bytes):
+        """Añade la línea que empieza en tamaño_indexado al bloque en curso"""
+        if not self.bloques or self.lineas_en_bloque >= self.lineas_por_bloque:
+            self.bloques.append(self.tamaño_indexado)
+            self.lineas_en_bloque = 0
+
+        bloque = len(self.bloques) - 1
+        self._marcar(self.por_nivel, nivel, bloque)
+        self._marcar(self.por_usuario, usuario, bloque)
+        self._marcar(self.por_hora, timestamp[:13], bloque)
+
+        self.lineas_en_bloque += 1
+        self.tamaño_indexado += tamaño_bytes
+
+    def sincronizar(self):
+        """Indexa las líneas que están en el log pero aún no en el índice"""
+        if not os.path.exists(self.archivo_log):
+            self._reiniciar()
+            return
+
+        tamaño = os.path.getsize(self.archivo_log)
+        if tamaño < self.tamaño_indexado:
+            # El log se truncó o se reemplazó: el índice ya no es válido
+            self._reiniciar()
+        if tamaño == self.tamaño_indexado:
+            return
+
+        for linea in lineas_completas_desde(self.archivo_log, self.tamaño_indexado):
+            texto = linea.decode('utf-8')
+            campos = parsear_linea_log(texto)
+            if campos is None:
+                self.tamaño_indexado += len(linea)
+                continue
+            self._indexar(*campos, len(linea))
+
+    def reconstruir(self):
+        """Descarta el índice y lo vuelve a generar desde el log completo"""
+        self._reiniciar()
+        self.sincronizar()
+        self.guardar()
+
+    def guardar(self):
+        """Persiste el índice de forma atómica (archivo temporal + rename)"""
+        temporal = self.archivo_indice + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'lineas_por_bloque': self.lineas_por_bloque,
+                'bloques': self.bloques,
+                'tamaño_indexado': self.tamaño_indexado,
+                'lineas_en_bloque': self.lineas_en_bloque,
+                'por_nivel': self.por_nivel,
+                'por_usuario': self.por_usuario,
+                'por_hora': self.por_hora
+            }, archivo)
+        os.replace(temporal, self.archivo_indice)
+
+    def bloques_candidatos(self, nivel=None, usuario=None, desde=None):
+        """Devuelve, ordenados, los bloques que pueden contener coincidencias"""
+        candidatos = set(range(len(self.bloques)))
+
+        if nivel is not None:
+            candidatos &= set(self.por_nivel.get(nivel, []))
+        if usuario is not None:
+            candidatos &= set(self.por_usuario.get(usuario, []))
+        if desde is not None:
+            hora_desde = desde[:13]
+            por_tiempo = set()
+            for hora, bloques in self.por_hora.items():
+                if hora >= hora_desde:
+                    por_tiempo.update(bloques)
+            candidatos &= por_tiempo
+
+        return sorted(candidatos)
+
+    def rango_bloque(self, bloque):
+        """Devuelve (inicio, fin) en bytes de un bloque"""
+        inicio = self.bloques[bloque]
+        if bloque + 1 < len(self.bloques):
+            return inicio, self.bloques[bloque + 1]
+        return inicio, self.tamaño_indexado
+
+
+class EstadisticasLogs:
+    """
+    Contadores incrementales del log (líneas, niveles, usuarios, bytes)
+    con un checkpoint en '<log>.stats'. Crearlos no lee el log: sincronizar()
+    cuenta lo escrito después del último offset guardado cuando se piden
+    """
+
+    def __init__(self, archivo_log, niveles):
+        self.archivo_log = archivo_log
+        self.archivo_checkpoint = archivo_log + '.stats'
+        self.niveles = niveles
+        self._reiniciar()
+
+        if os.path.exists(self.archivo_checkpoint):
+            with open(self.archivo_checkpoint, 'r', encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+            self.offset = datos['offset']
+            self.total_lineas = datos['total_lineas']
+            self.por_nivel = datos['por_nivel']
+            self.por_usuario = datos['por_usuario']
+            self.desde = datos.get('desde')
+            self.hasta = datos.get('hasta')
+
+    def _reiniciar(self):
+        """Pone todos los contadores a cero"""
+        self.offset = 0
+        self.total_lineas = 0
+        self.por_nivel = {}
+        self.por_usuario = {}
+        self.desde = None
+        self.hasta = None
+
+    def agregar(self, nivel, usuario, inicio, fin, timestamp=None):
+        """
+        Cuenta una línea ya escrita en [inicio, fin) del archivo. Si no empieza
+        donde acaba lo contado (otro proceso escribió entremedias, o aún no se
+        ha sincronizado) no se suma a ciegas: sincronizar() la leerá del archivo
+        """
+        if inicio != self.offset:
+            return
+        self._contar(nivel, usuario, fin - inicio, timestamp)
+
+    def _contar(self, nivel, usuario, tamaño_bytes, timestamp):
+        """Actualiza los contadores con la línea que empieza en el offset actual"""
+        self.total_lineas += 1
+        self.offset += tamaño_bytes
+        if timestamp is not None:
+            if self.desde is None:
+                self.desde = timestamp
+            self.hasta = timestamp
+        if nivel is not None:
+            self.por_nivel[nivel] = self.por_nivel.get(nivel, 0) + 1
+        if usuario is not None:
+            self.por_usuario[usuario] = self.por_usuario.get(usuario, 0) + 1
+
+    def _agregar_linea_existente(self, linea):
+        """Cuenta una línea leída del archivo (escrita por otro proceso)"""
+        texto = linea.decode('utf-8')
+        campos = parsear_linea_log(texto)
+        if campos is not None:
+            timestamp, nivel, usuario = campos
+        else:
+            nivel = next((n for n in self.niveles if f"[{n}]" in texto), None)
+            timestamp = usuario = None
+        self._contar(nivel, usuario, len(linea), timestamp)
+
+    def sincronizar(self):
+        """Cuenta lo escrito después del último offset conocido"""
+        if not os.path.exists(self.archivo_log):
+            self._reiniciar()
+            return
+
+        tamaño = os.path.getsize(self.archivo_log)
+        if tamaño < self.offset:
+            # El log se truncó o se reemplazó: hay que contar desde cero
+            self._reiniciar()
+        if tamaño == self.offset:
+            return
+
+        for linea in lineas_completas_desde(self.archivo_log, self.offset):
+            self._agregar_linea_existente(linea)
+
+    def guardar(self):
+        """Persiste el checkpoint de forma atómica"""
+        temporal = self.archivo_checkpoint + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'offset': self.offset,
+                'total_lineas': self.total_lineas,
+                'por_nivel': self.por_nivel,
+                'por_usuario': self.por_usuario,
+                'desde': self.desde,
+                'hasta': self.hasta
+            }, archivo)
+        os.replace(temporal, self.archivo_checkpoint)
+
+
+def abrir_segmento(ruta):
+    """Abre un segmento (plano, .gz o .zst) para leerlo en binario"""
+    if ruta.endswith('.gz'):
+        return gzip.open(ruta, 'rb')
+    if ruta.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError("zstandard no está instalado. Instala con: pip install zstandard")
+        lector = zstandard.ZstdDecompressor().stream_reader(open(ruta, 'rb'), closefd=True)
+        return io.BufferedReader(lector)
+    return open(ruta, 'rb')
+
+
+class GestorSegmentos:
+    """
+    Segmentos rotados de un log. Un manifiesto ('<log>.segmentos.json')
+    guarda el rango temporal y los conteos de cada segmento, y los
+    segmentos sellados se comprimen en un hilo de fondo
+    """
+
+    COMPRESIONES = {'gzip': '.gz', 'zstd': '.zst', 'ninguna': ''}
+
+    def __init__(self, archivo_log, compresion='gzip'):
+        if compresion not in self.COMPRESIONES:
+            raise ValueError(f"Compresión debe ser una de: {list(self.COMPRESIONES)}")
+        if compresion == 'zstd' and zstandard is None:
+            raise ImportError("zstandard no está instalado. Instala con: pip install zstandard")
+
+        self.archivo_log = archivo_log
+        self.archivo_manifiesto = archivo_log + '.segmentos.json'
+        self.compresion = compresion
+        self.segmentos = []
+        self.siguiente = 1
+        self._lock = threading.Lock()
+        self._ejecutor = None
+        self._pendientes = []
+
+        if os.path.exists(self.archivo_manifiesto):
+            with open(self.archivo_manifiesto, 'r', encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+            self.segmentos = datos['segmentos']
+            self.siguiente = datos['siguiente']
+
+        # Reanudar compresiones que quedaron a medias en una ejecución anterior
+        for segmento in self.segmentos:
+            if not segmento['comprimido'] and compresion != 'ninguna':
+                self._programar_compresion(segmento)
+
+    def _guardar(self):
+        """Persiste el manifiesto de forma atómica (llamar con el lock tomado)"""
+        temporal = self.archivo_manifiesto + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({'siguiente': self.siguiente, 'segmentos': self.segmentos}, archivo)
+        os.replace(temporal, self.archivo_manifiesto)
+
+    def sellar(self, estadisticas):
+        """Convierte el archivo activo en un segmento y programa su compresión"""
+        with self._lock:
+            ruta = f"{self.archivo_log}.{self.siguiente:05d}"
+            os.replace(self.archivo_log, ruta)
+            segmento = {
+                'archivo': ruta,
+                'comprimido': False,
+                'desde': estadisticas.desde,
+                'hasta': estadisticas.hasta,
+                'total_lineas': estadisticas.total_lineas,
+                'por_nivel': dict(estadisticas.por_nivel),
+                'por_usuario': dict(estadisticas.por_usuario),
+                'tamaño_bytes': estadisticas.offset
+            }
+            self.segmentos.append(segmento)
+            self.siguiente += 1
+            self._guardar()
+
+        if self.compresion != 'ninguna':
+            self._programar_compresion(segmento)
+
+    def _programar_compresion(self, segmento):
+        """
+        Encola la compresión de un segmento en el hilo de fondo. Si el
+        intérprete ya está terminando (un cierre desde atexit que rota), el
+        segmento queda sin comprimir y el manifiesto lo reanuda al abrirlo
+        """
+        if self._ejecutor is None:
+            self._ejecutor = ThreadPoolExecutor(max_workers=1)
+        try:
+            self._pendientes.append(self._ejecutor.submit(self._comprimir, segmento))
+        except RuntimeError:
+            pass  # 'cannot schedule new futures after interpreter shutdown'
+
+    def _comprimir(self, segmento):
+        """Comprime un segmento y actualiza el manifiesto al terminar"""
+        origen = segmento['archivo']
+        destino = origen + self.COMPRESIONES[self.compresion]
+        temporal = destino + '.tmp'
+
+        with open(origen, 'rb') as entrada:
+            if self.compresion == 'gzip':
+                with gzip.open(temporal, 'wb') as salida:
+                    shutil.copyfileobj(entrada, salida, 1024 * 1024)
+            else:
+                with open(temporal, 'wb') as salida:
+                    zstandard.ZstdCompressor().copy_stream(entrada, salida)
+        os.replace(temporal, destino)
+
+        with self._lock:
+            segmento['archivo'] = destino
+            segmento['comprimido'] = True
+            self._guardar()
+        os.remove(origen)
+
+    def esperar_compresiones(self):
+        """Bloquea hasta que terminen las compresiones en curso"""
+        for futuro in self._pendientes:
+            futuro.result()
+        self._pendientes.clear()
+
+    def close(self):
+        """Espera las compresiones y libera el hilo de fondo"""
+        self.esperar_compresiones()
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown()
+            self._ejecutor = None
+
+    @staticmethod
+    def puede_coincidir(segmento, nivel, usuario, desde):
+        """Indica, solo con el manifiesto, si vale la pena abrir un segmento"""
+        if nivel is not None and nivel not in segmento['por_nivel']:
+            return False
+        if usuario is not None and usuario not in segmento['por_usuario']:
+            return False
+        if desde is not None and segmento['hasta'] is not None and segmento['hasta'] < desde:
+            return False
+        return True
+
+    def leer(self, cumple, nivel, usuario, desde, maximo=None):
+        """
+        Devuelve (en orden cronológico) las últimas 'maximo' líneas de los
+        segmentos que cumplen el filtro, empezando por el más reciente
+        """
+        with self._lock:
+            segmentos = list(self.segmentos)
+
+        resultado = []
+        for segmento in reversed(segmentos):
+            if maximo is not None and len(resultado) >= maximo:
+                break
+            if not self.puede_coincidir(segmento, nivel, usuario, desde):
+                continue
+
+            limite = None if maximo is None else maximo - len(resultado)
+            coincidencias = deque(maxlen=limite)
+            # Nombre y apertura bajo el lock: el compresor no puede renombrar
+            # ni borrar el archivo entre ambos (abierto, borrarlo no le afecta)
+            with self._lock:
+                archivo = abrir_segmento(segmento['archivo'])
+            with archivo:
+                for linea in archivo:
+                    linea = linea.rstrip(b'\n')
+                    if linea and cumple(linea):
+                        coincidencias.append(linea.decode('utf-8') + '\n')
+            resultado = list(coincidencias) + resultado
+
+        return resultado
+
+    def totales(self):
+        """Suma los conteos de todos los segmentos"""
+        totales = {'total_lineas': 0, 'por_nivel': {}, 'por_usuario': {}, 'tamaño_bytes': 0}
+        with self._lock:
+            for segmento in self.segmentos:
+                totales['total_lineas'] += segmento['total_lineas']
+                totales['tamaño_bytes'] += segmento['tamaño_bytes']
+                for clave in ('por_nivel', 'por_usuario'):
+                    for nombre, cantidad in segmento[clave].items():
+                        totales[clave][nombre] = totales[clave].get(nombre, 0) + cantidad
+        return totales
+
+
+class EscritorLogsBuffer:
+    """
+    Escritor con un único archivo abierto que agrupa líneas en lotes
+    (group commit) y las vuelca por tamaño o por antigüedad. Un hilo de
+    fondo vuelca el lote cuando cumple intervalo_flush aunque no lleguen
+    más líneas; es un hilo daemon, así que close() se registra con atexit
+    para no perder el último lote si el programa termina sin cerrarlo
+    (salvo con cerrar_al_salir=False, cuando el dueño ya lo cierra al salir)
+    """
+
+    DURABILIDADES = ['ninguna', 'flush', 'fsync']
+
+    def __init__(self, archivo_log, tamaño_lote=500, intervalo_flush=1.0,
+                 durabilidad='flush', al_volcar=None, bloqueo=None, cerrar_al_salir=True):
+        if durabilidad not in self.DURABILIDADES:
+            raise ValueError(f"Durabilidad debe ser una de: {self.DURABILIDADES}")
+
+        self.archivo_log = archivo_log
+        self.tamaño_lote = tamaño_lote
+        self.intervalo_flush = intervalo_flush
+        self.durabilidad = durabilidad
+        # Recibe la posición real del final del archivo cada vez que lo
+        # escrito llega al sistema operativo (con 'ninguna', solo en flush())
+        self.al_volcar = al_volcar
+        self.archivo = open(archivo_log, 'a', encoding='utf-8')
+        self.pendientes = []
+        self.inicio_lote = None
+        self.lotes_escritos = 0
+
+        # Quien prepara las líneas (SistemaLogs) puede compartir su cerrojo
+        # para que el volcado por tiempo no se cuele entre sus pasos
+        self._bloqueo = bloqueo or threading.RLock()
+        self._hilo = None
+        if intervalo_flush > 0:
+            self._hilo = threading.Thread(target=self._volcar_por_tiempo, name='volcado-logs',
+                                          daemon=True)
+            self._hilo.start()
+        if cerrar_al_salir:
+            atexit.register(self.close)
+
+    def escribir(self, linea_log):
+        """Agrega una línea al lote y lo vuelca si está lleno o es antiguo"""
+        with self._bloqueo:
+            if not self.pendientes:
+                self.inicio_lote = time.monotonic()
+            self.pendientes.append(linea_log)
+
+            if (len(self.pendientes) >= self.tamaño_lote or
+                    time.monotonic() - self.inicio_lote >= self.intervalo_flush):
+                self._volcar_lote()
+
+    def _volcar_por_tiempo(self):
+        """Hilo de fondo: duerme hasta que el lote en curso cumple intervalo_flush"""
+        espera = self.intervalo_flush
+        while True:
+            time.sleep(espera)
+            with self._bloqueo:
+                if self.archivo is None:
+                    return
+                espera = self.intervalo_flush
+                if self.pendientes:
+                    restante = self.inicio_lote + self.intervalo_flush - time.monotonic()
+                    if restante > 0:
+                        espera = restante
+                    else:
+                        self._volcar_lote()
+
+    def _volcar_lote(self):
+        """Escribe el lote pendiente aplicando el nivel de durabilidad"""
+        if self.pendientes:
+            self.archivo.write(''.join(self.pendientes))
+            self.pendientes.clear()
+            self.lotes_escritos += 1
+
+        if self.durabilidad in ('flush', 'fsync'):
+            self.archivo.flush()
+        if self.durabilidad == 'fsync':
+            os.fsync(self.archivo.fileno())
+        if self.durabilidad != 'ninguna':
+            self._notificar()
+
+    def _notificar(self):
+        """Pasa a al_volcar el offset real tras la última escritura (O_APPEND)"""
+        if self.al_volcar is not None:
+            self.al_volcar(os.lseek(self.archivo.fileno(), 0, os.SEEK_CUR))
+
+    def flush(self):
+        """Vuelca lo pendiente y lo deja visible para otros lectores"""
+        with self._bloqueo:
+            if self.archivo is None:
+                return
+            self._volcar_lote()
+            self.archivo.flush()
+            self._notificar()
+
+    def close(self):
+        """Vuelca lo pendiente y cierra el archivo (el hilo de fondo termina solo)"""
+        with self._bloqueo:
+            if self.archivo is None:
+                return
+            self.flush()
+            self.archivo.close()
+            self.archivo = None
+        atexit.unregister(self.close)
+
+
+class ColaLogsAsincrona:
+    """
+    Cola acotada de registros ya formateados que un hilo escritor dedicado
+    drena por lotes. El camino rápido de encolar no toma ningún lock
+    (deque.append es atómico); solo el desbordamiento se sincroniza
+    """
+
+    POLITICAS = ['bloquear', 'descartar_antiguos', 'descartar_debug']
+
+    def __init__(self, procesar_lote, capacidad=10000, politica='bloquear',
+                 tamaño_lote=500, intervalo_flush=1.0):
+        if politica not in self.POLITICAS:
+            raise ValueError(f"Política debe ser una de: {self.POLITICAS}")
+
+        self.procesar_lote = procesar_lote
+        self.capacidad = capacidad
+        self.politica = politica
+        self.tamaño_lote = tamaño_lote
+        self.intervalo_flush = intervalo_flush
+
+        # Con 'descartar_debug' los DEBUG van aparte para poder desalojarlos
+        # sin recorrer la cola; el número de secuencia conserva el orden
+        self._cola = deque()
+        self._cola_debug = deque()
+        self._secuencia = itertools.count()
+        self._condicion = threading.Condition()
+        self._despertar = threading.Event()
+        self._procesando = False
+        self._cerrada = False
+
+        self.escritos = 0
+        self.lotes = 0
+        self.descartados = Counter()
+        self.errores = 0
+
+        self._hilo = threading.Thread(target=self._bucle, name='escritor-logs', daemon=True)
+        self._hilo.start()
+
+    @property
+    def profundidad(self):
+        return len(self._cola) + len(self._cola_debug)
+
+    def encolar(self, nivel, usuario, timestamp, linea_log):
+        """Encola un registro; devuelve False si la política lo descartó"""
+        if self._cerrada:
+            raise ValueError("La cola de logs está cerrada")
+
+        registro = (next(self._secuencia), nivel, usuario, timestamp, linea_log)
+        if self.profundidad >= self.capacidad and not self._desbordamiento(registro):
+            return False
+
+        if nivel == 'DEBUG' and self.politica == 'descartar_debug':
+            self._cola_debug.append(registro)
+        else:
+            self._cola.append(registro)
+
+        if len(self._cola) >= self.tamaño_lote and not self._despertar.is_set():
+            self._despertar.set()
+        return True
+
+    def _desbordamiento(self, registro):
+        """Aplica la política con la cola llena; True si hay que encolar"""
+        self._despertar.set()
+        with self._condicion:
+            if self.politica == 'bloquear':
+                while self.profundidad >= self.capacidad and self._hilo.is_alive():
+                    self._condicion.wait(0.1)
+                return True
+
+            try:
+                if self.politica == 'descartar_debug' and self._cola_debug:
+                    victima = self._cola_debug.popleft()
+                elif self.politica == 'descartar_debug' and registro[1] == 'DEBUG':
+                    victima = registro
+                else:
+                    victima = self._cola.popleft()
+            except IndexError:
+                # El escritor vació la cola mientras tanto
+                return True
+
+            self.descartados[victima[1]] += 1
+            return victima is not registro
+
+    def _extraer(self, maximo):
+        """Saca hasta 'maximo' registros en orden de llegada"""
+        lote = []
+        if self.politica != 'descartar_debug':
+            extraer = self._cola.popleft
+            try:
+                while len(lote) < maximo:
+                    lote.append(extraer())
+            except IndexError:
+                pass
+            return lote
+
+        # Mezcla de las dos colas por número de secuencia
+        with self._condicion:
+            cola, cola_debug = self._cola, self._cola_debug
+            while len(lote) < maximo and (cola or cola_debug):
+                if not cola_debug or (cola and cola[0][0] < cola_debug[0][0]):
+                    lote.append(cola.popleft())
+                else:
+                    lote.append(cola_debug.popleft())
+        return lote
+
+    def _bucle(self):
+        """Hilo escritor: despierta por lote lleno, por tiempo o al cerrar"""
+        while True:
+            self._despertar.wait(self.intervalo_flush)
+            self._despertar.clear()
+            self._drenar()
+            if self._cerrada and not self.profundidad:
+                break
+
+    def _drenar(self):
+        self._procesando = True
+        while self.profundidad:
+            lote = self._extraer(self.tamaño_lote)
+            try:
+                self.procesar_lote(lote)
+            except Exception as error:
+                self.errores += 1
+                print(f"Error escribiendo lote de logs: {error}")
+            self.escritos += len(lote)
+            self.lotes += 1
+            with self._condicion:
+                self._condicion.notify_all()
+
+        with self._condicion:
+            self._procesando = False
+            self._condicion.notify_all()
+
+    def esperar_vaciado(self):
+        """Bloquea hasta que todo lo encolado hasta ahora esté escrito"""
+        with self._condicion:
+            while (self.profundidad or self._procesando) and self._hilo.is_alive():
+                self._despertar.set()
+                self._condicion.wait(0.1)
+
+    def metricas(self):
+        return {
+            'profundidad': self.profundidad,
+            'capacidad': self.capacidad,
+            'politica': self.politica,
+            'escritos': self.escritos,
+            'lotes': self.lotes,
+            'descartados': sum(self.descartados.values()),
+            'descartados_por_nivel': dict(self.descartados),
+            'errores': self.errores
+        }
+
+    def close(self):
+        """Drena lo pendiente y detiene el hilo escritor"""
+        if self._cerrada:
+            return
+        self._cerrada = True
+        self._despertar.set()
+        self._hilo.join()
+
+
 class SistemaLogs:
     """Sistema simple para registrar logs en archivos"""
 
-    def __init__(self, archivo_log='sistema.log'):
+    def __init__(self, archivo_log='sistema.log', modo='directo', mostrar_consola=True,
+                 tamaño_lote=500, intervalo_flush=1.0, durabilidad='flush',
+                 indexar=False, rotar_bytes=None, rotar_segundos=None,
+                 compresion='gzip', capacidad_cola=10000, politica_cola='bloquear'):
+        if modo not in ('directo', 'buffer', 'asincrono'):
+            raise ValueError("Modo debe ser 'directo', 'buffer' o 'asincrono'")
+
         self.archivo_log = archivo_log
         self.niveles = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+        self.modo = modo
+        self.mostrar_consola = mostrar_consola
+        self.escritor = None
+        # El hilo escritor del modo asíncrono, el volcado por tiempo del
+        # buffer y las lecturas comparten estado
+        self._bloqueo = threading.RLock()
+        self._config_escritor = (tamaño_lote, intervalo_flush, durabilidad)
+        # Líneas entregadas al escritor que aún no se han ubicado en el archivo
+        self._sin_confirmar = []
+        self._bytes_sin_confirmar = 0
+        self.cola = None
+        if modo in ('buffer', 'asincrono'):
+            self.escritor = EscritorLogsBuffer(archivo_log, *self._config_escritor,
+                                               al_volcar=self._confirmar, bloqueo=self._bloqueo,
+                                               cerrar_al_salir=modo != 'asincrono')
+
+        # Índice de offsets opcional ('<archivo_log>.idx')
+        self.indice = IndiceLogs(archivo_log) if indexar else None
+
+        # Contadores incrementales con checkpoint ('<archivo_log>.stats')
+        self.estadisticas = EstadisticasLogs(archivo_log, self.niveles)
+
+        # Rotación por tamaño y/o tiempo con segmentos comprimidos
+        self.rotar_bytes = rotar_bytes
+        self.rotar_segundos = rotar_segundos
+        self.segmentos = None
+        if rotar_bytes or rotar_segundos or os.path.exists(archivo_log + '.segmentos.json'):
+            self.segmentos = GestorSegmentos(archivo_log, compresion)
+        # Tamaño del archivo activo según la última escritura confirmada
+        self._tamaño_activo = os.path.getsize(archivo_log) if os.path.exists(archivo_log) else 0
+        self._inicio_activo = self._primer_timestamp()
+
+        # Cache del timestamp formateado (se recalcula una vez por segundo);
+        # una sola tupla para que varios hilos productores no la mezclen
+        self._timestamp_cacheado = (None, '')
+
+        # Modo asíncrono: registrar solo encola y un hilo escribe por lotes.
+        # Al salir hay que drenar la cola antes de cerrar el escritor, así
+        # que el cierre lo registra SistemaLogs y no el propio escritor
+        if modo == 'asincrono':
+            self.cola = ColaLogsAsincrona(self._procesar_lote, capacidad_cola, politica_cola,
+                                          tamaño_lote, intervalo_flush)
+            atexit.register(self.close)
+
+    def _primer_timestamp(self):
+        """Momento de la primera línea del archivo activo (ahora si no la hay)"""
+        if self._tamaño_activo:
+            with open(self.archivo_log, 'r', encoding='utf-8', errors='replace') as archivo:
+                campos = parsear_linea_log(archivo.readline())
+            if campos is not None:
+                try:
+                    return time.mktime(time.strptime(campos[0], '%Y-%m-%d %H:%M:%S'))
+                except ValueError:
+                    pass
+        return time.time()
+
+    def _timestamp(self):
+        """Devuelve el timestamp actual formateado, cacheado por segundo"""
+        segundo = int(time.time())
+        segundo_cacheado, texto = self._timestamp_cacheado
+        if segundo != segundo_cacheado:
+            texto = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(segundo))
+            self._timestamp_cacheado = (segundo, texto)
+        return texto
 
     def registrar(self, nivel, mensaje, usuario='SISTEMA'):
         """Registra un mensaje en el log"""
         if nivel not in self.niveles:
             raise ValueError(f"Nivel debe ser uno de: {self.niveles}")
 
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = self._timestamp()
         linea_log = f"[{timestamp}] [{nivel}] [{usuario}] {mensaje}\n"
 
-        with open(self.archivo_log, 'a', encoding='utf-8') as archivo:
-            archivo.write(linea_log)
-
-        print(f"LOG: {linea_log.strip()}")
+        if self.cola is not None:
+            return self.cola.encolar(nivel, usuario, timestamp, linea_log)
 
-    def leer_logs(self, nivel=None, usuario=None, ultimas_lineas=10):
-        """Lee logs con filtros opcionales"""
-        if not os.path.exists(self.archivo_log):
+        if self.escritor is not None:
+            with self._bloqueo:
+                self._anotar(nivel, usuario, timestamp, linea_log)
+                self.escritor.escribir(linea_log)
+        else:
+            self._anotar(nivel, usuario, timestamp, linea_log)
+            with open(self.archivo_log, 'a', encoding='utf-8') as archivo:
+                archivo.write(linea_log)
+                archivo.flush()
+                self._confirmar(os.lseek(archivo.fileno(), 0, os.SEEK_CUR))
+
+        if self.mostrar_consola:
+            print(f"LOG: {linea_log.strip()}")
+        return True
+
+    def _anotar(self, nivel, usuario, timestamp, linea_log):
+        """Rota si toca y deja la línea pendiente de ubicar en el archivo"""
+        if self._debe_rotar():
+            self.rotar()
+
+        tamaño_bytes = len(linea_log.encode('utf-8'))
+        self._sin_confirmar.append((nivel, usuario, timestamp, tamaño_bytes))
+        self._bytes_sin_confirmar += tamaño_bytes
+
+    def _confirmar(self, fin):
+        """
+        Actualiza contadores e índice con las líneas pendientes, que acaban de
+        llegar al archivo y terminan en la posición real fin (no en la suma de
+        lo que ha escrito esta instancia, que ignora a otros escritores)
+        """
+        inicio = fin - self._bytes_sin_confirmar
+        for nivel, usuario, timestamp, tamaño_bytes in self._sin_confirmar:
+            self.estadisticas.agregar(nivel, usuario, inicio, inicio + tamaño_bytes, timestamp)
+            if self.indice is not None:
+                self.indice.agregar(timestamp, nivel, usuario, inicio, inicio + tamaño_bytes)
+            inicio += tamaño_bytes
+        self._sin_confirmar.clear()
+        self._bytes_sin_confirmar = 0
+        self._tamaño_activo = fin
+
+    def _procesar_lote(self, registros):
+        """Escribe un lote de la cola asíncrona (se ejecuta en el hilo escritor)"""
+        with self._bloqueo:
+            for _, nivel, usuario, timestamp, linea_log in registros:
+                self._anotar(nivel, usuario, timestamp, linea_log)
+                self.escritor.escribir(linea_log)
+                if self.mostrar_consola:
+                    print(f"LOG: {linea_log.strip()}")
+            self.escritor.flush()
+
+    def metricas_cola(self):
+        """Profundidad de la cola y contadores de descartes del modo asíncrono"""
+        if self.cola is None:
+            return None
+        return self.cola.metricas()
+
+    def _debe_rotar(self):
+        """Comprueba los umbrales de rotación del archivo activo"""
+        if self._tamaño_activo == 0 and not self._sin_confirmar:
+            return False
+        tamaño = self._tamaño_activo + self._bytes_sin_confirmar
+        if self.rotar_bytes and tamaño >= self.rotar_bytes:
+            return True
+        if self.rotar_segundos and time.time() - self._inicio_activo >= self.rotar_segundos:
+            return True
+        return False
+
+    def rotar(self):
+        """Sella el archivo activo como segmento y empieza uno nuevo"""
+        with self._bloqueo:
+            self._rotar()
+
+    def _rotar(self):
+        if self.segmentos is None:
+            self.segmentos = GestorSegmentos(self.archivo_log)
+
+        if self.escritor is not None:
+            self.escritor.close()
+        self.estadisticas.sincronizar()
+        if os.path.exists(self.archivo_log):
+            self.segmentos.sellar(self.estadisticas)
+
+        # El índice y los contadores describen solo el archivo activo
+        for auxiliar in (self.archivo_log + '.stats', self.archivo_log + '.idx'):
+            if os.path.exists(auxiliar):
+                os.remove(auxiliar)
+        self.estadisticas = EstadisticasLogs(self.archivo_log, self.niveles)
+        if self.indice is not None:
+            self.indice = IndiceLogs(self.archivo_log, self.indice.lineas_por_bloque)
+        if self.escritor is not None:
+            self.escritor = EscritorLogsBuffer(self.archivo_log, *self._config_escritor,
+                                               al_volcar=self._confirmar, bloqueo=self._bloqueo,
+                                               cerrar_al_salir=self.modo != 'asincrono')
+        self._tamaño_activo = 0
+        self._inicio_activo = time.time()
+
+    def _drenar(self):
+        """
+        Lleva al archivo lo pendiente en la cola y el buffer, sin guardar
+        checkpoints: es lo que necesitan las lecturas
+        """
+        if self.cola is not None:
+            self.cola.esperar_vaciado()
+        with self._bloqueo:
+            if self.escritor is not None:
+                self.escritor.flush()
+
+    def flush(self):
+        """Vuelca al archivo las líneas pendientes y guarda contadores e índice"""
+        self._drenar()
+        with self._bloqueo:
+            self.estadisticas.guardar()
+            if self.indice is not None:
+                self.indice.guardar()
+
+    def close(self):
+        """Drena la cola asíncrona y cierra el escritor del modo buffer"""
+        if self.cola is not None:
+            self.cola.close()
+            atexit.unregister(self.close)
+        with self._bloqueo:
+            if self.escritor is not None:
+                self.escritor.close()
+                self.escritor = None
+            self.estadisticas.guardar()
+            if self.indice is not None:
+                self.indice.guardar()
+            if self.segmentos is not None:
+                self.segmentos.close()
+
+    def escanear_paralelo(self, nivel=None, usuario=None, desde=None, procesos=None,
+                          recoger_lineas=True, contar_usuarios=False):
+        """Escaneo forense del archivo activo con mmap y un pool de procesos"""
+        self._drenar()
+        if isinstance(desde, datetime):
+            desde = desde.strftime('%Y-%m-%d %H:%M:%S')
+        return escanear_log_paralelo(self.archivo_log, nivel, usuario, desde, procesos,
+                                     recoger_lineas, contar_usuarios, tuple(self.niveles))
+
+    def reconstruir_indice(self):
+        """Genera (o regenera) el índice de offsets de un log existente"""
+        self._drenar()
+        if self.indice is None:
+            self.indice = IndiceLogs(self.archivo_log)
+        self.indice.reconstruir()
+        return len(self.indice.bloques)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def leer_logs(self, nivel=None, usuario=None, ultimas_lineas=10, desde=None):
+        """
+        Lee logs con filtros opcionales. 'desde' acepta un datetime o un
+        texto 'YYYY-MM-DD HH:MM:SS' y descarta las líneas anteriores
+        """
+        self._drenar()
+        hay_segmentos = self.segmentos is not None and self.segmentos.segmentos
+        if not os.path.exists(self.archivo_log) and not hay_segmentos:
             return "No hay logs registrados"
 
+        if isinstance(desde, datetime):
+            desde = desde.strftime('%Y-%m-%d %H:%M:%S')
+
+        resultado = []
+        if os.path.exists(self.archivo_log):
+            resultado = self._leer_archivo_activo(nivel, usuario, ultimas_lineas, desde)
+
+        # Completar con los segmentos rotados si faltan líneas
+        if hay_segmentos and (not ultimas_lineas or len(resultado) < ultimas_lineas):
+            maximo = ultimas_lineas - len(resultado) if ultimas_lineas else None
+            cumple = self._crear_filtro(nivel, usuario, desde)
+            resultado = self.segmentos.leer(cumple, nivel, usuario, desde, maximo) + resultado
+
+        return resultado
+
+    def _leer_archivo_activo(self, nivel, usuario, ultimas_lineas, desde):
+        """Aplica los filtros sobre el archivo activo (sin segmentos)"""
+        filtrando = nivel is not None or usuario is not None or desde is not None
+        if self.indice is not None and filtrando:
+            return self._leer_con_indice(nivel, usuario, ultimas_lineas, desde)
+
+        if ultimas_lineas:
+            return self._leer_cola(nivel, usuario, ultimas_lineas, desde)
+
         with open(self.archivo_log, 'r', encoding='utf-8') as archivo:
             lineas = archivo.readlines()
 
@@ -330,34 +2111,122 @@ class SistemaLogs:
         for linea in lineas:
             cumple_nivel = nivel is None or f"[{nivel}]" in linea
             cumple_usuario = usuario is None or f"[{usuario}]" in linea
+            cumple_desde = desde is None or linea[1:20] >= desde
 
-            if cumple_nivel and cumple_usuario:
+            if cumple_nivel and cumple_usuario and cumple_desde:
                 lineas_filtradas.append(linea)
 
         # Retornar últimas líneas
         return lineas_filtradas[-ultimas_lineas:]
 
+    @staticmethod
+    def _crear_filtro(nivel, usuario, desde):
+        """Crea una función que evalúa los filtros sobre líneas en bytes"""
+        etiqueta_nivel = f"[{nivel}]".encode('utf-8') if nivel is not None else None
+        etiqueta_usuario = f"[{usuario}]".encode('utf-8') if usuario is not None else None
+        desde_bytes = desde.encode('utf-8') if desde is not None else None
+
+        def cumple(linea):
+            if etiqueta_nivel is not None and etiqueta_nivel not in linea:
+                return False
+            if etiqueta_usuario is not None and etiqueta_usuario not in linea:
+                return False
+            if desde_bytes is not None and linea[1:20] < desde_bytes:
+                return False
+            return True
+
+        return cumple
+
+    def _leer_cola(self, nivel, usuario, ultimas_lineas, desde=None):
+        """
+        Lee desde el final del archivo hacia atrás y se detiene en cuanto
+        encuentra las N líneas que cumplen los filtros (memoria O(N))
+        """
+        cumple = self._crear_filtro(nivel, usuario, desde)
+
+        encontradas = []
+        for linea in leer_lineas_en_reversa(self.archivo_log):
+            if not cumple(linea):
+                continue
+
+            encontradas.append(linea.decode('utf-8') + '\n')
+            if len(encontradas) == ultimas_lineas:
+                break
+
+        encontradas.reverse()
+        return encontradas
+
+    def _leer_con_indice(self, nivel, usuario, ultimas_lineas, desde):
+        """
+        Lee solo los bloques que el índice señala como candidatos,
+        empezando por el más reciente
+        """
+        self.indice.sincronizar()
+        cumple = self._crear_filtro(nivel, usuario, desde)
+        bloques = self.indice.bloques_candidatos(nivel, usuario, desde)
+
+        encontradas = []
+        with open(self.archivo_log, 'rb') as archivo:
+            for bloque in reversed(bloques):
+                inicio, fin = self.indice.rango_bloque(bloque)
+                archivo.seek(inicio)
+                lineas = archivo.read(fin - inicio).split(b'\n')
+
+                for linea in reversed(lineas):
+                    if linea and cumple(linea):
+                        encontradas.append(linea.decode('utf-8') + '\n')
+                        if len(encontradas) == ultimas_lineas:
+                            break
+                else:
+                    continue
+                break
+
+        encontradas.reverse()
+        return encontradas
+
     def estadisticas_logs(self):
-        """Proporciona estadísticas de los logs"""
-        if not os.path.exists(self.archivo_log):
+        """
+        Proporciona estadísticas de los logs a partir de los contadores
+        incrementales. La primera llamada cuenta lo que falte desde el
+        checkpoint; después es O(1) si nadie más escribió en el archivo.
+        Los segmentos rotados aportan sus conteos desde el manifiesto
+        """
+        self._drenar()
+        with self._bloqueo:
+            return self._calcular_estadisticas()
+
+    def _calcular_estadisticas(self):
+        hay_segmentos = self.segmentos is not None and self.segmentos.segmentos
+        if not os.path.exists(self.archivo_log) and not hay_segmentos:
             return {"total_logs": 0}
 
-        with open(self.archivo_log, 'r', encoding='utf-8') as archivo:
-            lineas = archivo.readlines()
-
-        conteo_niveles = {}
-        for linea in lineas:
-            for nivel in self.niveles:
-                if f"[{nivel}]" in linea:
-                    conteo_niveles[nivel] = conteo_niveles.get(nivel, 0) + 1
-                    break
-
-        return {
-            'total_logs': len(lineas),
+        estadisticas = self.estadisticas
+        estadisticas.sincronizar()
+
+        total_logs = estadisticas.total_lineas
+        conteo_niveles = dict(estadisticas.por_nivel)
+        conteo_usuarios = dict(estadisticas.por_usuario)
+        tamaño_bytes = estadisticas.offset
+
+        if hay_segmentos:
+            totales = self.segmentos.totales()
+            total_logs += totales['total_lineas']
+            tamaño_bytes += totales['tamaño_bytes']
+            for conteo, parcial in ((conteo_niveles, totales['por_nivel']),
+                                    (conteo_usuarios, totales['por_usuario'])):
+                for nombre, cantidad in parcial.items():
+                    conteo[nombre] = conteo.get(nombre, 0) + cantidad
+
+        resultado = {
+            'total_logs': total_logs,
             'conteo_por_nivel': conteo_niveles,
+            'conteo_por_usuario': conteo_usuarios,
             'archivo': self.archivo_log,
-            'tamaño_bytes': os.path.getsize(self.archivo_log)
+            'tamaño_bytes': tamaño_bytes
         }
+        if hay_segmentos:
+            resultado['segmentos'] = len(self.segmentos.segmentos)
+        return resultado
 
 
 # Usar el sistema de logs
@@ -386,11 +2255,659 @@ stats = sistema_logs.estadisticas_logs()
 for clave, valor in stats.items():
     print(f"   {clave}: {valor}")
 
+if __name__ == '__main__':
+    print("\n5. MODO BUFFER (GROUP COMMIT) VS DIRECTO:")
+    for modo, n_lineas in [('directo', 2000), ('buffer', 20000)]:
+        archivo_log = f'mi_sistema_{modo}.log'
+        with SistemaLogs(archivo_log, modo=modo, mostrar_consola=False) as logs:
+            inicio = time.perf_counter()
+            for i in range(n_lineas):
+                logs.registrar('INFO', f'Evento de prueba {i}', 'benchmark')
+            logs.flush()
+            duracion = time.perf_counter() - inicio
+        print(f"   {modo:8}: {n_lineas / duracion:,.0f} líneas/segundo")
+        for archivo in (archivo_log, archivo_log + '.stats'):
+            os.remove(archivo)
+
+
+def generar_log_sintetico(archivo_log, n_lineas):
+    """Genera un log con el formato de SistemaLogs que abarca la última semana"""
+    import random
+
+    usuarios = ['SISTEMA', 'admin', 'app_server', 'backup_service', 'web']
+    niveles = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR']
+    inicio_log = time.time() - 7 * 24 * 3600  # Una semana de logs
+    paso = 7 * 24 * 3600 / n_lineas
+
+    with open(archivo_log, 'w', encoding='utf-8') as archivo:
+        lote = []
+        for i in range(n_lineas):
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(inicio_log + i * paso))
+            lote.append(f"[{timestamp}] [{random.choice(niveles)}] "
+                        f"[{random.choice(usuarios)}] Evento sintético {i}\n")
+            if len(lote) == 10000:
+                archivo.write(''.join(lote))
+                lote.clear()
+        archivo.write(''.join(lote))
+
+    # Los auxiliares de una ejecución anterior ya no describen este archivo
+    borrar_log(archivo_log, solo_auxiliares=True)
+
+
+def borrar_log(archivo_log, solo_auxiliares=False):
+    """Borra un log junto con su índice (.idx) y sus contadores (.stats)"""
+    archivos = [archivo_log + '.idx', archivo_log + '.stats']
+    if not solo_auxiliares:
+        archivos.append(archivo_log)
+    for archivo in archivos:
+        if os.path.exists(archivo):
+            os.remove(archivo)
+
+
+def benchmark_indice_logs(n_lineas=10_000_000, archivo_log='benchmark_indice.log'):
+    """
+    Genera un log sintético de n_lineas y compara una consulta filtrada
+    ('ERROR de app_server en la última hora') con y sin índice
+    """
+    generar_log_sintetico(archivo_log, n_lineas)
+
+    hace_una_hora = datetime.fromtimestamp(time.time() - 3600)
+    resultados = {}
+
+    with SistemaLogs(archivo_log, mostrar_consola=False) as logs:
+        inicio = time.perf_counter()
+        sin_indice = logs.leer_logs('ERROR', 'app_server', ultimas_lineas=0, desde=hace_una_hora)
+        resultados['sin_indice_s'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        logs.reconstruir_indice()
+        resultados['construir_indice_s'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        con_indice = logs.leer_logs('ERROR', 'app_server', ultimas_lineas=0, desde=hace_una_hora)
+        resultados['con_indice_s'] = time.perf_counter() - inicio
+
+    borrar_log(archivo_log)
+    resultados['coincidencias'] = len(con_indice)
+    resultados['mismo_resultado'] = sin_indice == con_indice
+    return resultados
+
+
+if __name__ == '__main__':
+    print("\n6. ÍNDICE DE OFFSETS (benchmark reducido, 10M líneas con el valor por defecto):")
+    mostrar_resultados(benchmark_indice_logs(n_lineas=100_000))
+
+
+def benchmark_escaneo_paralelo(n_lineas=1_000_000, archivo_log='benchmark_escaneo.log',
+                               procesos=None):
+    """Compara el escaneo paralelo con mmap frente al camino con readlines()"""
+    generar_log_sintetico(archivo_log, n_lineas)
+    resultados = {}
+
+    with SistemaLogs(archivo_log, mostrar_consola=False) as logs:
+        inicio = time.perf_counter()
+        con_readlines = logs.leer_logs('ERROR', 'app_server', ultimas_lineas=0)
+        resultados['readlines_s'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        paralelo = logs.escanear_paralelo('ERROR', 'app_server', procesos=procesos)
+        resultados['paralelo_s'] = time.perf_counter() - inicio
+
+    borrar_log(archivo_log)
+    resultados['procesos'] = procesos or os.cpu_count()
+    resultados['coincidencias'] = paralelo['coincidencias']
+    resultados['mismo_resultado'] = con_readlines == paralelo['lineas']
+    return resultados
+
+
+# Sin 'fork', los hijos del pool vuelven a importar este script como __mp_main__
+if __name__ == '__main__':
+    print("\n7. ESCANEO PARALELO CON MMAP (benchmark reducido):")
+    mostrar_resultados(benchmark_escaneo_paralelo(n_lineas=100_000))
+
+print("\n8. ROTACIÓN CON SEGMENTOS COMPRIMIDOS:")
+with SistemaLogs('mi_sistema_rotado.log', modo='buffer', mostrar_consola=False,
+                 rotar_bytes=64 * 1024) as logs_rotados:
+    for i in range(5000):
+        nivel = 'ERROR' if i % 100 == 0 else 'INFO'
+        logs_rotados.registrar(nivel, f'Petición {i} procesada', 'app_server')
+    logs_rotados.segmentos.esperar_compresiones()
+
+    print(f"   Segmentos sellados: {len(logs_rotados.segmentos.segmentos)}")
+    errores = logs_rotados.leer_logs(nivel='ERROR', ultimas_lineas=0)
+    print(f"   Errores en todos los segmentos: {len(errores)}")
+    print(f"   Total de logs: {logs_rotados.estadisticas_logs()['total_logs']}")
+
+# Los segmentos de la demostración no se acumulan entre ejecuciones
+for segmento in logs_rotados.segmentos.segmentos:
+    os.remove(segmento['archivo'])
+os.remove(logs_rotados.segmentos.archivo_manifiesto)
+borrar_log('mi_sistema_rotado.log')
+
+if __name__ == '__main__':
+    print("\n9. MODO ASÍNCRONO (COLA + HILO ESCRITOR):")
+    for modo, politica in [('directo', 'bloquear'), ('asincrono', 'bloquear'),
+                           ('asincrono', 'descartar_debug')]:
+        latencias = []
+        archivo_log = f'mi_sistema_{modo}_{politica}.log'
+        with SistemaLogs(archivo_log, modo=modo, mostrar_consola=False,
+                         capacidad_cola=1000, politica_cola=politica) as logs:
+            for i in range(20000):
+                nivel = 'DEBUG' if i % 2 else 'INFO'
+                inicio = time.perf_counter()
+                logs.registrar(nivel, f'Petición {i} atendida', 'web')
+                latencias.append(time.perf_counter() - inicio)
+            metricas = logs.metricas_cola()
+        borrar_log(archivo_log)
+
+        latencias.sort()
+        p99 = latencias[int(len(latencias) * 0.99)] * 1e6
+        print(f"   {modo:9} {politica:15}: p99 registrar = {p99:.1f} µs")
+        if metricas is not None:
+            print(f"      lotes: {metricas['lotes']}, descartados: {metricas['descartados_por_nivel']}")
+
 # 7. EJEMPLO PRÁCTICO: ORGANIZADOR DE ARCHIVOS
 # --------------------------------------------
 print("\n=== ORGANIZADOR DE ARCHIVOS ===")
 
 
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+
+def _cargar_renameat2():
+    """renameat2() de la libc de Linux (glibc 2.28+), o None si no existe"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    return renameat2
+
+
+_renameat2 = _cargar_renameat2()
+
+
+def renombrar_sin_reemplazar(origen, destino):
+    """
+    Renombra sin pisar un destino existente (FileExistsError si lo hay).
+    os.rename sobrescribe en POSIX, y comprobar antes con lexists deja una
+    carrera: en Linux se usa renameat2(RENAME_NOREPLACE), que es atómico;
+    si el sistema de archivos no lo admite, os.link + unlink para archivos
+    """
+    if _renameat2 is not None:
+        if _renameat2(AT_FDCWD, os.fsencode(origen), AT_FDCWD, os.fsencode(destino),
+                      RENAME_NOREPLACE) == 0:
+            return
+        codigo = ctypes.get_errno()
+        if codigo not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(codigo, os.strerror(codigo), origen, None, destino)
+
+    if os.path.isdir(origen) and not os.path.islink(origen):
+        # Sin enlaces duros para directorios: queda la comprobación previa
+        if os.path.lexists(destino):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), origen, None, destino)
+        os.rename(origen, destino)
+        return
+    os.link(origen, destino, follow_symlinks=False)
+    os.unlink(origen)
+
+
+class MotorMovimientos:
+    """
+    Mueve archivos en paralelo dejando un diario (journal) de solo
+    anexado. El plan completo se escribe y sincroniza antes de mover
+    nada, así una ejecución interrumpida puede reanudarse o deshacerse
+    sin volver a escanear el directorio
+    """
+
+    ARCHIVO_DIARIO = '.organizador_diario.jsonl'
+
+    def __init__(self, directorio_base='.', hilos=16, tamaño_bloque=1024 * 1024):
+        self.directorio_base = directorio_base
+        self.hilos = hilos
+        self.tamaño_bloque = tamaño_bloque
+        self.archivo_diario = os.path.join(directorio_base, self.ARCHIVO_DIARIO)
+        self._bloqueo_diario = threading.Lock()
+        self._terminado = False  # True: la última ejecución de esta instancia cerró el diario
+
+    def _ruta(self, relativa):
+        return os.path.join(self.directorio_base, relativa)
+
+    def _leer_diario(self):
+        """Reconstruye el plan, lo ya hecho y la dirección en curso"""
+        estado = {'plan': {}, 'hechos': set(), 'direccion': 'mover', 'terminado': True}
+        if not os.path.exists(self.archivo_diario):
+            return estado
+
+        with open(self.archivo_diario, 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue  # Última línea a medio escribir por una caída
+
+                operacion = registro['op']
+                if operacion == 'plan' and estado['terminado'] and estado['plan']:
+                    # Plan de una ejecución posterior anexada al mismo diario
+                    estado = {'plan': {}, 'hechos': set(), 'direccion': 'mover', 'terminado': True}
+                if operacion == 'plan':
+                    estado['plan'][registro['id']] = (registro['origen'], registro['destino'])
+                    estado['terminado'] = False
+                elif operacion == 'hecho':
+                    estado['hechos'].add(registro['id'])
+                elif operacion == 'deshacer':
+                    estado['direccion'] = 'deshacer'
+                    estado['hechos'] = set()
+                    estado['terminado'] = False
+                elif operacion == 'fin':
+                    estado['terminado'] = True
+        return estado
+
+    def hay_pendiente(self):
+        """Indica si una ejecución anterior quedó a medias"""
+        if not self._terminado:
+            self._terminado = self._leer_diario()['terminado']
+        return not self._terminado
+
+    def mover(self, movimientos, anexar=False):
+        """
+        Mueve una lista de pares (origen, destino) relativos al directorio
+        base. Dos movimientos con el mismo destino se rechazan antes de
+        escribir el plan (ValueError): el segundo no tendría dónde ir.
+        Con anexar=True el plan se añade al diario en lugar de empezar uno
+        nuevo (reanudar y deshacer actúan sobre la última ejecución)
+        """
+        if self.hay_pendiente():
+            raise RuntimeError("Hay una organización interrumpida: usa reanudar() o deshacer()")
+
+        destinos = {}
+        for origen, destino in movimientos:
+            anterior = destinos.setdefault(os.path.normpath(destino), origen)
+            if anterior != origen:
+                raise ValueError(f"'{anterior}' y '{origen}' tienen el mismo destino: '{destino}'")
+
+        with open(self.archivo_diario, 'a' if anexar else 'w', encoding='utf-8') as diario:
+            diario.write(''.join(
+                json.dumps({'op': 'plan', 'id': i, 'origen': origen, 'destino': destino}) + '\n'
+                for i, (origen, destino) in enumerate(movimientos)))
+            diario.flush()
+            os.fsync(diario.fileno())
+        self._terminado = False
+
+        return self._ejecutar(dict(enumerate(movimientos)))
+
+    def reanudar(self):
+        """Completa (en su dirección original) una ejecución interrumpida"""
+        estado = self._leer_diario()
+        if estado['terminado']:
+            return None
+
+        pendientes = {i: par for i, par in estado['plan'].items() if i not in estado['hechos']}
+        return self._ejecutar(pendientes, deshacer=estado['direccion'] == 'deshacer')
+
+    def deshacer(self):
+        """Devuelve a su origen todo lo movido según el diario"""
+        estado = self._leer_diario()
+        if not estado['plan']:
+            return None
+
+        if estado['direccion'] == 'deshacer':
+            pendientes = {i: par for i, par in estado['plan'].items() if i not in estado['hechos']}
+        else:
+            with open(self.archivo_diario, 'a', encoding='utf-8') as diario:
+                diario.write(json.dumps({'op': 'deshacer'}) + '\n')
+            self._terminado = False
+            pendientes = estado['plan']
+        return self._ejecutar(pendientes, deshacer=True)
+
+    def _ejecutar(self, pendientes, deshacer=False):
+        """Aplica los movimientos pendientes con un pool de hilos"""
+        inicio = time.perf_counter()
+        resumen = {'movidos': 0, 'entre_dispositivos': 0, 'omitidos': 0, 'errores': []}
+
+        pares = {i: (destino, origen) if deshacer else (origen, destino)
+                 for i, (origen, destino) in pendientes.items()}
+        for directorio in {os.path.dirname(destino) for _, destino in pares.values()}:
+            os.makedirs(self._ruta(directorio), exist_ok=True)
+
+        with open(self.archivo_diario, 'a', encoding='utf-8') as diario:
+            def aplicar(elemento):
+                i, (origen, destino) = elemento
+                try:
+                    resultado = self._mover_uno(origen, destino)
+                except OSError as e:
+                    return origen, e
+                if resultado != 'omitido':
+                    # Sin fsync: si el registro se pierde, reanudar() ve el
+                    # destino sin origen y lo da por hecho ('omitido')
+                    with self._bloqueo_diario:
+                        diario.write(f'{{"op": "hecho", "id": {i}}}\n')
+                        diario.flush()
+                return origen, resultado
+
+            with ThreadPoolExecutor(max_workers=self.hilos) as ejecutor:
+                for origen, resultado in ejecutor.map(aplicar, pares.items()):
+                    if isinstance(resultado, OSError):
+                        resumen['errores'].append((origen, str(resultado)))
+                    elif resultado == 'omitido':
+                        resumen['omitidos'] += 1
+                    else:
+                        resumen['movidos'] += 1
+                        if resultado == 'copia':
+                            resumen['entre_dispositivos'] += 1
+
+            # Los errores quedan en el resumen; el diario se da por cerrado
+            diario.write(json.dumps({'op': 'fin'}) + '\n')
+            diario.flush()
+            os.fsync(diario.fileno())
+        self._terminado = True
+
+        resumen['segundos'] = time.perf_counter() - inicio
+        return resumen
+
+    def _mover_uno(self, origen, destino):
+        """
+        Renombra un archivo sin pisar el destino; entre dispositivos copia
+        por bloques, hace fsync y solo entonces borra el original. Si el
+        movimiento ya se aplicó antes de una caída devuelve 'omitido'
+        """
+        ruta_origen = self._ruta(origen)
+        ruta_destino = self._ruta(destino)
+
+        if os.path.lexists(ruta_destino) and not os.path.lexists(ruta_origen):
+            return 'omitido'
+
+        try:
+            renombrar_sin_reemplazar(ruta_origen, ruta_destino)
+            return 'rename'
+        except FileExistsError:
+            raise FileExistsError(errno.EEXIST, "El destino ya existe", destino) from None
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+        temporal = ruta_destino + '.parcial'
+        with open(ruta_origen, 'rb') as entrada, open(temporal, 'wb') as salida:
+            shutil.copyfileobj(entrada, salida, self.tamaño_bloque)
+            salida.flush()
+            os.fsync(salida.fileno())
+        shutil.copystat(ruta_origen, temporal)
+        try:
+            renombrar_sin_reemplazar(temporal, ruta_destino)
+        except FileExistsError:
+            os.unlink(temporal)
+            raise FileExistsError(errno.EEXIST, "El destino ya existe", destino) from None
+        os.unlink(ruta_origen)
+        return 'copia'
+
+
+class DetectorDuplicados:
+    """
+    Busca archivos duplicados en tres pasadas cada vez más caras: agrupa
+    por tamaño, luego por un hash barato del primer y último bloque, y
+    solo calcula el hash completo de los que siguen coincidiendo. Los
+    hashes se guardan en una cache (ruta, tamaño, mtime) → digest
+    """
+
+    ARCHIVO_CACHE = '.organizador_hashes.json'
+    BLOQUE_PARCIAL = 64 * 1024
+
+    def __init__(self, directorio_base='.', hilos=8):
+        self.directorio_base = directorio_base
+        self.hilos = hilos
+        self.archivo_cache = os.path.join(directorio_base, self.ARCHIVO_CACHE)
+        self.cache = {}
+        self._calculados = set()  # Rutas hasheadas en esta ejecución
+        if os.path.exists(self.archivo_cache):
+            with open(self.archivo_cache, 'r', encoding='utf-8') as archivo:
+                self.cache = json.load(archivo)
+
+    def guardar_cache(self):
+        """Persiste la cache de hashes de forma atómica"""
+        temporal = self.archivo_cache + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(self.cache, archivo)
+        os.replace(temporal, self.archivo_cache)
+
+    def _stat(self, ruta):
+        try:
+            info = os.stat(os.path.join(self.directorio_base, ruta))
+        except OSError:
+            return None
+        return ruta, info.st_size, info.st_mtime_ns, (info.st_dev, info.st_ino)
+
+    def _hash(self, ruta, tamaño, mtime, tipo):
+        """Devuelve el hash 'parcial' o 'completo', usando la cache si sigue vigente"""
+        entrada = self.cache.get(ruta)
+        if entrada is None or entrada['tamaño'] != tamaño or entrada['mtime'] != mtime:
+            entrada = {'tamaño': tamaño, 'mtime': mtime}
+        elif tipo in entrada:
+            return entrada[tipo], ruta not in self._calculados
+
+        digest = hashlib.blake2b()
+        with open(os.path.join(self.directorio_base, ruta), 'rb') as archivo:
+            if tipo == 'parcial':
+                digest.update(archivo.read(self.BLOQUE_PARCIAL))
+                if tamaño > 2 * self.BLOQUE_PARCIAL:
+                    archivo.seek(-self.BLOQUE_PARCIAL, os.SEEK_END)
+                digest.update(archivo.read(self.BLOQUE_PARCIAL))
+            else:
+                for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+                    digest.update(bloque)
+
+        entrada[tipo] = digest.hexdigest()
+        # Si el bloque parcial ya cubre todo el archivo, es también el completo
+        if tipo == 'parcial' and tamaño <= 2 * self.BLOQUE_PARCIAL:
+            entrada['completo'] = entrada[tipo]
+        self.cache[ruta] = entrada
+        self._calculados.add(ruta)
+        return entrada[tipo], False
+
+    def _agrupar(self, ejecutor, grupos, tipo, resumen):
+        """Reparte los hashes de cada grupo entre los hilos y subdivide"""
+        candidatos = [archivo for grupo in grupos for archivo in grupo]
+        hashes = ejecutor.map(lambda a: self._hash(a[0], a[1], a[2], tipo), candidatos)
+
+        subgrupos = {}
+        for archivo, (digest, de_cache) in zip(candidatos, hashes):
+            resumen['desde_cache' if de_cache else f'hash_{tipo}'] += 1
+            subgrupos.setdefault((archivo[1], digest), []).append(archivo)
+        return [grupo for grupo in subgrupos.values() if len(grupo) > 1]
+
+    def buscar(self, rutas, enlazar=False):
+        """
+        Devuelve los grupos de duplicados entre las rutas dadas (relativas
+        al directorio base). Con enlazar=True sustituye cada copia por un
+        enlace duro al primer archivo del grupo
+        """
+        resumen = {'grupos': [], 'bytes_duplicados': 0, 'enlazados': 0,
+                   'hash_parcial': 0, 'hash_completo': 0, 'desde_cache': 0}
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as ejecutor:
+            por_tamaño = {}
+            for archivo in ejecutor.map(self._stat, rutas):
+                if archivo is not None and archivo[1] > 0:
+                    por_tamaño.setdefault(archivo[1], []).append(archivo)
+
+            # Las rutas que ya son enlaces duros del mismo inodo cuentan una vez
+            grupos = []
+            for grupo in por_tamaño.values():
+                unicos = list({archivo[3]: archivo for archivo in grupo}.values())
+                if len(unicos) > 1:
+                    grupos.append(unicos)
+
+            grupos = self._agrupar(ejecutor, grupos, 'parcial', resumen)
+            grupos = self._agrupar(ejecutor, grupos, 'completo', resumen)
+
+        # Las rutas que ya no existen no deben crecer la cache indefinidamente
+        vigentes = set(rutas)
+        self.cache = {ruta: entrada for ruta, entrada in self.cache.items() if ruta in vigentes}
+        self.guardar_cache()
+
+        for grupo in sorted(grupos):
+            original, *copias = sorted(archivo[0] for archivo in grupo)
+            resumen['grupos'].append([original] + copias)
+            resumen['bytes_duplicados'] += grupo[0][1] * len(copias)
+            if enlazar:
+                for copia in copias:
+                    self._enlazar(original, copia)
+                    resumen['enlazados'] += 1
+        return resumen
+
+    def _enlazar(self, original, copia):
+        """Sustituye la copia por un enlace duro de forma atómica"""
+        ruta_copia = os.path.join(self.directorio_base, copia)
+        temporal = ruta_copia + '.enlace'
+        os.link(os.path.join(self.directorio_base, original), temporal)
+        os.replace(temporal, ruta_copia)
+
+
+class VigilanteDirectorio:
+    """
+    Observa un directorio y entrega los archivos nuevos en lotes, tras un
+    periodo de calma (debounce). En Linux usa inotify a través de libc;
+    en otro caso sondea el mtime del directorio y solo relee el listado
+    cuando ha cambiado. En los dos modos un archivo es nuevo si su nombre
+    no estaba en el directorio: reescribir uno existente no lo entrega
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    CABECERA_EVENTO = struct.Struct('iIII')  # wd, mask, cookie, len
+
+    def __init__(self, directorio, debounce=0.5, intervalo_sondeo=1.0, forzar_sondeo=False):
+        self.directorio = directorio
+        self.debounce = debounce
+        self.intervalo_sondeo = intervalo_sondeo
+        self._pendientes = {}  # nombre → instante del último evento
+
+        self._fd = None if forzar_sondeo else self._abrir_inotify()
+        self.modo = 'inotify' if self._fd is not None else 'sondeo'
+
+        # Lo que ya existía no es nuevo (y es la base para releer el listado)
+        self._mtime_directorio = os.stat(directorio).st_mtime_ns
+        self._conocidos = self._listar()
+        self._abiertos = set()  # creados con inotify que aún no se han cerrado
+
+    def _abrir_inotify(self):
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+
+        mascara = (self.IN_CREATE | self.IN_CLOSE_WRITE | self.IN_MOVED_TO |
+                   self.IN_MOVED_FROM | self.IN_DELETE)
+        if libc.inotify_add_watch(fd, os.fsencode(self.directorio), mascara) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _listar(self):
+        with os.scandir(self.directorio) as entradas:
+            return {entrada.name for entrada in entradas if entrada.is_file()}
+
+    def _releer_listado(self):
+        """Nombres que están en el directorio y no en el último listado"""
+        actuales = self._listar()
+        nuevos = actuales - self._conocidos
+        self._conocidos = actuales
+        self._abiertos &= actuales
+        return list(nuevos)
+
+    def _eventos_inotify(self, espera):
+        """
+        Nombres nuevos durante la espera: creados y ya cerrados tras
+        escribirlos, o movidos al directorio. Si la cola de inotify se
+        desborda se han perdido eventos y se relee el listado completo
+        """
+        nombres = []
+        if not select.select([self._fd], [], [], espera)[0]:
+            return nombres
+
+        while True:
+            try:
+                datos = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return nombres
+
+            posicion = 0
+            while posicion < len(datos):
+                _, mascara, _, longitud = self.CABECERA_EVENTO.unpack_from(datos, posicion)
+                posicion += self.CABECERA_EVENTO.size
+                nombre = os.fsdecode(datos[posicion:posicion + longitud].rstrip(b'\0'))
+                posicion += longitud
+                if mascara & self.IN_Q_OVERFLOW:
+                    nombres.extend(self._releer_listado())
+                elif not nombre or mascara & self.IN_ISDIR:
+                    continue
+                elif mascara & (self.IN_MOVED_FROM | self.IN_DELETE):
+                    self._conocidos.discard(nombre)
+                    self._abiertos.discard(nombre)
+                elif mascara & self.IN_CREATE:
+                    self._abiertos.add(nombre)
+                elif mascara & self.IN_CLOSE_WRITE:
+                    if nombre in self._abiertos:
+                        self._abiertos.discard(nombre)
+                        self._conocidos.add(nombre)
+                        nombres.append(nombre)
+                elif mascara & self.IN_MOVED_TO:
+                    self._conocidos.add(nombre)
+                    nombres.append(nombre)
+
+    def _eventos_sondeo(self, espera):
+        """Relee el listado solo si el mtime del directorio ha cambiado"""
+        time.sleep(espera)
+        mtime = os.stat(self.directorio).st_mtime_ns
+        if mtime == self._mtime_directorio:
+            return []
+
+        self._mtime_directorio = mtime
+        return self._releer_listado()
+
+    def esperar_lote(self):
+        """Espera eventos y devuelve los archivos que llevan 'debounce' en calma"""
+        espera = self.debounce if self._pendientes else self.intervalo_sondeo
+        if self._fd is not None:
+            nombres = self._eventos_inotify(espera)
+        else:
+            nombres = self._eventos_sondeo(min(espera, self.intervalo_sondeo))
+
+        ahora = time.monotonic()
+        for nombre in nombres:
+            self._pendientes[nombre] = ahora
+
+        listos = [nombre for nombre, instante in self._pendientes.items()
+                  if ahora - instante >= self.debounce]
+        for nombre in listos:
+            del self._pendientes[nombre]
+        return listos
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
 class OrganizadorArchivos:
     """Organiza archivos en directorios por tipo"""
 
@@ -404,30 +2921,75 @@ class OrganizadorArchivos:
         'comprimidos': ['.zip', '.rar', '.7z', '.tar', '.gz']
     }
 
-    def __init__(self, directorio_base='.'):
-        self.directorio_base = directorio_base
+    # Búsqueda inversa precalculada: extensión → categoría en O(1)
+    EXTENSION_A_CATEGORIA = {extension: categoria
+                             for categoria, extensiones in CATEGORIAS.items()
+                             for extension in extensiones}
 
-    def analizar_directorio(self):
-        """Analiza los archivos en el directorio"""
+    # Archivos auxiliares del propio organizador que no se clasifican
+    ARCHIVOS_INTERNOS = {MotorMovimientos.ARCHIVO_DIARIO, DetectorDuplicados.ARCHIVO_CACHE}
+
+    def __init__(self, directorio_base='.', hilos_movimiento=16):
+        self.directorio_base = directorio_base
+        self.motor = MotorMovimientos(directorio_base, hilos_movimiento)
+
+    def analizar_directorio(self, recursivo=False, hilos=None):
+        """
+        Analiza los archivos en el directorio. Con recursivo=True recorre
+        todo el árbol repartiendo los subdirectorios entre un pool de
+        hilos y devuelve rutas relativas a directorio_base
+        """
         archivos_por_categoria = {categoria: [] for categoria in self.CATEGORIAS}
         archivos_por_categoria['otros'] = []
 
-        for archivo in os.listdir(self.directorio_base):
-            ruta_completa = os.path.join(self.directorio_base, archivo)
-
-            if os.path.isfile(ruta_completa):
-                extension = os.path.splitext(archivo)[1].lower()
-                categoria = self._clasificar_archivo(extension)
+        if not recursivo:
+            clasificados, _ = self._escanear_directorio('')
+            for categoria, archivo in clasificados:
                 archivos_por_categoria[categoria].append(archivo)
-
+            return archivos_por_categoria
+
+        with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            pendientes = {ejecutor.submit(self._escanear_directorio, '')}
+            while pendientes:
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    clasificados, subdirectorios = futuro.result()
+                    for categoria, archivo in clasificados:
+                        archivos_por_categoria[categoria].append(archivo)
+                    for subdirectorio in subdirectorios:
+                        pendientes.add(ejecutor.submit(self._escanear_directorio, subdirectorio))
+
+        # Los hilos terminan en cualquier orden; se ordena para un resultado estable
+        for archivos in archivos_por_categoria.values():
+            archivos.sort()
         return archivos_por_categoria
 
+    def _escanear_directorio(self, ruta_relativa):
+        """
+        Lee un directorio con os.scandir, que trae el tipo de cada entrada
+        sin un stat adicional, y clasifica sus archivos
+        """
+        clasificados = []
+        subdirectorios = []
+        try:
+            with os.scandir(os.path.join(self.directorio_base, ruta_relativa)) as entradas:
+                for entrada in entradas:
+                    if not ruta_relativa and entrada.name in self.ARCHIVOS_INTERNOS:
+                        continue
+                    ruta = os.path.join(ruta_relativa, entrada.name) if ruta_relativa else entrada.name
+                    if entrada.is_dir(follow_symlinks=False):
+                        subdirectorios.append(ruta)
+                    elif entrada.is_file():
+                        extension = os.path.splitext(entrada.name)[1].lower()
+                        clasificados.append((self._clasificar_archivo(extension), ruta))
+        except OSError as e:
+            print(f"  ✗ Error leyendo {ruta_relativa or self.directorio_base}: {e}")
+
+        return clasificados, subdirectorios
+
     def _clasificar_archivo(self, extension):
         """Clasifica un archivo por su extensión"""
-        for categoria, extensiones in self.CATEGORIAS.items():
-            if extension in extensiones:
-                return categoria
-        return 'otros'
+        return self.EXTENSION_A_CATEGORIA.get(extension, 'otros')
 
     def organizar_archivos(self, ejecutar=False):
         """Organiza los archivos en carpetas por categoría"""
@@ -452,23 +3014,117 @@ class OrganizadorArchivos:
             print("No hay archivos para organizar")
 
     def _ejecutar_organizacion(self, archivos_por_categoria):
-        """Ejecuta la organización real de archivos"""
-        for categoria, archivos in archivos_por_categoria.items():
-            if archivos:
-                # Crear directorio si no existe
-                directorio_categoria = os.path.join(self.directorio_base, categoria)
-                os.makedirs(directorio_categoria, exist_ok=True)
-
-                # Mover archivos
-                for archivo in archivos:
-                    ruta_original = os.path.join(self.directorio_base, archivo)
-                    ruta_destino = os.path.join(directorio_categoria, archivo)
-
-                    try:
-                        os.rename(ruta_original, ruta_destino)
-                        print(f"  ✓ Movido: {archivo} → {categoria}/")
-                    except Exception as e:
-                        print(f"  ✗ Error moviendo {archivo}: {e}")
+        """Ejecuta la organización real de archivos con el motor con diario"""
+        movimientos = [(archivo, os.path.join(categoria, os.path.basename(archivo)))
+                       for categoria, archivos in archivos_por_categoria.items()
+                       for archivo in archivos]
+        return self._mostrar_resumen(self.motor.mover(movimientos))
+
+    def buscar_duplicados(self, enlazar=False, hilos=8):
+        """
+        Informa de los archivos duplicados en todo el árbol y, con
+        enlazar=True, deja un único contenido enlazado desde cada copia
+        """
+        rutas = [archivo
+                 for archivos in self.analizar_directorio(recursivo=True).values()
+                 for archivo in archivos]
+        resumen = DetectorDuplicados(self.directorio_base, hilos).buscar(rutas, enlazar)
+
+        for grupo in resumen['grupos']:
+            print(f"  ≡ {grupo[0]}: {len(grupo) - 1} copias")
+            for copia in grupo[1:]:
+                print(f"     ➤ {copia}")
+        print(f"  Bytes duplicados: {resumen['bytes_duplicados']:,} "
+              f"(hashes completos calculados: {resumen['hash_completo']}, "
+              f"desde cache: {resumen['desde_cache']})")
+        return resumen
+
+    def vigilar(self, duracion=None, debounce=0.5, intervalo_sondeo=1.0, forzar_sondeo=False):
+        """
+        Modo vigilancia: clasifica y mueve solo los archivos que se crean o
+        renombran dentro del directorio, así el coste depende de los
+        cambios y no del tamaño del directorio. Sin duración, hasta Ctrl+C
+        """
+        if self.motor.hay_pendiente():
+            self.reanudar_organizacion()
+
+        totales = {'movidos': 0, 'errores': 0, 'lotes': 0}
+        with VigilanteDirectorio(self.directorio_base, debounce, intervalo_sondeo,
+                                 forzar_sondeo) as vigilante:
+            print(f"  Vigilando {self.directorio_base} (modo {vigilante.modo})")
+            fin = time.monotonic() + duracion if duracion is not None else None
+            try:
+                while fin is None or time.monotonic() < fin:
+                    movimientos = []
+                    for nombre in vigilante.esperar_lote():
+                        if nombre.startswith(tuple(self.ARCHIVOS_INTERNOS)):
+                            continue
+                        try:
+                            if not stat.S_ISREG(os.lstat(os.path.join(self.directorio_base, nombre)).st_mode):
+                                continue
+                        except FileNotFoundError:
+                            continue  # Ya se movió o se borró durante el debounce
+
+                        categoria = self._clasificar_archivo(os.path.splitext(nombre)[1].lower())
+                        movimientos.append((nombre, os.path.join(categoria, nombre)))
+
+                    if movimientos:
+                        # El diario de la sesión se empieza en el primer lote y luego se anexa
+                        resumen = self._mostrar_resumen(
+                            self.motor.mover(movimientos, anexar=totales['lotes'] > 0))
+                        totales['movidos'] += resumen['movidos']
+                        totales['errores'] += len(resumen['errores'])
+                        totales['lotes'] += 1
+            except KeyboardInterrupt:
+                pass
+        return totales
+
+    def reanudar_organizacion(self):
+        """Termina una organización interrumpida usando solo el diario"""
+        return self._mostrar_resumen(self.motor.reanudar())
+
+    def deshacer_organizacion(self):
+        """Devuelve los archivos a su sitio original según el diario"""
+        return self._mostrar_resumen(self.motor.deshacer())
+
+    @staticmethod
+    def _mostrar_resumen(resumen):
+        if resumen is None:
+            print("  No hay ninguna organización registrada en el diario")
+            return None
+
+        print(f"  ✓ Movidos: {resumen['movidos']} "
+              f"({resumen['entre_dispositivos']} entre dispositivos, "
+              f"{resumen['omitidos']} ya aplicados) en {resumen['segundos']:.3f} s")
+        for archivo, error in resumen['errores']:
+            print(f"  ✗ Error moviendo {archivo}: {error}")
+        return resumen
+
+
+def benchmark_movimientos(n_archivos=100_000, directorio='benchmark_organizador', hilos=16):
+    """Mide cuántos archivos pequeños por segundo organiza el motor con diario"""
+    extensiones = ['.txt', '.jpg', '.mp3', '.py', '.zip', '.dat']
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio)
+    for i in range(n_archivos):
+        with open(os.path.join(directorio, f'archivo_{i}{extensiones[i % len(extensiones)]}'), 'wb') as archivo:
+            archivo.write(b'x' * 128)
+
+    organizador = OrganizadorArchivos(directorio, hilos_movimiento=hilos)
+    archivos_por_categoria = organizador.analizar_directorio()
+    movimientos = [(archivo, os.path.join(categoria, archivo))
+                   for categoria, archivos in archivos_por_categoria.items()
+                   for archivo in archivos]
+
+    resultados = {}
+    resumen = organizador.motor.mover(movimientos)
+    resultados['mover_archivos_s'] = resumen['movidos'] / resumen['segundos']
+    resumen = organizador.motor.deshacer()
+    resultados['deshacer_archivos_s'] = resumen['movidos'] / resumen['segundos']
+    resultados['errores'] = len(resumen['errores'])
+
+    shutil.rmtree(directorio)
+    return resultados
 
 
 # Demostración del organizador (solo análisis, sin ejecutar)
@@ -484,6 +3140,48 @@ for categoria, archivos in archivos_por_categoria.items():
         if len(archivos) > 3:
             print(f"    ... y {len(archivos) - 3} más")
 
+print("\nANÁLISIS RECURSIVO (os.scandir + pool de hilos):")
+inicio = time.perf_counter()
+archivos_recursivos = organizador.analizar_directorio(recursivo=True)
+duracion = time.perf_counter() - inicio
+total_recursivo = sum(len(archivos) for archivos in archivos_recursivos.values())
+print(f"  {total_recursivo} archivos clasificados en {duracion:.4f} s")
+
+print("\nDETECCIÓN DE DUPLICADOS (tamaño → hash parcial → hash completo):")
+os.makedirs('duplicados_demo', exist_ok=True)
+for nombre, contenido in [('a.txt', 'mismo contenido'), ('b.txt', 'mismo contenido'),
+                          ('c.txt', 'mismo tamaño!!!'), ('d.txt', 'otro')]:
+    with open(os.path.join('duplicados_demo', nombre), 'w', encoding='utf-8') as archivo:
+        archivo.write(contenido)
+organizador_duplicados = OrganizadorArchivos('duplicados_demo')
+organizador_duplicados.buscar_duplicados()
+print("  Segunda pasada (hashes desde la cache):")
+organizador_duplicados.buscar_duplicados()
+shutil.rmtree('duplicados_demo')
+
+if __name__ == '__main__':
+    print("\nMODO VIGILANCIA (inotify y sondeo):")
+    for forzar_sondeo in (False, True):
+        os.makedirs('vigilado_demo', exist_ok=True)
+
+        def crear_archivos():
+            time.sleep(0.2)
+            for nombre in ('foto.jpg', 'notas.txt', 'script.py'):
+                with open(os.path.join('vigilado_demo', nombre), 'w', encoding='utf-8') as archivo:
+                    archivo.write('contenido')
+
+        creador = threading.Thread(target=crear_archivos)
+        creador.start()
+        totales = OrganizadorArchivos('vigilado_demo').vigilar(duracion=1.5, debounce=0.2,
+                                                                 intervalo_sondeo=0.2,
+                                                                 forzar_sondeo=forzar_sondeo)
+        creador.join()
+        print(f"  Totales: {totales}")
+        shutil.rmtree('vigilado_demo')
+
+    print("\nMOTOR DE MOVIMIENTOS CON DIARIO (benchmark reducido, 100k con el valor por defecto):")
+    mostrar_resultados(benchmark_movimientos(n_archivos=5000), ',.0f', sangria='  ')
+
 print("\n" + "=" * 60)
 print("¡Manejo de archivos demostrado exitosamente!")
 print("Archivos creados durante la demostración:")
@@ -3,6 +3,24 @@ Decoradores en Python
 Funciones que modifican el comportamiento de otras funciones
 """
 
+import asyncio
+import hashlib
+import heapq
+import inspect
+import itertools
+import multiprocessing
+import os
+import pickle
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from cache_compartida import CacheMemoriaCompartida
+
 # 1. FUNCIONES COMO OBJETOS DE PRIMERA CLASE
 # ------------------------------------------
 print("=== FUNCIONES COMO OBJETOS DE PRIMERA CLASE ===")
@@ -228,9 +246,34 @@ print(f"Espera: {esperar_segundos(1)}")
 
 
 def cache_resultados(funcion):
-    """Decorador que cachea los resultados de una función"""
+    """Decorador que cachea los resultados de una función (también async def)"""
     cache = {}
 
+    if inspect.iscoroutinefunction(funcion):
+        en_curso = {}  # clave → tarea que ya está calculando ese resultado
+
+        async def wrapper_asincrono(*args, **kwargs):
+            clave = str(args) + str(sorted(kwargs.items()))
+            if clave in cache:
+                print(f"🚀 Recuperando resultado cacheado para {funcion.__name__}{args}")
+                return cache[clave]
+
+            if clave not in en_curso:
+                print(f"💾 Calculando nuevo resultado para {funcion.__name__}{args}")
+
+                async def calcular():
+                    try:
+                        cache[clave] = await funcion(*args, **kwargs)
+                        return cache[clave]
+                    finally:
+                        del en_curso[clave]
+
+                en_curso[clave] = asyncio.ensure_future(calcular())
+            # shield: si se cancela quien espera, el cálculo compartido sigue
+            return await asyncio.shield(en_curso[clave])
+
+        return wrapper_asincrono
+
     def wrapper(*args, **kwargs):
         # Crear una clave única para los argumentos
         clave = str(args) + str(sorted(kwargs.items()))
@@ -523,70 +566,239 @@ print("\n=== SISTEMA DE CACHÉ AVANZADO ===")
 
 
 class SistemaCache:
-    """Sistema de cache avanzado con decoradores"""
-
-    def __init__(self):
-        self.cache = {}
+    """
+    Sistema de cache avanzado con decoradores: claves en tupla, LRU O(1)
+    acotado por entradas y/o bytes y expiración perezosa con un heap.
+    Con segundo_nivel (p. ej. CacheDisco) los fallos en memoria se
+    consultan allí antes de recalcular
+    """
+
+    def __init__(self, max_entradas=None, max_bytes=None, mostrar_eventos=False,
+                 segundo_nivel=None):
+        self.cache = OrderedDict()  # clave → [resultado, expira_en, tamaño]
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.bytes_en_cache = 0
+        self.mostrar_eventos = mostrar_eventos
+        self.segundo_nivel = segundo_nivel
+        self._expiraciones = []  # heap de (expira_en, desempate, clave)
+        self._desempate = itertools.count()
         self.estadisticas = {
             'aciertos': 0,
             'fallos': 0,
-            'total_llamadas': 0
+            'desalojos': 0,
+            'expirados': 0,
+            'aciertos_segundo_nivel': 0,
+            'compartidas': 0
         }
 
+    @staticmethod
+    def crear_clave(funcion, args, kwargs):
+        """
+        Clave en tupla que incluye los tipos, así f(1), f(1.0) y f(True)
+        no colisionan. Los kwargs se ordenan para no depender del orden
+        """
+        if not kwargs:
+            if len(args) == 1:
+                # Caso más habitual: evita construir la tupla de tipos
+                return funcion, args, type(args[0])
+            return funcion, args, tuple(map(type, args))
+        elementos = tuple(sorted(kwargs.items()))
+        return (funcion, args, tuple(map(type, args)), elementos,
+                tuple(type(valor) for _, valor in elementos))
+
+    @staticmethod
+    def huella(funcion, args, kwargs):
+        """Clave alternativa para argumentos no hashables (listas, dicts...)"""
+        try:
+            datos = pickle.dumps((args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            datos = repr((args, sorted(kwargs.items()))).encode('utf-8')
+        return funcion, 'huella', hashlib.blake2b(datos, digest_size=16).digest()
+
+    def _purgar_expirados(self, ahora):
+        """Saca del heap las expiraciones vencidas y borra esas entradas"""
+        expiraciones = self._expiraciones
+        while expiraciones and expiraciones[0][0] <= ahora:
+            expira_en, _, clave = heapq.heappop(expiraciones)
+            entrada = self.cache.get(clave)
+            # Si la entrada se reescribió, este registro del heap ya no vale
+            if entrada is not None and entrada[1] == expira_en:
+                del self.cache[clave]
+                self.bytes_en_cache -= entrada[2]
+                self.estadisticas['expirados'] += 1
+
+        # Las reescrituras dejan registros huérfanos: se reconstruye si sobran muchos
+        if len(expiraciones) > 2 * len(self.cache) + 64:
+            self._expiraciones = [(entrada[1], next(self._desempate), clave)
+                                  for clave, entrada in self.cache.items() if entrada[1] is not None]
+            heapq.heapify(self._expiraciones)
+
+    def guardar(self, clave, resultado, tiempo_vida=None):
+        """Inserta un resultado y desaloja por LRU hasta cumplir los límites"""
+        ahora = time.monotonic()
+        self._purgar_expirados(ahora)
+
+        expira_en = ahora + tiempo_vida if tiempo_vida is not None else None
+        tamaño = sys.getsizeof(resultado) if self.max_bytes is not None else 0
+
+        anterior = self.cache.pop(clave, None)
+        if anterior is not None:
+            self.bytes_en_cache -= anterior[2]
+        self.cache[clave] = [resultado, expira_en, tamaño]
+        self.bytes_en_cache += tamaño
+        if expira_en is not None:
+            heapq.heappush(self._expiraciones, (expira_en, next(self._desempate), clave))
+
+        # popitem(last=False) saca la entrada menos usada recientemente en O(1)
+        while self.cache and (
+                (self.max_entradas is not None and len(self.cache) > self.max_entradas) or
+                (self.max_bytes is not None and self.bytes_en_cache > self.max_bytes)):
+            _, desalojada = self.cache.popitem(last=False)
+            self.bytes_en_cache -= desalojada[2]
+            self.estadisticas['desalojos'] += 1
+
     def cachear(self, tiempo_vida=60):
-        """Decorador para cachear resultados con tiempo de vida"""
+        """
+        Decorador para cachear resultados con tiempo de vida (None = sin
+        caducidad). Acepta también funciones async def
+        """
 
         def decorador(funcion):
-            @wraps(funcion)
-            def wrapper(*args, **kwargs):
-                self.estadisticas['total_llamadas'] += 1
-
-                # Crear clave única
-                clave = f"{funcion.__name__}_{str(args)}_{str(kwargs)}"
-                tiempo_actual = time.time()
+            if inspect.iscoroutinefunction(funcion):
+                return self._cachear_asincrona(funcion, tiempo_vida)
 
-                # Verificar si está en cache y no ha expirado
-                if (clave in self.cache and
-                        tiempo_actual - self.cache[clave]['timestamp'] < tiempo_vida):
-                    self.estadisticas['aciertos'] += 1
-                    print(f"🚀 Cache HIT para {funcion.__name__}")
-                    return self.cache[clave]['resultado']
+            cache = self.cache
+            estadisticas = self.estadisticas
+            crear_clave = self.crear_clave
+            reloj = time.monotonic
 
-                # Ejecutar función y guardar en cache
-                self.estadisticas['fallos'] += 1
-                print(f"💾 Cache MISS para {funcion.__name__}, calculando...")
+            @wraps(funcion)
+            def wrapper(*args, **kwargs):
+                clave = crear_clave(funcion, args, kwargs)
+                try:
+                    entrada = cache.get(clave)
+                except TypeError:
+                    clave = self.huella(funcion, args, kwargs)
+                    entrada = cache.get(clave)
+
+                # Camino del acierto: sin prints ni formateo de texto
+                if entrada is not None and (entrada[1] is None or entrada[1] > reloj()):
+                    cache.move_to_end(clave)
+                    estadisticas['aciertos'] += 1
+                    if self.mostrar_eventos:
+                        print(f"🚀 Cache HIT para {funcion.__name__}")
+                    return entrada[0]
+
+                segundo_nivel = self.segundo_nivel
+                if segundo_nivel is not None:
+                    clave_disco = segundo_nivel.crear_clave(funcion, args, kwargs)
+                    encontrado, resultado, vida_restante = segundo_nivel.obtener(clave_disco)
+                    if encontrado:
+                        estadisticas['aciertos'] += 1
+                        estadisticas['aciertos_segundo_nivel'] += 1
+                        if self.mostrar_eventos:
+                            print(f"💽 Cache HIT en segundo nivel para {funcion.__name__}")
+                        self.guardar(clave, resultado, vida_restante)
+                        return resultado
+
+                estadisticas['fallos'] += 1
+                if self.mostrar_eventos:
+                    print(f"💾 Cache MISS para {funcion.__name__}, calculando...")
                 resultado = funcion(*args, **kwargs)
-
-                self.cache[clave] = {
-                    'resultado': resultado,
-                    'timestamp': tiempo_actual,
-                    'funcion': funcion.__name__
-                }
-
+                self.guardar(clave, resultado, tiempo_vida)
+                if segundo_nivel is not None:
+                    segundo_nivel.guardar(clave_disco, resultado, tiempo_vida)
                 return resultado
 
             return wrapper
 
         return decorador
 
+    def _cachear_asincrona(self, funcion, tiempo_vida):
+        """
+        Versión del decorador para corrutinas: guarda el resultado (no la
+        corrutina) y las llamadas simultáneas a la misma clave esperan una
+        única tarea en curso. El segundo nivel se consulta en un hilo
+        aparte para no bloquear el bucle de eventos
+        """
+        cache = self.cache
+        estadisticas = self.estadisticas
+        reloj = time.monotonic
+        en_curso = {}  # clave → tarea que está calculando ese resultado
+
+        async def calcular(clave, args, kwargs):
+            segundo_nivel = self.segundo_nivel
+            if segundo_nivel is not None:
+                clave_disco = segundo_nivel.crear_clave(funcion, args, kwargs)
+                encontrado, resultado, vida_restante = await asyncio.to_thread(segundo_nivel.obtener, clave_disco)
+                if encontrado:
+                    estadisticas['aciertos'] += 1
+                    estadisticas['aciertos_segundo_nivel'] += 1
+                    self.guardar(clave, resultado, vida_restante)
+                    return resultado
+
+            estadisticas['fallos'] += 1
+            if self.mostrar_eventos:
+                print(f"💾 Cache MISS para {funcion.__name__}, calculando...")
+            resultado = await funcion(*args, **kwargs)
+            self.guardar(clave, resultado, tiempo_vida)
+            if segundo_nivel is not None:
+                await asyncio.to_thread(segundo_nivel.guardar, clave_disco, resultado, tiempo_vida)
+            return resultado
+
+        @wraps(funcion)
+        async def wrapper(*args, **kwargs):
+            clave = self.crear_clave(funcion, args, kwargs)
+            try:
+                entrada = cache.get(clave)
+            except TypeError:
+                clave = self.huella(funcion, args, kwargs)
+                entrada = cache.get(clave)
+
+            if entrada is not None and (entrada[1] is None or entrada[1] > reloj()):
+                cache.move_to_end(clave)
+                estadisticas['aciertos'] += 1
+                if self.mostrar_eventos:
+                    print(f"🚀 Cache HIT para {funcion.__name__}")
+                return entrada[0]
+            tarea = en_curso.get(clave)
+            if tarea is not None and tarea.get_loop() is asyncio.get_running_loop():
+                estadisticas['compartidas'] += 1
+            else:
+                tarea = asyncio.ensure_future(calcular(clave, args, kwargs))
+                en_curso[clave] = tarea
+                tarea.add_done_callback(lambda terminada: en_curso.pop(clave, None)
+                                        if en_curso.get(clave) is terminada else None)
+            # shield: cancelar a uno de los que esperan no cancela el cálculo compartido
+            return await asyncio.shield(tarea)
+
+        return wrapper
+
     def obtener_estadisticas(self):
         """Obtiene estadísticas del cache"""
-        total = self.estadisticas['total_llamadas']
+        # Las llamadas que esperaron un cálculo en curso también son aciertos
+        total = self.estadisticas['aciertos'] + self.estadisticas['fallos'] + self.estadisticas['compartidas']
         if total == 0:
             return "Sin llamadas registradas"
 
-        tasa_aciertos = (self.estadisticas['aciertos'] / total) * 100
+        tasa_aciertos = ((self.estadisticas['aciertos'] + self.estadisticas['compartidas']) / total) * 100
         return {
             'total_llamadas': total,
             'aciertos': self.estadisticas['aciertos'],
             'fallos': self.estadisticas['fallos'],
             'tasa_aciertos': f"{tasa_aciertos:.1f}%",
-            'items_en_cache': len(self.cache)
+            'items_en_cache': len(self.cache),
+            'bytes_en_cache': self.bytes_en_cache,
+            'desalojos': self.estadisticas['desalojos'],
+            'expirados': self.estadisticas['expirados'],
+            'aciertos_segundo_nivel': self.estadisticas['aciertos_segundo_nivel'],
+            'llamadas_compartidas': self.estadisticas['compartidas']
         }
 
 
-# Crear sistema de cache
-sistema_cache = SistemaCache()
+# Crear sistema de cache (mostrando HIT/MISS para la demostración)
+sistema_cache = SistemaCache(max_entradas=1000, mostrar_eventos=True)
 
 
 @sistema_cache.cachear(tiempo_vida=2)  # Cache por 2 segundos
@@ -621,5 +833,505 @@ stats = sistema_cache.obtener_estadisticas()
 for clave, valor in stats.items():
     print(f"   {clave}: {valor}")
 
+# Coste de un acierto sin prints en el camino caliente (solo al lanzar el script)
+if __name__ == '__main__':
+    cache_rapido = SistemaCache(max_entradas=100)
+
+    @cache_rapido.cachear(tiempo_vida=None)
+    def cuadrado(x):
+        return x * x
+
+    cuadrado(7)
+    n_llamadas = 200_000
+    inicio = time.perf_counter()
+    for _ in range(n_llamadas):
+        cuadrado(7)
+    duracion = time.perf_counter() - inicio
+    print(f"\nCoste por acierto: {duracion / n_llamadas * 1e9:.0f} ns")
+    print(f"cuadrado(2) y cuadrado(2.0) son entradas distintas: "
+          f"{type(cuadrado(2)).__name__}, {type(cuadrado(2.0)).__name__}")
+
+# 9. CACHÉ CONCURRENTE: FRAGMENTOS Y UNA SOLA EJECUCIÓN POR CLAVE
+# ---------------------------------------------------------------
+print("\n=== CACHÉ CONCURRENTE ===")
+
+
+class _Vuelo:
+    """Cálculo en curso de una clave; los demás hilos esperan su resultado"""
+
+    __slots__ = ('evento', 'resultado', 'error')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class SistemaCacheConcurrente:
+    """
+    SistemaCache seguro entre hilos: las claves se reparten en fragmentos,
+    cada uno con su propio cerrojo (lock striping), y si varios hilos
+    fallan a la vez en la misma clave solo uno calcula (single-flight)
+    """
+
+    def __init__(self, num_fragmentos=16, max_entradas=None, max_bytes=None):
+        self.num_fragmentos = num_fragmentos
+        # Los límites se reparten entre los fragmentos
+        por_fragmento = lambda limite: None if limite is None else max(1, -(-limite // num_fragmentos))
+        self.fragmentos = [SistemaCache(por_fragmento(max_entradas), por_fragmento(max_bytes))
+                           for _ in range(num_fragmentos)]
+        self._cerrojos = [threading.Lock() for _ in range(num_fragmentos)]
+        self._en_vuelo = [{} for _ in range(num_fragmentos)]
+
+        # Contadores por hilo: cada hilo escribe solo en el suyo, se suman al leer
+        self._locales = threading.local()
+        self._contadores = []
+        self._registro = threading.Lock()
+
+    def _contador(self):
+        try:
+            return self._locales.contador
+        except AttributeError:
+            contador = {'aciertos': 0, 'fallos': 0, 'esperas': 0}
+            with self._registro:
+                self._contadores.append(contador)
+            self._locales.contador = contador
+            return contador
+
+    def cachear(self, tiempo_vida=60):
+        """Decorador equivalente a SistemaCache.cachear, seguro entre hilos"""
+
+        def decorador(funcion):
+            crear_clave = SistemaCache.crear_clave
+            reloj = time.monotonic
+
+            @wraps(funcion)
+            def wrapper(*args, **kwargs):
+                clave = crear_clave(funcion, args, kwargs)
+                try:
+                    indice = hash(clave) % self.num_fragmentos
+                except TypeError:
+                    clave = SistemaCache.huella(funcion, args, kwargs)
+                    indice = hash(clave) % self.num_fragmentos
+                fragmento = self.fragmentos[indice]
+                cerrojo = self._cerrojos[indice]
+                en_vuelo = self._en_vuelo[indice]
+                contador = self._contador()
+
+                with cerrojo:
+                    entrada = fragmento.cache.get(clave)
+                    if entrada is not None and (entrada[1] is None or entrada[1] > reloj()):
+                        fragmento.cache.move_to_end(clave)
+                        contador['aciertos'] += 1
+                        return entrada[0]
+                    vuelo = en_vuelo.get(clave)
+                    lider = vuelo is None
+                    if lider:
+                        vuelo = en_vuelo[clave] = _Vuelo()
+
+                if not lider:
+                    # Otro hilo ya está calculando esta clave
+                    contador['esperas'] += 1
+                    vuelo.evento.wait()
+                    if vuelo.error is not None:
+                        raise vuelo.error
+                    return vuelo.resultado
+
+                contador['fallos'] += 1
+                try:
+                    resultado = funcion(*args, **kwargs)
+                except BaseException as error:
+                    vuelo.error = error
+                    with cerrojo:
+                        del en_vuelo[clave]
+                    vuelo.evento.set()
+                    raise
+
+                with cerrojo:
+                    fragmento.guardar(clave, resultado, tiempo_vida)
+                    del en_vuelo[clave]
+                vuelo.resultado = resultado
+                vuelo.evento.set()
+                return resultado
+
+            return wrapper
+
+        return decorador
+
+    def obtener_estadisticas(self):
+        """Suma los contadores de todos los hilos y de todos los fragmentos"""
+        with self._registro:
+            contadores = list(self._contadores)
+        totales = {'aciertos': 0, 'fallos': 0, 'esperas': 0}
+        for contador in contadores:
+            for clave in totales:
+                totales[clave] += contador[clave]
+
+        desalojos = expirados = items = bytes_en_cache = 0
+        for fragmento, cerrojo in zip(self.fragmentos, self._cerrojos):
+            with cerrojo:
+                desalojos += fragmento.estadisticas['desalojos']
+                expirados += fragmento.estadisticas['expirados']
+                items += len(fragmento.cache)
+                bytes_en_cache += fragmento.bytes_en_cache
+
+        total = totales['aciertos'] + totales['fallos'] + totales['esperas']
+        if total == 0:
+            return "Sin llamadas registradas"
+        return {
+            'total_llamadas': total,
+            'aciertos': totales['aciertos'],
+            'fallos': totales['fallos'],
+            'esperas_compartidas': totales['esperas'],
+            'tasa_aciertos': f"{(totales['aciertos'] + totales['esperas']) / total * 100:.1f}%",
+            'items_en_cache': items,
+            'bytes_en_cache': bytes_en_cache,
+            'desalojos': desalojos,
+            'expirados': expirados
+        }
+
+
+def benchmark_contencion(hilos=32, llamadas_por_hilo=20_000, claves=1000, fragmentos=(1, 16)):
+    """
+    Lanza 'hilos' hilos contra la misma función cacheada y mide llamadas/s
+    según el número de fragmentos; después provoca una estampida sobre una
+    sola clave y cuenta cuántas veces se ejecutó realmente la función
+    """
+    resultados = {}
+    for num_fragmentos in fragmentos:
+        cache = SistemaCacheConcurrente(num_fragmentos=num_fragmentos, max_entradas=claves * 2)
+
+        @cache.cachear(tiempo_vida=None)
+        def doble(x):
+            return x * 2
+
+        barrera = threading.Barrier(hilos + 1)
+
+        def trabajador(semilla):
+            barrera.wait()
+            for i in range(llamadas_por_hilo):
+                doble((semilla + i) % claves)
+
+        trabajadores = [threading.Thread(target=trabajador, args=(n * 7,)) for n in range(hilos)]
+        for trabajador_hilo in trabajadores:
+            trabajador_hilo.start()
+        barrera.wait()
+        inicio = time.perf_counter()
+        for trabajador_hilo in trabajadores:
+            trabajador_hilo.join()
+        duracion = time.perf_counter() - inicio
+        resultados[num_fragmentos] = hilos * llamadas_por_hilo / duracion
+        print(f"   {num_fragmentos:>2} fragmento(s): {resultados[num_fragmentos]:,.0f} llamadas/s "
+              f"| {cache.obtener_estadisticas()['tasa_aciertos']} aciertos")
+
+    # Estampida: la clave caliente no está en cache y llegan todos a la vez
+    cache = SistemaCacheConcurrente()
+    ejecuciones = []
+
+    @cache.cachear(tiempo_vida=1)
+    def consulta_lenta(n):
+        ejecuciones.append(n)
+        time.sleep(0.05)
+        return n * n
+
+    barrera = threading.Barrier(hilos)
+
+    def cliente():
+        barrera.wait()
+        consulta_lenta(42)
+
+    clientes = [threading.Thread(target=cliente) for _ in range(hilos)]
+    for cliente_hilo in clientes:
+        cliente_hilo.start()
+    for cliente_hilo in clientes:
+        cliente_hilo.join()
+    print(f"   Estampida de {hilos} hilos: la función se ejecutó {len(ejecuciones)} vez/veces "
+          f"({cache.obtener_estadisticas()['esperas_compartidas']} hilos esperaron el resultado)")
+    return resultados, len(ejecuciones)
+
+
+if __name__ == '__main__':
+    print("Contención con 32 hilos:")
+    benchmark_contencion(hilos=32, llamadas_por_hilo=2_000, claves=500)
+
+# 10. CACHÉ PERSISTENTE: MEMORIA + DISCO
+# --------------------------------------
+print("\n=== CACHÉ PERSISTENTE EN DISCO ===")
+
+
+class CacheDisco:
+    """
+    Segundo nivel de SistemaCache sobre SQLite: sobrevive a reinicios.
+    Cada valor se serializa una sola vez con pickle, la caducidad se guarda
+    como hora absoluta y el tamaño total se limita desalojando por último
+    acceso. El total de bytes vive en la propia base de datos, así varios
+    procesos pueden compartir el archivo. Un cerrojo serializa el uso de la
+    conexión para poder llamarla desde otros hilos (asyncio.to_thread)
+    """
+
+    def __init__(self, ruta, max_bytes=256 * 1024 * 1024):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.desalojos = 0
+        self._cerrojo = threading.RLock()
+        # Autocommit: cada escritura abre su propia transacción explícita
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, timeout=30, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS entradas (
+                clave BLOB PRIMARY KEY,
+                valor BLOB NOT NULL,
+                expira_en REAL,
+                tamaño INTEGER NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON entradas (ultimo_acceso);
+            CREATE TABLE IF NOT EXISTS metadatos (nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+            INSERT OR IGNORE INTO metadatos VALUES ('bytes', 0);
+        """)
+        with self._transaccion():
+            self._borrar_expirados(time.time())
+
+    @contextmanager
+    def _transaccion(self):
+        """BEGIN IMMEDIATE ... COMMIT (o ROLLBACK si algo falla)"""
+        with self._cerrojo:
+            self.conexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conexion.execute("ROLLBACK")
+                raise
+            self.conexion.execute("COMMIT")
+
+    def _ajustar_bytes(self, delta):
+        self.conexion.execute("UPDATE metadatos SET valor = valor + ? WHERE nombre = 'bytes'", (delta,))
+
+    @property
+    def bytes_en_disco(self):
+        return self.conexion.execute("SELECT valor FROM metadatos WHERE nombre = 'bytes'").fetchone()[0]
+
+    def _borrar(self, clave):
+        fila = self.conexion.execute("SELECT tamaño FROM entradas WHERE clave = ?", (clave,)).fetchone()
+        if fila is not None:
+            self.conexion.execute("DELETE FROM entradas WHERE clave = ?", (clave,))
+            self._ajustar_bytes(-fila[0])
+
+    def _borrar_expirados(self, ahora):
+        liberados = self.conexion.execute(
+            "SELECT COALESCE(SUM(tamaño), 0) FROM entradas WHERE expira_en <= ?", (ahora,)).fetchone()[0]
+        if liberados:
+            self.conexion.execute("DELETE FROM entradas WHERE expira_en <= ?", (ahora,))
+            self._ajustar_bytes(-liberados)
+
+    def _desalojar(self, ahora):
+        """Libera espacio hasta quedar dentro de max_bytes: primero lo caducado, luego lo menos usado"""
+        if self.bytes_en_disco <= self.max_bytes:
+            return
+        self._borrar_expirados(ahora)
+        total = self.bytes_en_disco
+        while total > self.max_bytes:
+            filas = self.conexion.execute(
+                "SELECT clave, tamaño FROM entradas ORDER BY ultimo_acceso LIMIT 64").fetchall()
+            if not filas:
+                break
+            for clave, tamaño in filas:
+                if total <= self.max_bytes:
+                    break
+                self.conexion.execute("DELETE FROM entradas WHERE clave = ?", (clave,))
+                self._ajustar_bytes(-tamaño)
+                total -= tamaño
+                self.desalojos += 1
+
+    @staticmethod
+    def crear_clave(funcion, args, kwargs):
+        """
+        Clave estable entre procesos: nombre cualificado de la función y
+        argumentos serializados. None si los argumentos no se pueden serializar
+        """
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+        try:
+            datos = pickle.dumps((nombre, args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return None
+        return hashlib.blake2b(datos, digest_size=20).digest()
+
+    def obtener(self, clave):
+        """Devuelve (encontrado, valor, segundos de vida restantes o None)"""
+        if clave is None:
+            return False, None, None
+        with self._cerrojo:
+            fila = self.conexion.execute(
+                "SELECT valor, expira_en FROM entradas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return False, None, None
+
+            valor, expira_en = fila
+            ahora = time.time()
+            try:
+                if expira_en is not None and expira_en <= ahora:
+                    raise LookupError("entrada caducada")
+                resultado = pickle.loads(valor)
+            except Exception:
+                # Caducada o ilegible (p. ej. la clase ya no existe): se descarta
+                with self._transaccion():
+                    self._borrar(clave)
+                return False, None, None
+
+            self.conexion.execute("UPDATE entradas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+        return True, resultado, None if expira_en is None else expira_en - ahora
+
+    def guardar(self, clave, resultado, tiempo_vida=None):
+        """Serializa el resultado una vez y lo guarda; los que no se pueden serializar se omiten"""
+        if clave is None:
+            return False
+        try:
+            valor = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        if len(valor) > self.max_bytes:
+            return False
+
+        ahora = time.time()
+        expira_en = ahora + tiempo_vida if tiempo_vida is not None else None
+        with self._transaccion():
+            self._borrar(clave)
+            self.conexion.execute("INSERT INTO entradas VALUES (?, ?, ?, ?, ?)",
+                                  (clave, valor, expira_en, len(valor), ahora))
+            self._ajustar_bytes(len(valor))
+            self._desalojar(ahora)
+        return True
+
+    def cerrar(self):
+        with self._cerrojo:
+            self.conexion.close()
+
+
+directorio_demo = tempfile.mkdtemp(prefix='cache_disco_')
+ruta_cache_disco = os.path.join(directorio_demo, 'cache.sqlite3')
+
+
+def arrancar_trabajador():
+    """Simula el arranque de un proceso: cache en memoria vacía, disco compartido"""
+    cache = SistemaCache(max_entradas=100, segundo_nivel=CacheDisco(ruta_cache_disco, max_bytes=1024 * 1024))
+
+    @cache.cachear(tiempo_vida=300)
+    def generar_informe(n):
+        time.sleep(0.2)  # Simular una consulta lenta
+        return {'n': n, 'suma_cuadrados': sum(i ** 2 for i in range(n))}
+
+    return cache, generar_informe
+
+
+for arranque in ("Arranque en frío", "Tras reiniciar"):
+    cache_trabajador, generar_informe = arrancar_trabajador()
+    inicio = time.perf_counter()
+    informes = [generar_informe(n) for n in (100, 200, 300)]
+    duracion = time.perf_counter() - inicio
+    stats = cache_trabajador.obtener_estadisticas()
+    print(f"{arranque}: {duracion * 1000:.1f} ms | fallos {stats['fallos']} | "
+          f"aciertos en disco {stats['aciertos_segundo_nivel']}")
+    cache_trabajador.segundo_nivel.cerrar()
+
+# El disco también está acotado: valores grandes desalojan a los más antiguos
+disco_pequeño = CacheDisco(os.path.join(directorio_demo, 'pequeña.sqlite3'), max_bytes=64 * 1024)
+for n in range(20):
+    disco_pequeño.guardar(bytes([n]), b'x' * 10_000, tiempo_vida=60)
+print(f"Disco limitado a 64 KB: {disco_pequeño.bytes_en_disco} bytes, "
+      f"{disco_pequeño.desalojos} desalojos")
+disco_pequeño.cerrar()
+shutil.rmtree(directorio_demo, ignore_errors=True)
+
+# 11. CACHÉ COMPARTIDA ENTRE PROCESOS
+# -----------------------------------
+print("\n=== CACHÉ COMPARTIDA ENTRE PROCESOS ===")
+
+
+def _contexto_procesos():
+    """'fork' cuando existe; con 'spawn' los hijos reciben la cache como argumento"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def trabajador_rutas(cache_compartida, calculos, desfase):
+    """Cada proceso tiene su SistemaCache, con la cache compartida como segundo nivel"""
+    cache_trabajador = SistemaCache(max_entradas=100, segundo_nivel=cache_compartida)
+
+    @cache_trabajador.cachear(tiempo_vida=60)
+    def precio_ruta(origen, destino):
+        """Simula una consulta cara a un servicio externo"""
+        with calculos.get_lock():
+            calculos.value += 1
+        time.sleep(0.05)
+        return {'ruta': (origen, destino), 'precio': len(origen) * len(destino) * 10}
+
+    ciudades = ['Madrid', 'Lima', 'Bogotá', 'Quito']
+    rutas = [(origen, destino) for origen in ciudades for destino in ciudades if origen != destino]
+    for k in range(len(rutas)):
+        precio_ruta(*rutas[(k + desfase) % len(rutas)])
+
+
+# Sin 'fork', los hijos vuelven a importar este script como __mp_main__
+if __name__ == '__main__':
+    contexto = _contexto_procesos()
+    cache_compartida = CacheMemoriaCompartida(num_franjas=16, ranuras_por_franja=32, contexto=contexto)
+    calculos = contexto.Value('i', 0)
+    procesos = [contexto.Process(target=trabajador_rutas, args=(cache_compartida, calculos, n * 3))
+                for n in range(4)]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join()
+    print(f"4 procesos x 12 rutas: {calculos.value} cálculos (cada uno con su cache serían 48), "
+          f"{cache_compartida.contar_entradas()} entradas compartidas")
+    cache_compartida.cerrar()
+    cache_compartida.destruir()
+
+# 12. CACHÉ PARA CORRUTINAS
+# -------------------------
+print("\n=== CACHÉ PARA CORRUTINAS ===")
+
+cache_asincrona = SistemaCache(max_entradas=100)
+peticiones_api = []
+
+
+@cache_asincrona.cachear(tiempo_vida=0.3)
+async def consultar_api(recurso):
+    """Simula una llamada HTTP lenta a un servicio externo"""
+    peticiones_api.append(recurso)
+    await asyncio.sleep(0.1)
+    return {'recurso': recurso, 'elementos': len(recurso) * 3}
+
+
+@cache_resultados
+async def descargar_pagina(url):
+    await asyncio.sleep(0.05)
+    return f"<html>{url}</html>"
+
+
+async def demostracion_asincrona():
+    # 10 llamadas simultáneas a 'usuarios' comparten una sola petición
+    respuestas = await asyncio.gather(*(consultar_api('usuarios') for _ in range(10)),
+                                      consultar_api('pedidos'))
+    print(f"11 llamadas simultáneas → {len(peticiones_api)} peticiones reales, "
+          f"resultado: {respuestas[0]}")
+
+    await consultar_api('usuarios')
+    print(f"Llamada inmediata → {len(peticiones_api)} peticiones (acierto)")
+
+    await asyncio.sleep(0.35)  # La caducidad es perezosa: no hay nada que esperar ni limpiar
+    await consultar_api('usuarios')
+    print(f"Tras caducar → {len(peticiones_api)} peticiones")
+    print(f"Estadísticas: {cache_asincrona.obtener_estadisticas()}")
+
+    paginas = await asyncio.gather(descargar_pagina('/inicio'), descargar_pagina('/inicio'))
+    print(f"cache_resultados con async def: {paginas[0]} (misma tarea: {paginas[0] is paginas[1]})")
+
+
+if __name__ == '__main__':
+    asyncio.run(demostracion_asincrona())
+
 print("\n" + "=" * 60)
 print("¡Decoradores demostrados exitosamente!")
@@ -5,10 +5,13 @@ Understanding memory management, garbage collection, and optimization
 
 import sys
 import gc
+import time
 import tracemalloc
 from memory_profiler import profile
 import weakref
 
+from politicas_cache import crear_politica
+
 # 1. VISUALIZACIÓN DEL USO DE MEMORIA
 # -----------------------------------
 print("=== VISUALIZACIÓN DEL USO DE MEMORIA ===")
@@ -334,68 +337,103 @@ demostrar_optimizacion()
 print("\n=== CACHÉ INTELIGENTE CON GESTIÓN DE MEMORIA ===")
 
 
+def tamaño_profundo(objeto):
+    """
+    Estima el tamaño de un objeto sumando sys.getsizeof de todo lo que
+    contiene (dicts, listas, tuplas, conjuntos y atributos de instancias).
+    Lo compartido se cuenta una sola vez
+    """
+    vistos = set()
+    pendientes = [objeto]
+    total = 0
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos:
+            continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, (list, tuple, set, frozenset)):
+            pendientes.extend(actual)
+        elif hasattr(actual, '__dict__') and not isinstance(actual, type):
+            pendientes.append(vars(actual))
+    return total
+
+
 class CacheInteligente:
     """
     Sistema de cache que monitorea el uso de memoria
-    y limpia automáticamente cuando es necesario
+    y limpia automáticamente cuando es necesario.
+    El tamaño de cada entrada se calcula una vez al guardarla y se lleva un
+    total acumulado; al pasarse del límite la política de desalojo ('lru',
+    'arc', 'w-tinylfu' o un objeto de politicas_cache) elige qué entradas
+    salen, justo hasta volver a caber
     """
 
-    def __init__(self, max_memoria_mb=10):
+    def __init__(self, max_memoria_mb=10, estimador=sys.getsizeof, politica='lru'):
         self.max_memoria_bytes = max_memoria_mb * 1024 * 1024
+        self.estimador = estimador  # sys.getsizeof (superficial) o tamaño_profundo
+        self.politica = crear_politica(politica) if isinstance(politica, str) else politica
         self.cache = {}
+        self._tamaños = {}
+        self.memoria_actual = 0
         self.estadisticas = {
             'aciertos': 0,
             'fallos': 0,
-            'limpiezas_automaticas': 0
+            'limpiezas_automaticas': 0,
+            'elementos_desalojados': 0
         }
 
-    def _calcular_memoria_actual(self):
-        """Calcula la memoria total usada por el cache"""
-        return sum(sys.getsizeof(key) + sys.getsizeof(value)
-                   for key, value in self.cache.items())
-
     def _limpiar_cache_si_es_necesario(self):
-        """Limpia el cache si se excede el límite de memoria"""
-        memoria_actual = self._calcular_memoria_actual()
-
-        if memoria_actual > self.max_memoria_bytes:
-            print(f"⚠️  Memoria cache: {memoria_actual / (1024 * 1024):.2f} MB - Limpiando...")
+        """Desaloja lo que elija la política hasta que el cache vuelva a caber en el límite"""
+        if self.memoria_actual <= self.max_memoria_bytes:
+            return
 
-            # Eliminar elementos más antiguos (simplificado)
-            elementos_a_eliminar = len(self.cache) // 2  # Eliminar la mitad
-            claves_a_eliminar = list(self.cache.keys())[:elementos_a_eliminar]
-
-            for clave in claves_a_eliminar:
-                del self.cache[clave]
-
-            self.estadisticas['limpiezas_automaticas'] += 1
-            print(f"   Elementos eliminados: {elementos_a_eliminar}")
+        self.estadisticas['limpiezas_automaticas'] += 1
+        while self.cache and self.memoria_actual > self.max_memoria_bytes:
+            clave = self.politica.elegir_victima()
+            del self.cache[clave]
+            self.memoria_actual -= self._tamaños.pop(clave)
+            self.estadisticas['elementos_desalojados'] += 1
 
     def obtener(self, clave):
         """Obtiene un valor del cache"""
         if clave in self.cache:
             self.estadisticas['aciertos'] += 1
+            self.politica.registrar_acceso(clave)
             return self.cache[clave]
         else:
             self.estadisticas['fallos'] += 1
+            self.politica.registrar_fallo(clave)
             return None
 
     def guardar(self, clave, valor):
         """Guarda un valor en el cache"""
+        tamaño = sys.getsizeof(clave) + self.estimador(valor)
+        if clave in self.cache:
+            self.memoria_actual -= self._tamaños[clave]
+            self.politica.registrar_acceso(clave)
+        else:
+            self.politica.registrar_insercion(clave)
         self.cache[clave] = valor
+        self._tamaños[clave] = tamaño
+        self.memoria_actual += tamaño
         self._limpiar_cache_si_es_necesario()
 
     def obtener_estadisticas(self):
         """Obtiene estadísticas del cache"""
-        memoria_actual = self._calcular_memoria_actual()
         total_operaciones = self.estadisticas['aciertos'] + self.estadisticas['fallos']
         tasa_aciertos = (self.estadisticas['aciertos'] / total_operaciones * 100) if total_operaciones > 0 else 0
 
         return {
             'elementos_en_cache': len(self.cache),
-            'memoria_actual_mb': memoria_actual / (1024 * 1024),
+            'memoria_actual_mb': self.memoria_actual / (1024 * 1024),
             'tasa_aciertos': f"{tasa_aciertos:.1f}%",
-            'limpiezas_automaticas': self.estadisticas['limpiezas_automaticas']
+            'limpiezas_automaticas': self.estadisticas['limpiezas_automaticas'],
+            'elementos_desalojados': self.estadisticas['elementos_desalojados']
         }
 
 
@@ -404,21 +442,52 @@ print("Probando cache inteligente...")
 cache = CacheInteligente(max_memoria_mb=1)  # Límite bajo para demostración
 
 # Llenar el cache con datos
+inicio = time.perf_counter()
 for i in range(1000):
     clave = f"clave_{i}"
     valor = list(range(1000))  # Valor que ocupa memoria
     cache.guardar(clave, valor)
+    cache.obtener("clave_0")  # Entrada caliente: el LRU la conserva
 
     if i % 100 == 0:
         stats = cache.obtener_estadisticas()
         print(f"  Iteración {i}: {stats['elementos_en_cache']} elementos, "
               f"{stats['memoria_actual_mb']:.2f} MB")
+duracion = time.perf_counter() - inicio
 
 # Mostrar estadísticas finales
 print("\nEstadísticas finales del cache:")
 stats_finales = cache.obtener_estadisticas()
 for clave, valor in stats_finales.items():
     print(f"  {clave}: {valor}")
+print(f"  1000 inserciones en {duracion * 1000:.1f} ms; "
+      f"¿sigue 'clave_0'? {'clave_0' in cache.cache}")
+
+# Con el estimador profundo también cuentan los enteros de cada lista
+cache_profundo = CacheInteligente(max_memoria_mb=1, estimador=tamaño_profundo)
+for i in range(1000):
+    cache_profundo.guardar(f"clave_{i}", list(range(1000)))
+print(f"  Estimador profundo: {len(cache_profundo.cache)} elementos caben en 1 MB "
+      f"(superficial: {len(cache.cache)})")
+
+# Un lote que toca muchas claves una sola vez vacía un LRU; ARC y
+# W-TinyLFU protegen las entradas que se usan de verdad
+# (python politicas_cache.py compara las políticas sobre trazas grabadas)
+print("\nResistencia a recorridos (50 claves calientes leídas 3 veces + lote de 300 claves únicas):")
+for nombre_politica in ('lru', 'arc', 'w-tinylfu'):
+    cache_politica = CacheInteligente(max_memoria_mb=1, politica=nombre_politica)
+    aciertos_calientes = 0
+    for ronda in range(20):
+        for _ in range(3):
+            for i in range(50):
+                if cache_politica.obtener(f"caliente_{i}") is None:
+                    cache_politica.guardar(f"caliente_{i}", list(range(1000)))
+                else:
+                    aciertos_calientes += 1
+        for j in range(300):
+            if cache_politica.obtener(f"lote_{ronda}_{j}") is None:
+                cache_politica.guardar(f"lote_{ronda}_{j}", list(range(1000)))
+    print(f"  {nombre_politica:<10} aciertos en claves calientes: {aciertos_calientes / (20 * 3 * 50) * 100:.1f}%")
 
 # 8. MONITOREO EN TIEMPO REAL
 # ---------------------------
@@ -0,0 +1,281 @@
+"""
+Cache compartida entre procesos
+Tabla hash de direccionamiento abierto y arena de slabs sobre
+multiprocessing.shared_memory, para usar como segundo nivel de SistemaCache
+(11_decoradores_basico.py) en varios procesos trabajadores
+"""
+
+import hashlib
+import multiprocessing
+import pickle
+import struct
+import time
+from multiprocessing import shared_memory
+
+
+class CacheMemoriaCompartida:
+    """
+    Segundo nivel de SistemaCache en memoria compartida: todos los procesos
+    que la reciben ven la misma cache. Se pasa como argumento de Process
+    (viaja el nombre del segmento y los cerrojos), así funciona también con
+    'spawn'; con 'fork' basta con crearla antes de arrancar los procesos.
+    Los cerrojos se crean con el contexto dado, que ha de ser el de Process.
+
+    La memoria se divide en franjas; cada franja tiene su cerrojo, su tabla
+    hash de direccionamiento abierto (sondeo lineal) y su propia arena de
+    slabs por clases de tamaño. El cerrojo es por franja y no por ranura:
+    una búsqueda recorre varias ranuras seguidas, el borrado sin lápidas
+    mueve entradas entre ellas y el slab sale de la pila libre de la franja,
+    así que un cerrojo por ranura obligaría a tomar varios por operación.
+    Con una franja por cerrojo cada operación toma exactamente uno, y con
+    muchas franjas (64 por defecto) la contención es la de un cerrojo por cubeta
+    """
+
+    # ocupada, clase, slab, longitud, clave, expira_en (0 = nunca), último uso
+    RANURA = struct.Struct('<BBxxII16sdQ')
+    # (tamaño del slab, slabs por franja)
+    CLASES = ((256, 32), (1024, 16), (4096, 8), (16384, 4), (65536, 1))
+
+    def __init__(self, num_franjas=64, ranuras_por_franja=64, clases=CLASES, contexto=None):
+        self.num_franjas = num_franjas
+        self.ranuras_por_franja = ranuras_por_franja
+        self.clases = tuple(clases)
+
+        # Disposición de una franja: reloj LRU, contador de valores sin sitio,
+        # cimas de las pilas libres, tabla de ranuras, pila de slabs libres y
+        # arena de cada clase
+        desplazamiento = 16 + 4 * len(self.clases)
+        self._desp_tabla = desplazamiento
+        desplazamiento += ranuras_por_franja * self.RANURA.size
+        self._desp_pilas = []
+        for _, cantidad in self.clases:
+            self._desp_pilas.append(desplazamiento)
+            desplazamiento += 4 * cantidad
+        self._desp_arenas = []
+        for tamaño, cantidad in self.clases:
+            self._desp_arenas.append(desplazamiento)
+            desplazamiento += tamaño * cantidad
+        self._tam_franja = desplazamiento
+
+        self.memoria = shared_memory.SharedMemory(create=True, size=num_franjas * self._tam_franja)
+        self.buffer = self.memoria.buf
+        contexto = contexto or multiprocessing.get_context()
+        self._cerrojos = [contexto.Lock() for _ in range(num_franjas)]
+        self._propietario = True
+
+        # La memoria nace a cero (ranuras libres); solo hay que llenar las pilas
+        for franja in range(num_franjas):
+            base = franja * self._tam_franja
+            for clase, (_, cantidad) in enumerate(self.clases):
+                struct.pack_into(f'<{cantidad}I', self.buffer, base + self._desp_pilas[clase], *range(cantidad))
+                self._escribir_cima(base, clase, cantidad)
+
+    def __getstate__(self):
+        """
+        Al pasarla a otro proceso viajan el segmento (por nombre) y los
+        cerrojos; multiprocessing solo deja enviar cerrojos al crear el proceso
+        """
+        estado = self.__dict__.copy()
+        del estado['buffer']
+        estado['_propietario'] = False
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.buffer = self.memoria.buf
+
+    @property
+    def sin_espacio(self):
+        """Valores que no se pudieron guardar, sumados en todos los procesos"""
+        total = 0
+        for franja in range(self.num_franjas):
+            with self._cerrojos[franja]:
+                total += struct.unpack_from('<Q', self.buffer, franja * self._tam_franja + 8)[0]
+        return total
+
+    def _contar_sin_espacio(self, base):
+        """Se llama con el cerrojo de la franja tomado"""
+        anterior = struct.unpack_from('<Q', self.buffer, base + 8)[0]
+        struct.pack_into('<Q', self.buffer, base + 8, anterior + 1)
+
+    @staticmethod
+    def crear_clave(funcion, args, kwargs):
+        """Clave de 16 bytes igual en todos los procesos; None si no se puede serializar"""
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+        try:
+            datos = pickle.dumps((nombre, args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return None
+        return hashlib.blake2b(datos, digest_size=16).digest()
+
+    def _ubicar(self, clave):
+        """Franja y ranura inicial de una clave"""
+        h = int.from_bytes(clave[:8], 'little')
+        return h % self.num_franjas, (h // self.num_franjas) % self.ranuras_por_franja
+
+    def _ranura(self, base, indice):
+        return base + self._desp_tabla + indice * self.RANURA.size
+
+    def _leer_cima(self, base, clase):
+        return struct.unpack_from('<I', self.buffer, base + 16 + 4 * clase)[0]
+
+    def _escribir_cima(self, base, clase, valor):
+        struct.pack_into('<I', self.buffer, base + 16 + 4 * clase, valor)
+
+    def _tic(self, base):
+        """Avanza el reloj LRU de la franja"""
+        reloj = struct.unpack_from('<Q', self.buffer, base)[0] + 1
+        struct.pack_into('<Q', self.buffer, base, reloj)
+        return reloj
+
+    def _reservar(self, base, clase):
+        cima = self._leer_cima(base, clase)
+        if cima == 0:
+            return None
+        cima -= 1
+        self._escribir_cima(base, clase, cima)
+        return struct.unpack_from('<I', self.buffer, base + self._desp_pilas[clase] + 4 * cima)[0]
+
+    def _liberar(self, base, clase, slab):
+        cima = self._leer_cima(base, clase)
+        struct.pack_into('<I', self.buffer, base + self._desp_pilas[clase] + 4 * cima, slab)
+        self._escribir_cima(base, clase, cima + 1)
+
+    def _buscar(self, base, inicio, clave):
+        """(índice, campos) si la clave está; (None, primera ranura libre o None) si no"""
+        for paso in range(self.ranuras_por_franja):
+            indice = (inicio + paso) % self.ranuras_por_franja
+            campos = self.RANURA.unpack_from(self.buffer, self._ranura(base, indice))
+            if not campos[0]:
+                return None, indice
+            if campos[4] == clave:
+                return indice, campos
+        return None, None
+
+    def _eliminar(self, base, indice):
+        """
+        Borra la ranura y libera su slab. Con sondeo lineal no se dejan
+        lápidas: las entradas siguientes retroceden para cerrar el hueco
+        """
+        campos = self.RANURA.unpack_from(self.buffer, self._ranura(base, indice))
+        self._liberar(base, campos[1], campos[2])
+        self._vaciar(base, indice)
+
+        total = self.ranuras_por_franja
+        hueco = indice
+        siguiente = indice
+        while True:
+            siguiente = (siguiente + 1) % total
+            campos = self.RANURA.unpack_from(self.buffer, self._ranura(base, siguiente))
+            if not campos[0]:
+                break
+            inicio = self._ubicar(campos[4])[1]
+            # La entrada puede ocupar el hueco si su ranura inicial no está en (hueco, siguiente]
+            if (inicio - hueco - 1) % total >= (siguiente - hueco) % total:
+                self.RANURA.pack_into(self.buffer, self._ranura(base, hueco), *campos)
+                self._vaciar(base, siguiente)
+                hueco = siguiente
+
+    def _vaciar(self, base, indice):
+        self.RANURA.pack_into(self.buffer, self._ranura(base, indice), 0, 0, 0, 0, b'', 0.0, 0)
+
+    def _hacer_sitio(self, base, clase=None):
+        """Expulsa de la franja una entrada caducada o la menos usada (de la clase dada)"""
+        ahora = time.time()
+        victima, uso_victima = None, None
+        for indice in range(self.ranuras_por_franja):
+            campos = self.RANURA.unpack_from(self.buffer, self._ranura(base, indice))
+            if not campos[0] or (clase is not None and campos[1] != clase):
+                continue
+            if campos[5] and campos[5] <= ahora:
+                victima = indice
+                break
+            if uso_victima is None or campos[6] < uso_victima:
+                victima, uso_victima = indice, campos[6]
+        if victima is None:
+            return False
+        self._eliminar(base, victima)
+        return True
+
+    def obtener(self, clave):
+        """Devuelve (encontrado, valor, segundos de vida restantes o None)"""
+        if clave is None:
+            return False, None, None
+        franja, inicio = self._ubicar(clave)
+        base = franja * self._tam_franja
+        with self._cerrojos[franja]:
+            indice, campos = self._buscar(base, inicio, clave)
+            if indice is None:
+                return False, None, None
+            _, clase, slab, longitud, _, expira_en, _ = campos
+            ahora = time.time()
+            if expira_en and expira_en <= ahora:
+                self._eliminar(base, indice)
+                return False, None, None
+            desplazamiento = base + self._desp_arenas[clase] + slab * self.clases[clase][0]
+            datos = bytes(self.buffer[desplazamiento:desplazamiento + longitud])
+            # El último uso es el último campo de la ranura
+            struct.pack_into('<Q', self.buffer, self._ranura(base, indice) + self.RANURA.size - 8, self._tic(base))
+
+        # Deserializar fuera del cerrojo
+        try:
+            resultado = pickle.loads(datos)
+        except Exception:
+            return False, None, None
+        return True, resultado, expira_en - ahora if expira_en else None
+
+    def guardar(self, clave, resultado, tiempo_vida=None):
+        """Serializa el resultado y lo copia a un slab de la clase que le corresponda"""
+        if clave is None:
+            return False
+        try:
+            valor = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        clase = next((c for c, (tamaño, _) in enumerate(self.clases) if len(valor) <= tamaño), None)
+        expira_en = time.time() + tiempo_vida if tiempo_vida is not None else 0.0
+        franja, inicio = self._ubicar(clave)
+        base = franja * self._tam_franja
+        with self._cerrojos[franja]:
+            if clase is None:
+                self._contar_sin_espacio(base)
+                return False
+
+            indice, _ = self._buscar(base, inicio, clave)
+            if indice is not None:
+                self._eliminar(base, indice)
+
+            slab = self._reservar(base, clase)
+            while slab is None and self._hacer_sitio(base, clase):
+                slab = self._reservar(base, clase)
+            if slab is None:
+                self._contar_sin_espacio(base)
+                return False
+
+            _, libre = self._buscar(base, inicio, clave)
+            if libre is None:
+                self._hacer_sitio(base)
+                _, libre = self._buscar(base, inicio, clave)
+
+            desplazamiento = base + self._desp_arenas[clase] + slab * self.clases[clase][0]
+            self.buffer[desplazamiento:desplazamiento + len(valor)] = valor
+            self.RANURA.pack_into(self.buffer, self._ranura(base, libre),
+                                  1, clase, slab, len(valor), clave, expira_en, self._tic(base))
+        return True
+
+    def contar_entradas(self):
+        total = 0
+        for franja in range(self.num_franjas):
+            base = franja * self._tam_franja
+            with self._cerrojos[franja]:
+                total += sum(self.buffer[self._ranura(base, indice)] for indice in range(self.ranuras_por_franja))
+        return total
+
+    def cerrar(self):
+        self.buffer = None
+        self.memoria.close()
+
+    def destruir(self):
+        """Libera el segmento compartido (solo el proceso que lo creó)"""
+        if self._propietario:
+            self.memoria.unlink()
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_script(nombre_modulo, archivo):
+    """Importa uno de los scripts numerados (ejecuta también su demo)"""
+    spec = importlib.util.spec_from_file_location(nombre_modulo, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    # Registrado en sys.modules para que los procesos hijos encuentren sus funciones
+    sys.modules[nombre_modulo] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def cargar_en_temporal(tmp_path_factory, nombre_modulo, archivo):
+    """Carga el script en un directorio temporal, donde deja sus archivos de demo"""
+    directorio_original = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp(nombre_modulo))
+    try:
+        return cargar_script(nombre_modulo, archivo)
+    finally:
+        os.chdir(directorio_original)
+
+
+@pytest.fixture(scope='session')
+def ficheros(tmp_path_factory):
+    return cargar_en_temporal(tmp_path_factory, 'ficheros', '08_ficheros.py')
+
+
+@pytest.fixture(scope='session')
+def manejo_errores(tmp_path_factory):
+    return cargar_en_temporal(tmp_path_factory, 'manejo_errores', '05_manejo_errores.py')
+
+
+@pytest.fixture(scope='session')
+def decoradores(tmp_path_factory):
+    return cargar_en_temporal(tmp_path_factory, 'decoradores', '11_decoradores_basico.py')
+
+
+@pytest.fixture(scope='session')
+def gestion_memoria(tmp_path_factory):
+    # El script usa memory_profiler para su demo de @profile
+    pytest.importorskip('memory_profiler')
+    return cargar_en_temporal(tmp_path_factory, 'gestion_memoria', '12_gestion_memoria.py')
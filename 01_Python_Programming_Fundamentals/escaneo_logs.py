@@ -0,0 +1,201 @@
+"""
+Escaneo paralelo de logs
+Cuenta y filtra un log muy grande con mmap, repartiendo fragmentos
+alineados a línea entre un pool de procesos
+"""
+
+import argparse
+import mmap
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Etiquetas [NIVEL] [usuario] de cada línea '[timestamp] [NIVEL] [usuario] mensaje'
+PATRON_ETIQUETAS_LOG = re.compile(rb'^\[[^\]\n]*\] \[[^\]\n]*\] \[([^\]\n]*)\]', re.M)
+NIVELES_LOG = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+BLOQUE_ESCANEO = 64 * 1024 * 1024
+
+
+def parsear_linea_log(linea):
+    """
+    Extrae (timestamp, nivel, usuario) de una línea con el formato
+    '[YYYY-MM-DD HH:MM:SS] [NIVEL] [usuario] mensaje'
+    """
+    try:
+        fin_nivel = linea.index(']', 23)
+        fin_usuario = linea.index(']', fin_nivel + 3)
+    except ValueError:
+        return None
+    return linea[1:20], linea[23:fin_nivel], linea[fin_nivel + 3:fin_usuario]
+
+
+def dividir_en_fragmentos(ruta, n_fragmentos):
+    """Divide un archivo en rangos (inicio, fin) alineados a saltos de línea"""
+    tamaño = os.path.getsize(ruta)
+    if tamaño == 0:
+        return []
+
+    with open(ruta, 'rb') as archivo, \
+            mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        return _rangos_alineados(datos, 0, tamaño, -(-tamaño // n_fragmentos))
+
+
+def _rangos_alineados(datos, inicio, fin, tamaño_rango):
+    """Corta [inicio, fin) en rangos de ~tamaño_rango que terminan en '\\n'"""
+    rangos = []
+    while inicio < fin:
+        salto = datos.find(b'\n', min(inicio + tamaño_rango, fin) - 1, fin)
+        corte = fin if salto == -1 else salto + 1
+        rangos.append((inicio, corte))
+        inicio = corte
+    return rangos
+
+
+def _lineas_con_etiqueta(datos, etiqueta, inicio, fin):
+    """
+    Busca la etiqueta con find() (en C) y devuelve solo las líneas que la
+    contienen, sin recorrer en Python las líneas que no coinciden
+    """
+    posicion = datos.find(etiqueta, inicio, fin)
+    while posicion != -1:
+        inicio_linea = max(datos.rfind(b'\n', inicio, posicion) + 1, inicio)
+        fin_linea = datos.find(b'\n', posicion, fin)
+        if fin_linea == -1:
+            fin_linea = fin
+        yield datos[inicio_linea:fin_linea]
+        posicion = datos.find(etiqueta, fin_linea + 1, fin)
+
+
+def _lineas_del_rango(datos, inicio, fin):
+    """Todas las líneas de [inicio, fin), incluida una última sin salto de línea"""
+    while inicio < fin:
+        fin_linea = datos.find(b'\n', inicio, fin)
+        if fin_linea == -1:
+            fin_linea = fin
+        yield datos[inicio:fin_linea]
+        inicio = fin_linea + 1
+
+
+def _escanear_fragmento(ruta, inicio, fin, nivel, usuario, desde, recoger_lineas,
+                        contar_usuarios, niveles):
+    """Cuenta y filtra un fragmento del log (se ejecuta en un proceso hijo)"""
+    etiquetas_nivel = {n: f"] [{n}] [".encode('utf-8') for n in niveles}
+    total_lineas = 0
+    conteo_niveles = dict.fromkeys(niveles, 0)
+    conteo_usuarios = Counter()
+    lineas = []
+    coincidencias = 0
+
+    with open(ruta, 'rb') as archivo, \
+            mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        # Conteos con bytes.count() sobre bloques alineados a línea
+        for inicio_bloque, fin_bloque in _rangos_alineados(datos, inicio, fin, BLOQUE_ESCANEO):
+            bloque = datos[inicio_bloque:fin_bloque]
+            total_lineas += bloque.count(b'\n')
+            for nombre, etiqueta in etiquetas_nivel.items():
+                conteo_niveles[nombre] += bloque.count(etiqueta)
+            if contar_usuarios:
+                conteo_usuarios.update(PATRON_ETIQUETAS_LOG.findall(bloque))
+        # Una última línea sin salto también es una línea, como en el filtro
+        if fin > inicio and datos[fin - 1:fin] != b'\n':
+            total_lineas += 1
+
+        # Filtro: se busca la etiqueta más selectiva y se confirma cada línea
+        if nivel is not None and usuario is not None:
+            etiqueta = f"] [{nivel}] [{usuario}] ".encode('utf-8')
+        elif nivel is not None:
+            etiqueta = etiquetas_nivel.get(nivel, f"] [{nivel}] [".encode('utf-8'))
+        elif usuario is not None:
+            etiqueta = f"] [{usuario}] ".encode('utf-8')
+        else:
+            etiqueta = None
+
+        if etiqueta is None:
+            candidatas = _lineas_del_rango(datos, inicio, fin)
+        else:
+            candidatas = _lineas_con_etiqueta(datos, etiqueta, inicio, fin)
+        for linea in candidatas:
+            if nivel is not None or usuario is not None or desde is not None:
+                campos = parsear_linea_log(linea.decode('utf-8'))
+                if campos is None:
+                    continue
+                timestamp, nivel_linea, usuario_linea = campos
+                if ((nivel is not None and nivel_linea != nivel) or
+                        (usuario is not None and usuario_linea != usuario) or
+                        (desde is not None and timestamp < desde)):
+                    continue
+            coincidencias += 1
+            if recoger_lineas:
+                lineas.append(linea)
+
+    conteo_usuarios = {nombre.decode('utf-8'): cantidad for nombre, cantidad in conteo_usuarios.items()}
+    conteo_niveles = {nombre: cantidad for nombre, cantidad in conteo_niveles.items() if cantidad}
+    return total_lineas, conteo_niveles, conteo_usuarios, coincidencias, lineas
+
+
+def _contexto_procesos():
+    """
+    'fork' cuando existe: con 'spawn' cada hijo vuelve a ejecutar el script
+    principal como __mp_main__ (con sus demostraciones), aunque la función
+    del hijo viva en este módulo
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def escanear_log_paralelo(ruta, nivel=None, usuario=None, desde=None, procesos=None,
+                          recoger_lineas=True, contar_usuarios=False, niveles=NIVELES_LOG):
+    """
+    Escanea un log muy grande con mmap repartiendo fragmentos alineados a
+    línea entre un pool de procesos, y combina los resultados parciales.
+    El conteo por usuario usa una expresión regular y es opcional
+    """
+    procesos = procesos or os.cpu_count() or 1
+    fragmentos = dividir_en_fragmentos(ruta, procesos * 4)
+
+    resultado = {
+        'total_lineas': 0,
+        'conteo_por_nivel': {},
+        'conteo_por_usuario': {},
+        'coincidencias': 0,
+        'lineas': []
+    }
+
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos()) as ejecutor:
+        futuros = [ejecutor.submit(_escanear_fragmento, ruta, inicio, fin, nivel, usuario,
+                                   desde, recoger_lineas, contar_usuarios, niveles)
+                   for inicio, fin in fragmentos]
+
+        # Los futuros se recorren en orden, así las líneas quedan cronológicas
+        for futuro in futuros:
+            total, conteo_niveles, conteo_usuarios, coincidencias, lineas = futuro.result()
+            resultado['total_lineas'] += total
+            resultado['coincidencias'] += coincidencias
+            for conteo, parcial in ((resultado['conteo_por_nivel'], conteo_niveles),
+                                    (resultado['conteo_por_usuario'], conteo_usuarios)):
+                for nombre, cantidad in parcial.items():
+                    conteo[nombre] = conteo.get(nombre, 0) + cantidad
+            resultado['lineas'].extend(linea.decode('utf-8') + '\n' for linea in lineas)
+
+    return resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cuenta y filtra un log grande en paralelo con mmap")
+    parser.add_argument('log', help="archivo con líneas '[timestamp] [NIVEL] [usuario] mensaje'")
+    parser.add_argument('--nivel', help="solo las líneas de este nivel")
+    parser.add_argument('--usuario', help="solo las líneas de este usuario")
+    parser.add_argument('--desde', help="solo las líneas desde 'YYYY-MM-DD HH:MM:SS'")
+    parser.add_argument('--procesos', type=int, help="procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument('--usuarios', action='store_true', help="contar también las líneas por usuario")
+    opciones = parser.parse_args()
+
+    resultado = escanear_log_paralelo(opciones.log, opciones.nivel, opciones.usuario, opciones.desde,
+                                      opciones.procesos, recoger_lineas=False,
+                                      contar_usuarios=opciones.usuarios)
+    for clave, valor in resultado.items():
+        if clave != 'lineas':
+            print(f"{clave}: {valor}")
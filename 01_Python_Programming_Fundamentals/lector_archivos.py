@@ -0,0 +1,90 @@
+"""
+Lector de archivos unificado
+Una sola función para leer un archivo completo, por bloques, por líneas
+o como memoryview sobre un mmap, con los mismos errores que open()
+"""
+
+import mmap
+import os
+
+MODOS_LECTURA = ['completo', 'bloques', 'lineas', 'mmap']
+TAMAÑO_BLOQUE = 64 * 1024
+
+
+class VistaMapeada:
+    """
+    Archivo mapeado en memoria (solo lectura). Se usa con 'with' y entrega
+    un memoryview sin copiar el contenido; al salir se libera todo
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.mapa = None
+        if os.fstat(archivo.fileno()).st_size == 0:
+            # mmap no admite archivos vacíos
+            self.vista = memoryview(b'')
+        else:
+            self.mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+            self.vista = memoryview(self.mapa)
+
+    def __enter__(self):
+        return self.vista
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.vista.release()
+        if self.mapa is not None:
+            self.mapa.close()
+        self.archivo.close()
+
+
+def _generar(archivo, siguiente):
+    """Recorre el archivo ya abierto y lo cierra al terminar"""
+    with archivo:
+        while True:
+            parte = siguiente()
+            if not parte:
+                return
+            yield parte
+
+
+def leer_archivo(ruta, modo='completo', tamaño_bloque=TAMAÑO_BLOQUE,
+                 encoding='utf-8', binario=False):
+    """
+    Lee un archivo según el modo:
+    - 'completo': devuelve todo el contenido (str, o bytes si binario=True)
+    - 'bloques': generador de fragmentos de tamaño_bloque caracteres/bytes
+    - 'lineas': generador de líneas (incluyen el salto de línea)
+    - 'mmap': VistaMapeada; 'with leer_archivo(ruta, "mmap") as vista'
+
+    El archivo se abre en la llamada, así FileNotFoundError,
+    PermissionError, etc. se lanzan igual que con open() en todos los
+    modos. En los modos por partes, un UnicodeDecodeError aparece al
+    llegar a la parte mal codificada: el try que lo capture debe envolver
+    también el bucle que recorre el generador, no solo la llamada
+    """
+    if modo not in MODOS_LECTURA:
+        raise ValueError(f"Modo debe ser uno de: {MODOS_LECTURA}")
+
+    if modo == 'mmap':
+        archivo = open(ruta, 'rb')
+        try:
+            return VistaMapeada(archivo)
+        except BaseException:
+            archivo.close()
+            raise
+
+    if binario:
+        archivo = open(ruta, 'rb')
+    else:
+        archivo = open(ruta, 'r', encoding=encoding)
+
+    if modo == 'completo':
+        with archivo:
+            return archivo.read()
+    if modo == 'bloques':
+        return _generar(archivo, lambda: archivo.read(tamaño_bloque))
+    return _generar(archivo, archivo.readline)
@@ -0,0 +1,338 @@
+"""
+Políticas de desalojo para caches
+LRU, ARC y W-TinyLFU con la misma interfaz, más una herramienta que
+reproduce trazas de claves y compara tasa de aciertos y operaciones/s
+"""
+
+import argparse
+import random
+import time
+from collections import OrderedDict
+
+
+class PoliticaLRU:
+    """
+    Desaloja la entrada usada hace más tiempo.
+
+    Interfaz común de las políticas (la cache avisa de cada evento y
+    pregunta a quién desalojar cuando no cabe):
+    - registrar_acceso(clave): acierto sobre una clave residente
+    - registrar_fallo(clave): se pidió una clave que no estaba
+    - registrar_insercion(clave): la clave pasa a ser residente
+    - elegir_victima(): saca una clave residente y la devuelve
+    """
+
+    nombre = 'lru'
+
+    def __init__(self):
+        self.orden = OrderedDict()
+
+    def registrar_acceso(self, clave):
+        self.orden.move_to_end(clave)
+
+    def registrar_fallo(self, clave):
+        pass
+
+    def registrar_insercion(self, clave):
+        self.orden[clave] = None
+
+    def elegir_victima(self):
+        clave, _ = self.orden.popitem(last=False)
+        return clave
+
+
+class PoliticaARC:
+    """
+    Adaptive Replacement Cache (Megiddo y Modha): T1 guarda lo visto una
+    vez y T2 lo visto varias; las listas fantasma B1/B2 recuerdan claves
+    desalojadas y ajustan el reparto p entre recencia y frecuencia.
+    Un recorrido de claves únicas solo pasa por T1 y no desplaza a T2.
+    La capacidad c (en entradas) se toma del número de residentes cuando
+    la cache pide el primer desalojo, así sirve también con límites en bytes
+    """
+
+    nombre = 'arc'
+
+    def __init__(self):
+        self.t1, self.t2 = OrderedDict(), OrderedDict()
+        self.b1, self.b2 = OrderedDict(), OrderedDict()
+        self.p = 0.0
+        self.c = None
+        self._ultima = None
+        self._ultima_en_b2 = False
+
+    def registrar_acceso(self, clave):
+        if clave in self.t1:
+            del self.t1[clave]
+            self.t2[clave] = None
+        else:
+            self.t2.move_to_end(clave)
+
+    def registrar_fallo(self, clave):
+        pass
+
+    def registrar_insercion(self, clave):
+        self._ultima = clave
+        self._ultima_en_b2 = False
+        if clave in self.b1:
+            # Fallo que habría acertado con más recencia: crece p
+            self.p = min(self.c, self.p + max(len(self.b2) / len(self.b1), 1))
+            del self.b1[clave]
+            self.t2[clave] = None
+        elif clave in self.b2:
+            # Fallo que habría acertado con más frecuencia: baja p
+            self.p = max(0.0, self.p - max(len(self.b1) / len(self.b2), 1))
+            del self.b2[clave]
+            self.t2[clave] = None
+            self._ultima_en_b2 = True
+        else:
+            self.t1[clave] = None
+        self._recortar_fantasmas()
+
+    def _recortar_fantasmas(self):
+        if self.c is None:
+            return
+        while self.b1 and len(self.t1) + len(self.b1) > self.c:
+            self.b1.popitem(last=False)
+        while self.b2 and len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) > 2 * self.c:
+            self.b2.popitem(last=False)
+
+    def elegir_victima(self):
+        if self.c is None:
+            self.c = max(1, len(self.t1) + len(self.t2) - 1)
+
+        # ARC sustituye antes de insertar: la clave recién llegada no cuenta
+        t1_previo = len(self.t1) - (self._ultima in self.t1)
+        desde_t1 = t1_previo > 0 and (t1_previo > self.p or (self._ultima_en_b2 and t1_previo == int(self.p)))
+        # Si en T2 solo queda la recién llegada, se saca de T1
+        if not self.t2 or (self.t1 and next(iter(self.t2)) == self._ultima):
+            desde_t1 = True
+
+        if desde_t1:
+            clave, _ = self.t1.popitem(last=False)
+            self.b1[clave] = None
+        else:
+            clave, _ = self.t2.popitem(last=False)
+            self.b2[clave] = None
+        self._recortar_fantasmas()
+        return clave
+
+
+class BocetoConteoMinimo:
+    """
+    Count-min sketch compacto: 4 filas de contadores de un byte (en un solo
+    bytearray) que saturan en 15. Los 4 índices salen de los bits altos de
+    una única multiplicación. Cada 'muestra' incrementos todos los
+    contadores se dividen entre dos, así la frecuencia refleja el pasado
+    reciente
+    """
+
+    MULTIPLICADOR = 0x9E3779B97F4A7C15
+    MASCARA_64 = (1 << 64) - 1
+    MITAD = bytes(valor >> 1 for valor in range(256))  # tabla para bytearray.translate
+
+    def __init__(self, capacidad):
+        # Hasta 2**16 contadores por fila: 4 índices de 16 bits caben en 64
+        self.bits = min(16, max(4, (capacidad - 1).bit_length()))
+        self.ancho = 1 << self.bits
+        self.contadores = bytearray(4 * self.ancho)
+        self.muestra = 10 * self.ancho
+        self.incrementos = 0
+
+    def _indices(self, clave):
+        bits, ancho = self.bits, self.ancho
+        mascara = ancho - 1
+        h = ((hash(clave) & self.MASCARA_64) * self.MULTIPLICADOR) & self.MASCARA_64
+        h >>= 64 - 4 * bits
+        return (h & mascara,
+                ancho + ((h >> bits) & mascara),
+                2 * ancho + ((h >> 2 * bits) & mascara),
+                3 * ancho + ((h >> 3 * bits) & mascara))
+
+    def incrementar(self, clave):
+        contadores = self.contadores
+        for indice in self._indices(clave):
+            if contadores[indice] < 15:
+                contadores[indice] += 1
+        self.incrementos += 1
+        if self.incrementos >= self.muestra:
+            self.incrementos //= 2
+            self.contadores = bytearray(contadores.translate(self.MITAD))
+
+    def frecuencia(self, clave):
+        contadores = self.contadores
+        a, b, c, d = self._indices(clave)
+        return min(contadores[a], contadores[b], contadores[c], contadores[d])
+
+
+class PoliticaWTinyLFU:
+    """
+    W-TinyLFU (Einziger, Friedman y Manes): las claves nuevas entran en una
+    ventana LRU pequeña; al desalojar, la más antigua de la ventana solo
+    pasa a la zona principal (SLRU: prueba + protegida) si el boceto dice
+    que es más frecuente que la víctima de la principal. Las claves vistas
+    una sola vez casi nunca ganan, por eso resiste recorridos masivos
+    """
+
+    nombre = 'w-tinylfu'
+
+    def __init__(self, capacidad_estimada=1024, fraccion_ventana=0.01, fraccion_protegida=0.8):
+        self.boceto = BocetoConteoMinimo(capacidad_estimada)
+        self.fraccion_ventana = fraccion_ventana
+        self.fraccion_protegida = fraccion_protegida
+        self.ventana = OrderedDict()
+        self.prueba = OrderedDict()
+        self.protegida = OrderedDict()
+        self.c = None
+
+    def registrar_acceso(self, clave):
+        self.boceto.incrementar(clave)
+        if clave in self.ventana:
+            self.ventana.move_to_end(clave)
+        elif clave in self.prueba:
+            # Segundo uso en la principal: asciende a protegida
+            del self.prueba[clave]
+            self.protegida[clave] = None
+            if self.c is not None:
+                cuota = self.fraccion_protegida * (self.c - self._cuota_ventana())
+                while len(self.protegida) > cuota:
+                    degradada, _ = self.protegida.popitem(last=False)
+                    self.prueba[degradada] = None
+        else:
+            self.protegida.move_to_end(clave)
+
+    def registrar_fallo(self, clave):
+        self.boceto.incrementar(clave)
+
+    def registrar_insercion(self, clave):
+        self.ventana[clave] = None
+
+    def _cuota_ventana(self):
+        return max(1, int(self.c * self.fraccion_ventana))
+
+    def _victima_principal(self):
+        zona = self.prueba if self.prueba else self.protegida
+        return zona, next(iter(zona))
+
+    def elegir_victima(self):
+        if self.c is None:
+            # Primer desalojo: lo que cabía define la capacidad y se reparte
+            self.c = max(1, len(self.ventana) - 1)
+            cuota = self._cuota_ventana()
+            while len(self.ventana) > cuota + 1:
+                clave, _ = self.ventana.popitem(last=False)
+                self.prueba[clave] = None
+
+        if not self.ventana:
+            zona, victima = self._victima_principal()
+            del zona[victima]
+            return victima
+
+        candidata = next(iter(self.ventana))
+        if not self.prueba and not self.protegida:
+            del self.ventana[candidata]
+            return candidata
+
+        # Duelo de admisión: gana la más frecuente según el boceto
+        zona, victima = self._victima_principal()
+        del self.ventana[candidata]
+        if self.boceto.frecuencia(candidata) > self.boceto.frecuencia(victima):
+            del zona[victima]
+            self.prueba[candidata] = None
+            return victima
+        return candidata
+
+
+POLITICAS = {
+    'lru': PoliticaLRU,
+    'arc': PoliticaARC,
+    'w-tinylfu': PoliticaWTinyLFU,
+}
+
+
+def crear_politica(nombre, **opciones):
+    """Instancia una política por su nombre ('lru', 'arc' o 'w-tinylfu')"""
+    if nombre not in POLITICAS:
+        raise ValueError(f"Política debe ser una de: {list(POLITICAS)}")
+    return POLITICAS[nombre](**opciones)
+
+
+# Trazas y reproducción
+# ---------------------
+
+def cargar_traza(ruta):
+    """Lee una traza grabada: una clave por línea (se ignoran las vacías)"""
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        return [linea.strip() for linea in archivo if linea.strip()]
+
+
+def traza_zipf(longitud, claves, exponente=1.0, semilla=42):
+    """Accesos con popularidad Zipf: pocas claves muy usadas y una cola larga"""
+    generador = random.Random(semilla)
+    pesos = [1 / (rango ** exponente) for rango in range(1, claves + 1)]
+    return [f"k{indice}" for indice in generador.choices(range(claves), weights=pesos, k=longitud)]
+
+
+def traza_con_recorridos(longitud, claves, longitud_recorrido, cada, semilla=42):
+    """Traza Zipf interrumpida cada 'cada' accesos por un lote de claves únicas"""
+    base = traza_zipf(longitud, claves, semilla=semilla)
+    traza = []
+    recorridos = 0
+    for posicion, clave in enumerate(base):
+        if posicion and posicion % cada == 0:
+            traza.extend(f"lote{recorridos}_{n}" for n in range(longitud_recorrido))
+            recorridos += 1
+        traza.append(clave)
+    return traza
+
+
+def reproducir_traza(traza, politica, capacidad):
+    """
+    Simula una cache de 'capacidad' entradas con la política dada.
+    Devuelve (tasa de aciertos, operaciones por segundo)
+    """
+    residentes = set()
+    aciertos = 0
+    inicio = time.perf_counter()
+    for clave in traza:
+        if clave in residentes:
+            aciertos += 1
+            politica.registrar_acceso(clave)
+            continue
+        politica.registrar_fallo(clave)
+        residentes.add(clave)
+        politica.registrar_insercion(clave)
+        if len(residentes) > capacidad:
+            residentes.remove(politica.elegir_victima())
+    duracion = time.perf_counter() - inicio
+    return aciertos / len(traza), len(traza) / duracion
+
+
+def comparar_politicas(trazas, capacidad, nombres=tuple(POLITICAS)):
+    """Reproduce cada traza con cada política e imprime una tabla"""
+    resultados = {}
+    print(f"{'traza':<28} {'política':<10} {'aciertos':>9} {'ops/s':>12}")
+    for nombre_traza, traza in trazas.items():
+        for nombre in nombres:
+            opciones = {'capacidad_estimada': capacidad} if nombre == 'w-tinylfu' else {}
+            tasa, ops = reproducir_traza(traza, crear_politica(nombre, **opciones), capacidad)
+            resultados[(nombre_traza, nombre)] = (tasa, ops)
+            print(f"{nombre_traza:<28} {nombre:<10} {tasa * 100:>8.2f}% {ops:>12,.0f}")
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compara políticas de desalojo reproduciendo trazas de claves")
+    parser.add_argument('trazas', nargs='*', help="archivos con una clave por línea (sin ellos, trazas sintéticas)")
+    parser.add_argument('--capacidad', type=int, default=1000, help="entradas que caben en la cache")
+    parser.add_argument('--politicas', nargs='+', default=list(POLITICAS), choices=list(POLITICAS))
+    opciones = parser.parse_args()
+
+    if opciones.trazas:
+        trazas = {ruta: cargar_traza(ruta) for ruta in opciones.trazas}
+    else:
+        trazas = {
+            'zipf': traza_zipf(200_000, 20_000),
+            'zipf + recorridos': traza_con_recorridos(200_000, 20_000, longitud_recorrido=5_000, cada=20_000),
+        }
+    comparar_politicas(trazas, opciones.capacidad, opciones.politicas)
@@ -0,0 +1,62 @@
+import multiprocessing
+
+import pytest
+
+from cache_compartida import CacheMemoriaCompartida
+
+
+def _crear(contexto=None):
+    return CacheMemoriaCompartida(num_franjas=4, ranuras_por_franja=8, contexto=contexto)
+
+
+@pytest.fixture
+def cache():
+    cache = _crear()
+    yield cache
+    cache.cerrar()
+    cache.destruir()
+
+
+def _guardar_en_hijo(cache, clave, valor):
+    cache.guardar(clave, valor)
+    # Demasiado grande para cualquier clase de slab
+    cache.guardar(b'x' * 16, b'0' * 100_000)
+    cache.cerrar()
+
+
+def test_guardar_y_obtener(cache):
+    clave = CacheMemoriaCompartida.crear_clave(len, ('abc',), {})
+    assert cache.obtener(clave)[0] is False
+
+    assert cache.guardar(clave, {'valor': [1, 2]}, tiempo_vida=60)
+    encontrado, valor, vida_restante = cache.obtener(clave)
+    assert encontrado and valor == {'valor': [1, 2]} and 0 < vida_restante <= 60
+    assert cache.contar_entradas() == 1
+
+
+def test_desaloja_la_menos_usada_de_la_franja(cache):
+    claves = [bytes([n]) * 16 for n in range(40)]
+    for clave in claves:
+        assert cache.guardar(clave, clave)
+    # 4 franjas x 8 ranuras: siempre hay sitio, a costa de las más antiguas
+    assert cache.contar_entradas() <= 32
+    assert cache.obtener(claves[-1])[1] == claves[-1]
+
+
+@pytest.mark.parametrize('metodo', ['spawn', 'fork'])
+def test_otro_proceso_ve_la_misma_cache(metodo):
+    if metodo not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"'{metodo}' no disponible")
+    contexto = multiprocessing.get_context(metodo)
+    cache = _crear(contexto)
+    try:
+        proceso = contexto.Process(target=_guardar_en_hijo, args=(cache, b'k' * 16, 'del hijo'))
+        proceso.start()
+        proceso.join()
+
+        assert proceso.exitcode == 0
+        assert cache.obtener(b'k' * 16)[:2] == (True, 'del hijo')
+        assert cache.sin_espacio == 1
+    finally:
+        cache.cerrar()
+        cache.destruir()
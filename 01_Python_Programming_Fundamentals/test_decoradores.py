@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_entrada_caducada_se_cuenta_una_vez(decoradores):
+    cache = decoradores.SistemaCache()
+
+    @cache.cachear(tiempo_vida=0.05)
+    def doble(numero):
+        return numero * 2
+
+    doble(1)
+    time.sleep(0.1)
+    assert doble(1) == 2
+
+    estadisticas = cache.obtener_estadisticas()
+    assert estadisticas['expirados'] == 1
+    assert estadisticas['fallos'] == 2
+
+
+def test_cache_disco_desde_otro_hilo(decoradores, tmp_path):
+    disco = decoradores.CacheDisco(str(tmp_path / 'cache.sqlite'))
+    disco.guardar('clave', {'valor': 1})
+    try:
+        with ThreadPoolExecutor(max_workers=4) as ejecutor:
+            resultados = list(ejecutor.map(lambda _: disco.obtener('clave'), range(20)))
+            ejecutor.submit(disco.guardar, 'otra', [2]).result()
+        assert disco.obtener('otra')[:2] == (True, [2])
+    finally:
+        disco.cerrar()
+
+    assert all(encontrado and valor == {'valor': 1} for encontrado, valor, _ in resultados)
+
+
+def test_cache_concurrente_calcula_una_vez_por_clave(decoradores):
+    cache = decoradores.SistemaCacheConcurrente(num_fragmentos=4)
+    ejecuciones = []
+    fallar = [True]
+
+    @cache.cachear(tiempo_vida=60)
+    def consulta(n):
+        ejecuciones.append(n)
+        time.sleep(0.2)
+        if fallar[0]:
+            raise ValueError('servicio caído')
+        return n * n
+
+    def estampida():
+        barrera = threading.Barrier(16)
+
+        def cliente(_):
+            barrera.wait()
+            try:
+                return consulta(7)
+            except ValueError as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=16) as ejecutor:
+            return list(ejecutor.map(cliente, range(16)))
+
+    # El error del único cálculo llega a todos los que esperaban y no se cachea
+    assert all(isinstance(resultado, ValueError) for resultado in estampida())
+    assert ejecuciones == [7]
+
+    fallar[0] = False
+    assert estampida() == [49] * 16
+    assert ejecuciones == [7, 7]
+    estadisticas = cache.obtener_estadisticas()
+    assert estadisticas['fallos'] == 2
+    assert estadisticas['esperas_compartidas'] == 30
+
+
+def test_corrutinas_simultaneas_comparten_un_calculo(decoradores):
+    cache = decoradores.SistemaCache(max_entradas=10)
+    peticiones = []
+
+    @cache.cachear(tiempo_vida=60)
+    async def consultar(recurso):
+        peticiones.append(recurso)
+        await asyncio.sleep(0.05)
+        return {'recurso': recurso}
+
+    async def escenario():
+        resultados = await asyncio.gather(*(consultar('a') for _ in range(5)), consultar('b'))
+        # Cancelar a uno de los que esperan no cancela el cálculo compartido
+        primera = asyncio.ensure_future(consultar('c'))
+        segunda = asyncio.ensure_future(consultar('c'))
+        await asyncio.sleep(0)
+        primera.cancel()
+        return resultados, await segunda, await consultar('a')
+
+    resultados, c, a = asyncio.run(escenario())
+
+    assert resultados == [{'recurso': 'a'}] * 5 + [{'recurso': 'b'}]
+    assert c == {'recurso': 'c'} and a == {'recurso': 'a'}
+    assert peticiones == ['a', 'b', 'c']
+    estadisticas = cache.obtener_estadisticas()
+    assert (estadisticas['fallos'], estadisticas['llamadas_compartidas'], estadisticas['aciertos']) == (3, 5, 1)
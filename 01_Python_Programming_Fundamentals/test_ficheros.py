@@ -0,0 +1,528 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+
+LINEAS_LOG = [
+    "[2024-01-01 10:00:00] [INFO] [ana] Inicio\n",
+    "[2024-01-01 10:00:05] [ERROR] [luis] Fallo\n",
+    "[2024-01-01 10:00:10] [INFO] [luis] Reintento\n",
+    "[2024-01-01 10:00:15] [WARNING] [ana] Sin salto final",
+]
+
+
+def escribir_log(ruta, lineas=LINEAS_LOG):
+    ruta.write_text(''.join(lineas), encoding='utf-8')
+    return str(ruta)
+
+
+def test_escanear_sin_filtro_devuelve_todas_las_lineas(ficheros, tmp_path):
+    ruta = escribir_log(tmp_path / 'app.log')
+
+    resultado = ficheros.escanear_log_paralelo(ruta, procesos=2)
+
+    assert resultado['coincidencias'] == 4
+    assert resultado['total_lineas'] == 4
+    assert resultado['lineas'] == [linea.rstrip('\n') + '\n' for linea in LINEAS_LOG]
+
+
+def test_escanear_solo_desde(ficheros, tmp_path):
+    ruta = escribir_log(tmp_path / 'app.log')
+
+    resultado = ficheros.escanear_log_paralelo(ruta, desde='2024-01-01 10:00:10', procesos=2)
+
+    assert resultado['coincidencias'] == 2
+    assert [linea.split('] ', 3)[3] for linea in resultado['lineas']] == [
+        'Reintento\n', 'Sin salto final\n']
+
+
+def anexar_ajena(ruta, linea):
+    """Simula otro proceso que escribe en el mismo log"""
+    with open(ruta, 'a', encoding='utf-8') as archivo:
+        archivo.write(linea)
+
+
+def test_estadisticas_con_otro_escritor(ficheros, tmp_path):
+    for modo in ('directo', 'buffer'):
+        ruta = str(tmp_path / f'{modo}.log')
+        logs = ficheros.SistemaLogs(ruta, modo=modo, mostrar_consola=False)
+
+        logs.registrar('INFO', 'propia')
+        anexar_ajena(ruta, "[2024-01-01 10:00:00] [INFO] [otro] ajena\n")
+        logs.registrar('ERROR', 'propia')
+        estadisticas = logs.estadisticas_logs()
+        logs.close()
+
+        assert estadisticas['total_logs'] == 3
+        assert estadisticas['conteo_por_nivel'] == {'INFO': 2, 'ERROR': 1}
+        assert estadisticas['tamaño_bytes'] == os.path.getsize(ruta)
+
+
+def test_estadisticas_se_calculan_al_pedirlas_y_las_lecturas_no_guardan(ficheros, tmp_path):
+    ruta = escribir_log(tmp_path / 'app.log', LINEAS_LOG[:3])
+    logs = ficheros.SistemaLogs(ruta, modo='buffer', mostrar_consola=False)
+    assert logs.estadisticas.total_lineas == 0
+
+    logs.registrar('INFO', 'propia', 'ana')
+    assert len(logs.leer_logs(usuario='ana')) == 2
+    assert logs.estadisticas_logs()['total_logs'] == 4
+    assert not os.path.exists(ruta + '.stats')
+
+    logs.close()
+    assert json.load(open(ruta + '.stats', encoding='utf-8'))['total_lineas'] == 4
+
+
+def test_indice_con_otro_escritor(ficheros, tmp_path):
+    ajena = "[2024-01-01 10:00:00] [ERROR] [otro] ajena\n"
+    for modo in ('directo', 'buffer'):
+        ruta = str(tmp_path / f'{modo}.log')
+        logs = ficheros.SistemaLogs(ruta, modo=modo, mostrar_consola=False, indexar=True)
+
+        logs.registrar('INFO', 'propia')
+        anexar_ajena(ruta, ajena)
+        logs.registrar('INFO', 'propia')
+
+        assert logs.leer_logs(nivel='ERROR') == [ajena]
+        assert logs.leer_logs(usuario='otro') == [ajena]
+        assert len(logs.leer_logs(nivel='INFO')) == 2
+        assert logs.indice.tamaño_indexado == os.path.getsize(ruta)
+        logs.close()
+
+
+def test_instantanea_guardada_no_se_invalida_a_si_misma(ficheros, tmp_path):
+    arbol = tmp_path / 'arbol'
+    (arbol / 'sub').mkdir(parents=True)
+    (arbol / 'a.txt').write_text('a', encoding='utf-8')
+
+    # Fuera del árbol: recargarla no relee nada
+    fuera = str(tmp_path / 'instantanea.json')
+    ficheros.InstantaneaMetadatos(str(arbol), fuera).actualizar().guardar()
+    recargada = ficheros.InstantaneaMetadatos(str(arbol), fuera).actualizar()
+    assert recargada.directorios_leidos == 0
+    assert set(recargada.archivos()) == {'a.txt'}
+
+    # Dentro del árbol: la propia instancia no relee su directorio y se excluye
+    dentro = str(arbol / '.instantanea.json')
+    instantanea = ficheros.InstantaneaMetadatos(str(arbol), dentro).actualizar()
+    instantanea.guardar()
+    assert instantanea.actualizar().directorios_leidos == 0
+    recargada = ficheros.InstantaneaMetadatos(str(arbol), dentro).actualizar()
+    assert recargada.directorios_leidos == 1
+    assert set(recargada.archivos()) == {'a.txt'}
+
+    # Un cambio real en la raíz sí obliga a releerla
+    anterior = ficheros.InstantaneaMetadatos(str(arbol), dentro)
+    (arbol / 'b.txt').write_text('b', encoding='utf-8')
+    recargada = ficheros.InstantaneaMetadatos(str(arbol), dentro).actualizar()
+    assert recargada.directorios_leidos == 1
+    assert recargada.diferencias(anterior) == {'nuevos': ['b.txt'], 'eliminados': [],
+                                               'directorios_nuevos': []}
+
+
+def test_lectura_segura_por_partes_captura_errores_de_codificacion(ficheros, tmp_path):
+    ruta = tmp_path / 'latin1.txt'
+    ruta.write_bytes('línea 1\nañadido\n'.encode('latin-1'))
+
+    for modo in ('bloques', 'lineas'):
+        assert ficheros.leer_archivo_seguro(str(ruta), modo, len).startswith(
+            'Error: Problema de codificación')
+
+    ruta.write_text('línea 1\nañadido\n', encoding='utf-8')
+    lineas = []
+    assert ficheros.leer_archivo_seguro(str(ruta), 'lineas', lineas.append) == 2
+    assert lineas == ['línea 1\n', 'añadido\n']
+    with pytest.raises(ValueError):
+        ficheros.leer_archivo_seguro(str(ruta), 'bloques')
+
+
+def test_leer_segmento_mientras_se_comprime(ficheros, tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'app.log')
+    escribir_log(tmp_path / 'app.log', LINEAS_LOG[:3])
+    segmentos = ficheros.GestorSegmentos(ruta, compresion='ninguna')
+    segmentos.sellar(ficheros.EstadisticasLogs(ruta, ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']))
+    segmentos.compresion = 'gzip'
+
+    # El compresor termina justo cuando el lector ya eligió el archivo plano
+    abrir_original = ficheros.abrir_segmento
+
+    def abrir_durante_compresion(archivo):
+        compresor = threading.Thread(target=segmentos._comprimir, args=(segmentos.segmentos[0],))
+        compresor.start()
+        compresor.join(timeout=0.5)
+        return abrir_original(archivo)
+
+    monkeypatch.setattr(ficheros, 'abrir_segmento', abrir_durante_compresion)
+    lineas = segmentos.leer(lambda linea: True, None, None, None)
+
+    assert lineas == LINEAS_LOG[:3]
+
+
+def test_codificador_compilado_solo_genera_json_valido(ficheros):
+    codificar = ficheros.compilar_codificador({'id': 'entero', 'nota': 'decimal?', 'extra': 'json'})
+    registro = {'id': 7, 'nota': 8.5, 'extra': {'a': [1, None]}}
+    assert codificar(registro) == json.dumps(registro, ensure_ascii=False)
+    assert codificar({'id': 7, 'nota': None, 'extra': 1}) == '{"id": 7, "nota": null, "extra": 1}'
+
+    for nota in (float('nan'), float('inf'), -float('inf')):
+        with pytest.raises(ValueError):
+            codificar({'id': 7, 'nota': nota, 'extra': None})
+    with pytest.raises(ValueError):
+        codificar({'id': 7, 'nota': 1.0, 'extra': [float('nan')]})
+    for id_ in (True, 1.0, 'abc', '1, "admin": true'):
+        with pytest.raises(TypeError):
+            codificar({'id': id_, 'nota': 1.0, 'extra': None})
+    with pytest.raises(TypeError):
+        codificar({'id': 7, 'nota': '8.5', 'extra': None})
+
+    codificar_activo = ficheros.compilar_codificador({'activo': 'booleano', 'baja': 'booleano?'})
+    assert codificar_activo({'activo': True, 'baja': None}) == '{"activo": true, "baja": null}'
+    for activo in (1, 'sí', [0]):
+        with pytest.raises(TypeError):
+            codificar_activo({'activo': activo, 'baja': None})
+
+
+def test_csv_columnar_con_valor_fuera_de_la_muestra(ficheros, tmp_path):
+    ruta = tmp_path / 'datos.csv'
+    filas = [f'{i},{i * 1.5}' for i in range(1500)]
+    filas[1200] = 'N/A,1.0'
+    ruta.write_text('id,valor\n' + '\n'.join(filas) + '\n', encoding='utf-8')
+
+    with pytest.raises(ValueError, match=r"Fila 1202, columna 'id': 'N/A'"):
+        list(ficheros.leer_csv_columnar(str(ruta), tamaño_lote=500))
+
+    lotes = list(ficheros.leer_csv_columnar(str(ruta), esquema={'id': 'texto'}, tamaño_lote=500))
+    assert lotes[2]['id'][200] == 'N/A'
+    assert sum(len(lote['valor']) for lote in lotes) == 1500
+
+
+def test_csv_columnar_salta_filas_vacias_y_rechaza_filas_cortas(ficheros, tmp_path):
+    ruta = tmp_path / 'datos.csv'
+    ruta.write_text('id,valor\n1,1.5\n\n2,3.0\n\n', encoding='utf-8')
+
+    lotes = list(ficheros.leer_csv_columnar(str(ruta), tamaño_lote=2))
+    assert [list(lote['id']) for lote in lotes] == [[1, 2]]
+    assert ficheros.inferir_esquema(str(ruta)) == {'id': 'entero', 'valor': 'decimal'}
+
+    ruta.write_text('id,valor\n1,1.5\n2\n3,4.5\n', encoding='utf-8')
+    for leer in (ficheros.inferir_esquema, lambda r: list(ficheros.leer_csv_columnar(r))):
+        with pytest.raises(ValueError, match='Fila 3: tiene 1 campos y el encabezado 2'):
+            leer(str(ruta))
+
+
+def test_buffer_vuelca_por_antiguedad_sin_nuevas_escrituras(ficheros, tmp_path):
+    ruta = str(tmp_path / 'app.log')
+    logs = ficheros.SistemaLogs(ruta, modo='buffer', mostrar_consola=False,
+                                tamaño_lote=1000, intervalo_flush=0.1)
+    logs.registrar('WARNING', 'única línea')
+
+    limite = time.monotonic() + 5
+    while logs.estadisticas.total_lineas == 0 and time.monotonic() < limite:
+        time.sleep(0.05)
+
+    assert 'única línea' in open(ruta, encoding='utf-8').read()
+    assert logs.estadisticas.por_nivel == {'WARNING': 1}
+    logs.close()
+
+
+def test_buffer_vuelca_al_salir_sin_close(tmp_path):
+    codigo = ("from conftest import cargar_script\n"
+              "ficheros = cargar_script('ficheros', '08_ficheros.py')\n"
+              "escritor = ficheros.EscritorLogsBuffer('sin_cerrar.log', tamaño_lote=100, intervalo_flush=60)\n"
+              "escritor.escribir('última línea\\n')\n")
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, '-c', codigo], cwd=tmp_path, check=True, capture_output=True,
+                   env={**os.environ, 'PYTHONPATH': directorio})
+
+    assert (tmp_path / 'sin_cerrar.log').read_text(encoding='utf-8') == 'última línea\n'
+
+
+def test_modo_asincrono_drena_la_cola_al_salir_sin_close(tmp_path):
+    codigo = ("from conftest import cargar_script\n"
+              "ficheros = cargar_script('ficheros', '08_ficheros.py')\n"
+              "logs = ficheros.SistemaLogs('asincrono.log', modo='asincrono', mostrar_consola=False,\n"
+              "                            tamaño_lote=10_000, intervalo_flush=60, rotar_bytes=4096)\n"
+              "for i in range(500):\n"
+              "    logs.registrar('INFO', f'evento {i}')\n")
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, '-c', codigo], cwd=tmp_path, check=True, capture_output=True,
+                   env={**os.environ, 'PYTHONPATH': directorio})
+
+    activo = (tmp_path / 'asincrono.log').read_text(encoding='utf-8')
+    assert activo.endswith('evento 499\n')
+
+
+def test_motor_rechaza_destinos_repetidos_y_no_sobrescribe(ficheros, tmp_path):
+    for nombre in ('a/informe.txt', 'b/informe.txt', 'c.txt', 'd.txt'):
+        (tmp_path / nombre).parent.mkdir(exist_ok=True)
+        (tmp_path / nombre).write_text(nombre, encoding='utf-8')
+    motor = ficheros.MotorMovimientos(str(tmp_path), hilos=2)
+
+    with pytest.raises(ValueError, match='mismo destino'):
+        motor.mover([('a/informe.txt', 'docs/informe.txt'), ('b/informe.txt', 'docs/informe.txt')])
+    assert not motor.hay_pendiente()
+    assert not (tmp_path / 'docs').exists()
+
+    resumen = motor.mover([('c.txt', 'd.txt')])
+    assert resumen['movidos'] == 0 and len(resumen['errores']) == 1
+    assert (tmp_path / 'c.txt').read_text(encoding='utf-8') == 'c.txt'
+    assert (tmp_path / 'd.txt').read_text(encoding='utf-8') == 'd.txt'
+
+
+def test_vigilante_entrega_creados_y_no_los_reescritos(ficheros, tmp_path):
+    for forzar_sondeo in (False, True):
+        directorio = tmp_path / f'sondeo_{forzar_sondeo}'
+        directorio.mkdir()
+        (directorio / 'existente.txt').write_text('v1', encoding='utf-8')
+
+        with ficheros.VigilanteDirectorio(str(directorio), debounce=0.05, intervalo_sondeo=0.05,
+                                          forzar_sondeo=forzar_sondeo) as vigilante:
+            time.sleep(0.02)  # El sondeo compara el mtime del directorio
+            (directorio / 'existente.txt').write_text('v2', encoding='utf-8')
+            (directorio / 'nuevo.txt').write_text('nuevo', encoding='utf-8')
+            entregados = []
+            limite = time.monotonic() + 2
+            while time.monotonic() < limite:
+                entregados += vigilante.esperar_lote()
+
+        assert entregados == ['nuevo.txt']
+
+
+def test_vigilar_mueve_al_crear_y_anexa_el_diario(ficheros, tmp_path):
+    (tmp_path / 'previo.txt').write_text('ya estaba', encoding='utf-8')
+
+    def crear_archivos():
+        time.sleep(0.2)
+        (tmp_path / 'notas.txt').write_text('a', encoding='utf-8')
+        (tmp_path / 'previo.txt').write_text('reescrito', encoding='utf-8')
+        time.sleep(0.5)
+        (tmp_path / 'foto.jpg').write_bytes(b'b')
+
+    creador = threading.Thread(target=crear_archivos)
+    creador.start()
+    organizador = ficheros.OrganizadorArchivos(str(tmp_path))
+    totales = organizador.vigilar(duracion=1.5, debounce=0.1, intervalo_sondeo=0.1)
+    creador.join()
+
+    assert totales == {'movidos': 2, 'errores': 0, 'lotes': 2}
+    assert (tmp_path / 'previo.txt').exists()
+    assert not (tmp_path / 'notas.txt').exists() and not (tmp_path / 'foto.jpg').exists()
+    diario = (tmp_path / organizador.motor.ARCHIVO_DIARIO).read_text(encoding='utf-8')
+    assert [json.loads(linea)['op'] for linea in diario.splitlines()].count('plan') == 2
+
+
+def test_vigilante_relee_el_listado_si_inotify_se_desborda(ficheros, tmp_path):
+    vigilante = ficheros.VigilanteDirectorio(str(tmp_path), forzar_sondeo=True)
+    (tmp_path / 'perdido.txt').write_text('sin evento', encoding='utf-8')
+
+    # Un pipe hace de descriptor de inotify con solo el evento de desbordamiento
+    lectura, escritura = os.pipe()
+    os.set_blocking(lectura, False)
+    os.write(escritura, vigilante.CABECERA_EVENTO.pack(-1, vigilante.IN_Q_OVERFLOW, 0, 0))
+    vigilante._fd = lectura
+    try:
+        assert vigilante._eventos_inotify(0.1) == ['perdido.txt']
+    finally:
+        vigilante.close()
+        os.close(escritura)
+
+
+def test_lectura_en_reversa_cruza_bloques(ficheros, tmp_path):
+    ruta = escribir_log(tmp_path / 'app.log')
+    esperadas = [linea.rstrip('\n').encode('utf-8') for linea in reversed(LINEAS_LOG)]
+
+    for tamaño_bloque in (1, 7, 64, 1 << 16):
+        assert list(ficheros.leer_lineas_en_reversa(ruta, tamaño_bloque)) == esperadas
+
+
+def test_ultimas_lineas_en_orden_cronologico(ficheros, tmp_path):
+    ruta = escribir_log(tmp_path / 'app.log', LINEAS_LOG[:3])
+    logs = ficheros.SistemaLogs(ruta, mostrar_consola=False)
+
+    assert logs.leer_logs(ultimas_lineas=2) == LINEAS_LOG[1:3]
+    assert logs.leer_logs(usuario='luis', ultimas_lineas=5) == LINEAS_LOG[1:3]
+    assert logs.leer_logs(nivel='INFO', ultimas_lineas=1) == LINEAS_LOG[2:3]
+    logs.close()
+
+
+def cola_con_escritor_ocupado(ficheros, politica, capacidad=3):
+    """Cola cuyo hilo escritor queda bloqueado en el primer lote hasta liberarlo"""
+    escritas = []
+    liberar = threading.Event()
+    ocupado = threading.Event()
+
+    def procesar_lote(lote):
+        escritas.extend(registro[4] for registro in lote)
+        ocupado.set()
+        liberar.wait(5)
+
+    cola = ficheros.ColaLogsAsincrona(procesar_lote, capacidad=capacidad, politica=politica,
+                                      intervalo_flush=60)
+    cola.encolar('INFO', 'ana', 0, 'primera')
+    cola._despertar.set()
+    assert ocupado.wait(5)
+    return cola, escritas, liberar
+
+
+def test_cola_descarta_los_mas_antiguos(ficheros):
+    cola, escritas, liberar = cola_con_escritor_ocupado(ficheros, 'descartar_antiguos')
+    for linea in ('b', 'c', 'd', 'e'):
+        assert cola.encolar('INFO', 'ana', 0, linea)
+    liberar.set()
+    cola.close()
+
+    assert escritas == ['primera', 'c', 'd', 'e']
+    assert cola.metricas()['descartados_por_nivel'] == {'INFO': 1}
+
+
+def test_cola_descarta_primero_los_debug(ficheros):
+    cola, escritas, liberar = cola_con_escritor_ocupado(ficheros, 'descartar_debug')
+    cola.encolar('DEBUG', 'ana', 0, 'd1')
+    cola.encolar('INFO', 'ana', 0, 'i1')
+    cola.encolar('INFO', 'ana', 0, 'i2')
+    assert cola.encolar('INFO', 'ana', 0, 'i3')
+    # Llena y sin DEBUG que desalojar: el DEBUG nuevo es el que se pierde
+    assert not cola.encolar('DEBUG', 'ana', 0, 'd2')
+    liberar.set()
+    cola.close()
+
+    assert escritas == ['primera', 'i1', 'i2', 'i3']
+    assert cola.metricas()['descartados_por_nivel'] == {'DEBUG': 2}
+
+
+def test_cola_bloquea_hasta_que_hay_sitio(ficheros):
+    cola, escritas, liberar = cola_con_escritor_ocupado(ficheros, 'bloquear', capacidad=2)
+    cola.encolar('INFO', 'ana', 0, 'b')
+    cola.encolar('INFO', 'ana', 0, 'c')
+    productor = threading.Thread(target=cola.encolar, args=('INFO', 'ana', 0, 'd'))
+    productor.start()
+    productor.join(0.3)
+    assert productor.is_alive()
+
+    liberar.set()
+    productor.join(5)
+    cola.close()
+    assert escritas == ['primera', 'b', 'c', 'd']
+    assert cola.metricas()['descartados'] == 0
+
+
+def test_analisis_recursivo_recorre_todo_el_arbol(ficheros, tmp_path):
+    for relativa in ('informe.pdf', 'a/foto.PNG', 'a/b/c/script.py', 'a/b/notas.xyz', 'vacio/'):
+        ruta = tmp_path / relativa
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        if relativa.endswith('/'):
+            ruta.mkdir(exist_ok=True)
+        else:
+            ruta.write_text('x', encoding='utf-8')
+    # Un enlace a un directorio no se sigue (evita ciclos)
+    os.symlink(tmp_path / 'a', tmp_path / 'a' / 'b' / 'ciclo')
+
+    organizador = ficheros.OrganizadorArchivos(str(tmp_path))
+    recursivo = organizador.analizar_directorio(recursivo=True, hilos=4)
+    plano = organizador.analizar_directorio()
+
+    assert recursivo['documentos'] == ['informe.pdf']
+    assert recursivo['imagenes'] == [os.path.join('a', 'foto.PNG')]
+    assert recursivo['codigo'] == [os.path.join('a', 'b', 'c', 'script.py')]
+    assert recursivo['otros'] == [os.path.join('a', 'b', 'notas.xyz')]
+    assert sum(map(len, plano.values())) == 1
+
+
+def test_motor_reanuda_y_deshace_tras_una_caida(ficheros, tmp_path):
+    for nombre in ('a.txt', 'b.txt', 'c.txt'):
+        (tmp_path / nombre).write_text(nombre, encoding='utf-8')
+    (tmp_path / 'docs').mkdir()
+    # Caída simulada: 'a' movido y anotado, 'b' movido sin llegar a anotarlo,
+    # 'c' sin mover y la última línea del diario a medio escribir
+    (tmp_path / 'a.txt').rename(tmp_path / 'docs' / 'a.txt')
+    (tmp_path / 'b.txt').rename(tmp_path / 'docs' / 'b.txt')
+    plan = [json.dumps({'op': 'plan', 'id': i, 'origen': nombre,
+                        'destino': os.path.join('docs', nombre)})
+            for i, nombre in enumerate(('a.txt', 'b.txt', 'c.txt'))]
+    diario = tmp_path / ficheros.MotorMovimientos.ARCHIVO_DIARIO
+    diario.write_text('\n'.join(plan) + '\n{"op": "hecho", "id": 0}\n{"op": "hec',
+                      encoding='utf-8')
+
+    motor = ficheros.MotorMovimientos(str(tmp_path), hilos=2)
+    assert motor.hay_pendiente()
+    with pytest.raises(RuntimeError):
+        motor.mover([('otro.txt', 'docs/otro.txt')])
+
+    resumen = motor.reanudar()
+    assert (resumen['movidos'], resumen['omitidos'], resumen['errores']) == (1, 1, [])
+    assert sorted(os.listdir(tmp_path / 'docs')) == ['a.txt', 'b.txt', 'c.txt']
+    assert not motor.hay_pendiente()
+
+    assert motor.deshacer()['movidos'] == 3
+    assert (tmp_path / 'c.txt').read_text(encoding='utf-8') == 'c.txt'
+    assert os.listdir(tmp_path / 'docs') == []
+
+
+def test_duplicados_agrupa_por_contenido_y_reutiliza_la_cache(ficheros, tmp_path):
+    grande = b'x' * (200 * 1024)
+    contenidos = {
+        'a.txt': b'hola', 'sub/b.txt': b'hola', 'c.txt': b'hole',
+        'g1.bin': grande, 'g2.bin': grande,
+        # Mismo tamaño y mismos bloques inicial y final: solo el hash completo los separa
+        'g3.bin': grande[:100_000] + b'y' + grande[100_001:],
+        'vacio1': b'', 'vacio2': b''
+    }
+    for relativa, contenido in contenidos.items():
+        (tmp_path / relativa).parent.mkdir(exist_ok=True)
+        (tmp_path / relativa).write_bytes(contenido)
+    rutas = [os.path.normpath(relativa) for relativa in contenidos]
+
+    def buscar(enlazar=False):
+        return ficheros.DetectorDuplicados(str(tmp_path), hilos=4).buscar(rutas, enlazar)
+
+    primera = buscar()
+    grupos = sorted(primera['grupos'])
+    assert grupos == [['a.txt', os.path.join('sub', 'b.txt')], ['g1.bin', 'g2.bin']]
+    assert primera['bytes_duplicados'] == 4 + len(grande)
+
+    # Otra instancia (otra ejecución): todos los hashes salen de la cache en disco
+    segunda = buscar()
+    assert sorted(segunda['grupos']) == grupos
+    assert (segunda['hash_parcial'], segunda['hash_completo']) == (0, 0)
+    assert segunda['desde_cache'] > 0
+
+    # Un archivo modificado invalida solo su entrada
+    os.utime(tmp_path / 'g3.bin', ns=(0, 10 ** 9))
+    assert buscar()['hash_parcial'] == 1
+
+    assert buscar(enlazar=True)['enlazados'] == 2
+    assert os.stat(tmp_path / 'a.txt').st_ino == os.stat(tmp_path / 'sub' / 'b.txt').st_ino
+    # Los enlaces duros del mismo inodo ya no cuentan como duplicados
+    assert buscar()['grupos'] == []
+
+
+def test_almacen_jsonl_borra_por_offset_y_compacta(ficheros, tmp_path):
+    ruta = str(tmp_path / 'estudiantes.jsonl')
+    almacen = ficheros.AlmacenJSONL(ruta)
+    almacen.agregar_lote([{'id': n, 'nombre': f'e{n}'} for n in range(4)])
+    almacen.actualizar({'id': 1, 'nombre': 'Ñandú'})
+    assert almacen.eliminar(2) == 1
+
+    # Otra instancia lee los borrados del archivo auxiliar
+    reabierto = ficheros.AlmacenJSONL(ruta)
+    assert [registro['id'] for registro in reabierto] == [0, 3, 1]
+    assert reabierto.buscar(1)['nombre'] == 'Ñandú'
+    assert reabierto.buscar(2) is None
+    with open(ruta, encoding='utf-8') as archivo:
+        assert len(archivo.readlines()) == 5
+
+    reabierto.compactar()
+    with open(ruta, encoding='utf-8') as archivo:
+        assert [json.loads(linea)['id'] for linea in archivo] == [0, 3, 1]
+    assert not os.path.exists(reabierto.archivo_eliminados)
+    assert [registro['id'] for registro in ficheros.AlmacenJSONL(ruta)] == [0, 3, 1]
+
+    documento = str(tmp_path / 'estudiantes.json')
+    assert reabierto.exportar_json(documento) == 3
+    copia = ficheros.AlmacenJSONL(str(tmp_path / 'copia.jsonl'))
+    assert copia.importar_json(documento) == 3
+    assert list(copia) == list(reabierto)
@@ -0,0 +1,26 @@
+import sys
+
+
+def test_cache_inteligente_desaloja_la_menos_usada(gestion_memoria):
+    # El estimador devuelve el propio valor: cada entrada ocupa lo que se pida
+    cache = gestion_memoria.CacheInteligente(max_memoria_mb=1, estimador=lambda valor: valor)
+    tamaño = lambda clave, valor: sys.getsizeof(clave) + valor
+
+    cache.guardar('a', 400_000)
+    cache.guardar('b', 400_000)
+    assert cache.obtener('a') == 400_000
+    cache.guardar('c', 400_000)
+
+    assert sorted(cache.cache) == ['a', 'c']
+    assert cache.memoria_actual == tamaño('a', 400_000) + tamaño('c', 400_000)
+    assert cache.estadisticas['elementos_desalojados'] == 1
+
+    # Reemplazar un valor ajusta el total sin recalcular los demás
+    cache.guardar('a', 100)
+    assert cache.memoria_actual == tamaño('a', 100) + tamaño('c', 400_000)
+
+    # Un valor que no cabe con todo lo demás desaloja justo lo necesario
+    cache.guardar('d', 700_000)
+    assert sorted(cache.cache) == ['a', 'd']
+    assert cache.obtener('c') is None
+    assert cache.obtener_estadisticas()['limpiezas_automaticas'] == 2
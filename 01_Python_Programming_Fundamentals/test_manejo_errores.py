@@ -0,0 +1,73 @@
+import os
+import stat
+
+import pytest
+
+
+def permisos(ruta):
+    return stat.S_IMODE(os.stat(ruta).st_mode)
+
+
+def test_escritura_atomica_conserva_permisos(manejo_errores, tmp_path):
+    existente = tmp_path / 'existente.txt'
+    existente.write_text('antes', encoding='utf-8')
+    os.chmod(existente, 0o640)
+
+    with manejo_errores.GestorArchivo(str(existente), 'w', atomico=True) as archivo:
+        archivo.write('después')
+
+    assert existente.read_text(encoding='utf-8') == 'después'
+    assert permisos(existente) == 0o640
+
+
+def test_escritura_atomica_de_archivo_nuevo_respeta_umask(manejo_errores, tmp_path):
+    mascara = os.umask(0o022)
+    try:
+        with manejo_errores.GestorArchivo(str(tmp_path / 'nuevo.txt'), 'w', atomico=True) as archivo:
+            archivo.write('hola')
+    finally:
+        os.umask(mascara)
+
+    assert permisos(tmp_path / 'nuevo.txt') == 0o644
+
+
+def test_fallo_al_confirmar_borra_el_temporal(manejo_errores, tmp_path, monkeypatch):
+    def fsync_fallido(descriptor):
+        raise OSError('disco lleno')
+
+    destino = tmp_path / 'destino.txt'
+    destino.write_text('original', encoding='utf-8')
+    monkeypatch.setattr(manejo_errores.os, 'fsync', fsync_fallido)
+
+    with pytest.raises(OSError, match='disco lleno'):
+        with manejo_errores.GestorArchivo(str(destino), 'w', atomico=True) as archivo:
+            archivo.write('nuevo')
+
+    assert destino.read_text(encoding='utf-8') == 'original'
+    assert os.listdir(tmp_path) == ['destino.txt']
+
+
+def test_lectura_mmap(manejo_errores, tmp_path):
+    ruta = tmp_path / 'datos.bin'
+    ruta.write_bytes(b'cabecera\ncuerpo')
+    vacio = tmp_path / 'vacio.bin'
+    vacio.write_bytes(b'')
+
+    gestor = manejo_errores.GestorArchivo(str(ruta), 'rb', usar_mmap=True)
+    with gestor as vista:
+        assert bytes(vista[:8]) == b'cabecera'
+        archivo = gestor.archivo
+    assert archivo.closed and gestor.mapa is None
+
+    with manejo_errores.GestorArchivo(str(vacio), 'rb', usar_mmap=True) as vista:
+        assert len(vista) == 0
+
+
+def test_lectura_simple_por_bloques_entrega_cada_parte(manejo_errores, tmp_path):
+    ruta = tmp_path / 'grande.txt'
+    ruta.write_text('x' * 150_000, encoding='utf-8')
+
+    bloques = []
+    assert manejo_errores.leer_archivo_simple(str(ruta), 'bloques', bloques.append) == 3
+    assert ''.join(bloques) == 'x' * 150_000
+    assert manejo_errores.leer_archivo_simple(str(tmp_path / 'no_existe.txt'), 'lineas', len) is None
@@ -0,0 +1,45 @@
+import pytest
+
+import politicas_cache
+
+
+def aciertos_tras_un_recorrido(nombre, capacidad=100):
+    """50 claves calientes usadas 3 veces, un lote de 300 únicas y otra pasada"""
+    calientes = [f"caliente_{n}" for n in range(50)]
+    traza = calientes * 3 + [f"lote_{n}" for n in range(300)]
+    opciones = {'capacidad_estimada': capacidad} if nombre == 'w-tinylfu' else {}
+    politica = politicas_cache.crear_politica(nombre, **opciones)
+    politicas_cache.reproducir_traza(traza, politica, capacidad)
+
+    # Quién sigue dentro, según las listas de cada política
+    zonas = {
+        'lru': lambda: (politica.orden,),
+        'arc': lambda: (politica.t1, politica.t2),
+        'w-tinylfu': lambda: (politica.ventana, politica.prueba, politica.protegida),
+    }[nombre]()
+    residentes = set().union(*zonas)
+    assert len(residentes) == capacidad
+    return sum(clave in residentes for clave in calientes)
+
+
+def test_lru_pierde_las_claves_calientes_en_un_recorrido():
+    assert aciertos_tras_un_recorrido('lru') == 0
+
+
+@pytest.mark.parametrize('nombre', ['arc', 'w-tinylfu'])
+def test_arc_y_w_tinylfu_resisten_recorridos(nombre):
+    assert aciertos_tras_un_recorrido(nombre) >= 40
+
+
+@pytest.mark.parametrize('nombre', list(politicas_cache.POLITICAS))
+def test_victimas_siempre_residentes_y_capacidad_respetada(nombre):
+    traza = politicas_cache.traza_con_recorridos(20_000, 2_000, longitud_recorrido=500, cada=2_000)
+    opciones = {'capacidad_estimada': 200} if nombre == 'w-tinylfu' else {}
+    # reproducir_traza falla (KeyError) si la política elige una clave que no está
+    tasa, _ = politicas_cache.reproducir_traza(traza, politicas_cache.crear_politica(nombre, **opciones), 200)
+    assert 0 < tasa < 1
+
+
+def test_politica_desconocida():
+    with pytest.raises(ValueError):
+        politicas_cache.crear_politica('fifo')
@@ -0,0 +1,305 @@
+"""
+Cache columnar para los CSV del curso
+Cada CSV se parsea una sola vez y se guarda como columnas binarias .npy
+más un manifiesto JSON; las cargas siguientes son memory-maps sin copia
+(las columnas de texto se guardan como códigos y se reconstruyen al cargar)
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '00_Archivos_CSV_Excel_y_JSON')
+DIRECTORIO_CACHE = '.cache_columnar'
+VERSION_FORMATO = 3
+# Cada construcción va a su propio directorio; el manifiesto apunta a la vigente
+PREFIJO_CONSTRUCCION = 'construccion-'
+PREFIJO_DATOS = 'datos-'
+
+# CSV que los notebooks del módulo vuelven a leer en cada ejecución
+DATASETS = ['01_Iris.csv', '02_Cars.csv', '05_sales_data.csv', '06_sales_data_new.csv']
+
+
+def _hash_archivo(ruta):
+    """SHA-256 del archivo leído por bloques"""
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _opciones_canonicas(opciones_read_csv, fechas=False):
+    """
+    Texto estable de las opciones de read_csv (forman parte de la clave),
+    junto con 'fechas', que cambia lo que se guarda
+    """
+    clave = dict(opciones_read_csv, **({'(fechas)': True} if fechas else {}))
+    return json.dumps(clave, sort_keys=True, default=repr, ensure_ascii=False)
+
+
+def _directorio_cache(ruta_csv, opciones_read_csv, fechas=False):
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    if opciones_read_csv or fechas:
+        # Cada combinación de opciones tiene su propia cache
+        huella = hashlib.sha256(_opciones_canonicas(opciones_read_csv, fechas).encode('utf-8'))
+        nombre = f'{nombre}-{huella.hexdigest()[:12]}'
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), DIRECTORIO_CACHE, nombre)
+
+
+def _leer_manifiesto(directorio):
+    try:
+        with open(os.path.join(directorio, 'manifiesto.json'), 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_manifiesto(directorio, manifiesto):
+    temporal = os.path.join(directorio, 'manifiesto.json.tmp')
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, ensure_ascii=False)
+    os.replace(temporal, os.path.join(directorio, 'manifiesto.json'))
+
+
+def cache_vigente(ruta_csv, manifiesto, fechas=False, **opciones_read_csv):
+    """
+    Comprueba si el manifiesto describe el CSV actual leído con las mismas
+    opciones: primero tamaño y mtime (gratis); si solo cambió el mtime, decide
+    el hash del contenido y se guarda el mtime nuevo para no repetirlo
+    """
+    if manifiesto is None or manifiesto.get('version') != VERSION_FORMATO:
+        return False
+    if manifiesto.get('opciones') != _opciones_canonicas(opciones_read_csv, fechas):
+        return False
+
+    info = os.stat(ruta_csv)
+    origen = manifiesto['origen']
+    if info.st_size != origen['tamaño']:
+        return False
+    if info.st_mtime_ns == origen['mtime_ns']:
+        return True
+    if _hash_archivo(ruta_csv) != origen['sha256']:
+        return False
+
+    origen['mtime_ns'] = info.st_mtime_ns
+    _guardar_manifiesto(_directorio_cache(ruta_csv, opciones_read_csv, fechas), manifiesto)
+    return True
+
+
+def _columna_fecha(serie):
+    """Convierte una columna de texto 'YYYY-MM-DD' a datetime64, o None"""
+    try:
+        return pd.to_datetime(serie, format='%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
+
+
+def _guardar_columna(destino, archivo, nombre, serie, fechas):
+    """
+    Escribe una columna (o un nivel del índice) como .npy y devuelve su
+    entrada del manifiesto. El texto se guarda como códigos enteros con
+    los valores distintos en el manifiesto
+    """
+    serie = pd.Series(serie, copy=False)
+    entrada = {'nombre': nombre, 'archivo': archivo}
+
+    if fechas and (serie.dtype == object or isinstance(serie.dtype, pd.StringDtype)):
+        convertida = _columna_fecha(serie)
+        if convertida is not None:
+            serie = convertida
+
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy()
+        entrada['tipo'] = 'numerico'
+    elif pd.api.types.is_datetime64_dtype(serie):
+        valores = serie.to_numpy(dtype='datetime64[ns]')
+        entrada['tipo'] = 'fecha'
+    elif isinstance(serie.dtype, pd.CategoricalDtype):
+        # dtype='category' en read_csv: se conservan categorías y orden
+        valores = serie.cat.codes.to_numpy()
+        entrada['tipo'] = 'categoria'
+        entrada['valores'] = serie.cat.categories.tolist()
+        entrada['ordenada'] = bool(serie.cat.ordered)
+    else:
+        # Sin ordenar (admite tipos mezclados); los NaN quedan como código -1
+        valores, distintos = pd.factorize(serie)
+        entrada['tipo'] = 'texto'
+        entrada['valores'] = pd.Index(distintos).tolist()
+        # 'object', o 'str' en pandas 3: el dtype con el que vuelve al cargar
+        entrada['dtype_texto'] = str(serie.dtype)
+
+    np.save(os.path.join(destino, archivo), np.ascontiguousarray(valores))
+    entrada['dtype'] = str(valores.dtype)
+    return entrada
+
+
+def _cargar_columna(directorio, entrada, categorias):
+    """Memory-map de la columna; el texto vuelve como object (o category)"""
+    valores = np.load(os.path.join(directorio, entrada['archivo']), mmap_mode='r')
+    if entrada['tipo'] == 'categoria' or (entrada['tipo'] == 'texto' and categorias):
+        return pd.Categorical.from_codes(valores, entrada['valores'],
+                                         ordered=entrada.get('ordenada', False))
+    if entrada['tipo'] == 'texto':
+        # El último hueco es para el código -1 (NaN), como en read_csv
+        distintos = np.empty(len(entrada['valores']) + 1, dtype=object)
+        distintos[:-1] = entrada['valores']
+        distintos[-1] = np.nan
+        if entrada.get('dtype_texto', 'object') == 'object':
+            return distintos[valores]
+        return pd.array(distintos[valores], dtype=entrada['dtype_texto'])
+    return valores
+
+
+def _indice_por_defecto(indice):
+    """El RangeIndex 0..n-1 que pone read_csv sin index_col no se guarda"""
+    return (isinstance(indice, pd.RangeIndex) and indice.start == 0 and indice.step == 1
+            and indice.name is None)
+
+
+def _podar(directorio, conservar):
+    """
+    Borra las construcciones que ya no son la vigente ni la anterior (un
+    lector puede estar abriendo esta) y los .npy sueltos de la versión 2
+    """
+    for entrada in os.scandir(directorio):
+        if entrada.name.startswith(PREFIJO_DATOS) and entrada.name not in conservar:
+            shutil.rmtree(entrada.path, ignore_errors=True)
+        elif entrada.name.endswith('.npy') and entrada.is_file():
+            os.remove(entrada.path)
+
+
+def construir_cache(ruta_csv, fechas=False, **opciones_read_csv):
+    """
+    Parsea el CSV con pandas y escribe columnas, índice y manifiesto. Los
+    .npy van a un directorio nuevo y solo al final se reemplaza el manifiesto
+    (os.replace): un lector concurrente ve la versión anterior completa o la
+    nueva, nunca una a medias. Con fechas=True las columnas de texto
+    'YYYY-MM-DD' se guardan como datetime64
+    """
+    directorio = _directorio_cache(ruta_csv, opciones_read_csv, fechas)
+    os.makedirs(directorio, exist_ok=True)
+
+    info = os.stat(ruta_csv)
+    df = pd.read_csv(ruta_csv, **opciones_read_csv)
+
+    construccion = tempfile.mkdtemp(prefix=PREFIJO_CONSTRUCCION, dir=directorio)
+    try:
+        columnas = [_guardar_columna(construccion, f'{posicion:03d}.npy', nombre,
+                                     df.iloc[:, posicion], fechas)
+                    for posicion, nombre in enumerate(df.columns)]
+        indice = None
+        if not _indice_por_defecto(df.index):
+            indice = [_guardar_columna(construccion, f'indice_{nivel:02d}.npy', nombre,
+                                       df.index.get_level_values(nivel), fechas)
+                      for nivel, nombre in enumerate(df.index.names)]
+        datos = PREFIJO_DATOS + os.path.basename(construccion)[len(PREFIJO_CONSTRUCCION):]
+        os.rename(construccion, os.path.join(directorio, datos))
+    except BaseException:
+        shutil.rmtree(construccion, ignore_errors=True)
+        raise
+
+    anterior = _leer_manifiesto(directorio) or {}
+    manifiesto = {
+        'version': VERSION_FORMATO,
+        'origen': {
+            'ruta': os.path.abspath(ruta_csv),
+            'tamaño': info.st_size,
+            'mtime_ns': info.st_mtime_ns,
+            'sha256': _hash_archivo(ruta_csv)
+        },
+        'opciones': _opciones_canonicas(opciones_read_csv, fechas),
+        'filas': len(df),
+        'datos': datos,
+        'columnas': columnas,
+        'indice': indice
+    }
+    _guardar_manifiesto(directorio, manifiesto)
+    _podar(directorio, {datos, anterior.get('datos')})
+    return manifiesto
+
+
+def _cargar(ruta_csv, fechas, categorias, opciones_read_csv):
+    """[(nombre, columna)] e índice (o None) desde la cache vigente"""
+    directorio = _directorio_cache(ruta_csv, opciones_read_csv, fechas)
+    manifiesto = _leer_manifiesto(directorio)
+    if not cache_vigente(ruta_csv, manifiesto, fechas, **opciones_read_csv):
+        manifiesto = construir_cache(ruta_csv, fechas, **opciones_read_csv)
+
+    for reintento in (False, True):
+        datos = os.path.join(directorio, manifiesto['datos'])
+        try:
+            columnas = [(entrada['nombre'], _cargar_columna(datos, entrada, categorias))
+                        for entrada in manifiesto['columnas']]
+            niveles = [(entrada['nombre'], _cargar_columna(datos, entrada, categorias))
+                       for entrada in manifiesto['indice'] or []]
+            break
+        except FileNotFoundError:
+            # Otro proceso reconstruyó dos veces y podó esta versión al abrirla
+            if reintento:
+                raise
+            manifiesto = construir_cache(ruta_csv, fechas, **opciones_read_csv)
+
+    indice = None
+    if len(niveles) == 1:
+        indice = pd.Index(niveles[0][1], name=niveles[0][0])
+    elif niveles:
+        indice = pd.MultiIndex.from_arrays([valores for _, valores in niveles],
+                                           names=[nombre for nombre, _ in niveles])
+    return columnas, indice
+
+
+def cargar_columnas(ruta_csv, categorias=False, fechas=False, **opciones_read_csv):
+    """
+    Devuelve {columna: np.memmap} (solo lectura) reconstruyendo la cache
+    si el CSV cambió. El texto vuelve como array de object, o como
+    pd.Categorical sobre los códigos con categorias=True
+    """
+    columnas, _ = _cargar(ruta_csv, fechas, categorias, opciones_read_csv)
+    return dict(columnas)
+
+
+def cargar_dataframe(ruta_csv, categorias=False, fechas=False, **opciones_read_csv):
+    """
+    Equivalente a pd.read_csv(ruta_csv, **opciones_read_csv), pero desde la
+    cache columnar: mismas columnas, dtypes e índice (index_col incluido).
+    Dos conversiones son opcionales: categorias=True devuelve el texto como
+    category y fechas=True las columnas 'YYYY-MM-DD' como datetime64
+    """
+    columnas, indice = _cargar(ruta_csv, fechas, categorias, opciones_read_csv)
+    df = pd.DataFrame(dict(enumerate(valores for _, valores in columnas)), index=indice, copy=False)
+    df.columns = pd.Index([nombre for nombre, _ in columnas])
+    return df
+
+
+def cargar_dataset(nombre, **opciones):
+    """Carga uno de los CSV de 00_Archivos_CSV_Excel_y_JSON por su nombre"""
+    return cargar_dataframe(os.path.join(DIRECTORIO_DATOS, nombre), **opciones)
+
+
+if __name__ == '__main__':
+    print("=== CACHE COLUMNAR DE LOS CSV DEL CURSO ===")
+    for nombre in DATASETS:
+        ruta = os.path.join(DIRECTORIO_DATOS, nombre)
+
+        inicio = time.perf_counter()
+        pd.read_csv(ruta)
+        texto = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        df = cargar_dataset(nombre)
+        primera = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        cargar_dataset(nombre)
+        cacheada = time.perf_counter() - inicio
+
+        print(f"{nombre}: {len(df)} filas | read_csv {texto * 1000:.2f} ms | "
+              f"construir {primera * 1000:.2f} ms | desde cache {cacheada * 1000:.2f} ms")
@@ -0,0 +1,79 @@
+import json
+import os
+
+import pandas as pd
+
+import cache_columnar
+
+
+def test_opciones_de_read_csv_forman_parte_de_la_clave(tmp_path):
+    ruta = tmp_path / 'datos.csv'
+    ruta.write_text('a;b\n1;2\n', encoding='utf-8')
+
+    assert list(cache_columnar.cargar_columnas(str(ruta))) == ['a;b']
+    assert list(cache_columnar.cargar_columnas(str(ruta), sep=';')) == ['a', 'b']
+    assert list(cache_columnar.cargar_columnas(str(ruta))) == ['a;b']
+
+
+def test_mtime_nuevo_con_mismo_contenido_se_guarda(tmp_path, monkeypatch):
+    ruta = tmp_path / 'datos.csv'
+    ruta.write_text('a,b\n1,2\n', encoding='utf-8')
+    cache_columnar.cargar_columnas(str(ruta))
+
+    mtime_nuevo = os.stat(ruta).st_mtime_ns + 10 ** 9
+    os.utime(ruta, ns=(mtime_nuevo, mtime_nuevo))
+    assert cache_columnar.cargar_columnas(str(ruta))['a'][0] == 1
+
+    manifiesto = tmp_path / cache_columnar.DIRECTORIO_CACHE / 'datos' / 'manifiesto.json'
+    assert json.loads(manifiesto.read_text(encoding='utf-8'))['origen']['mtime_ns'] == mtime_nuevo
+
+    # La siguiente carga ya no necesita calcular el hash
+    monkeypatch.setattr(cache_columnar, '_hash_archivo', None)
+    assert cache_columnar.cargar_columnas(str(ruta))['b'][0] == 2
+
+
+def _csv_mixto(tmp_path):
+    ruta = tmp_path / 'mixto.csv'
+    ruta.write_text('id,nombre,fecha,precio,activo\n'
+                    '7,ana,2024-01-02,1.5,True\n'
+                    '3,,2024-02-03,2.25,False\n'
+                    '9,luis,2024-03-04,,True\n', encoding='utf-8')
+    return str(ruta)
+
+
+def test_dataframe_igual_que_read_csv(tmp_path):
+    ruta = _csv_mixto(tmp_path)
+    for opciones in ({}, {'index_col': 0}, {'index_col': ['id', 'nombre']}):
+        esperado = pd.read_csv(ruta, **opciones)
+        # La segunda carga ya sale de la cache; copy() solo cambia memmap por ndarray
+        for _ in range(2):
+            cargado = cache_columnar.cargar_dataframe(ruta, **opciones)
+            pd.testing.assert_frame_equal(cargado.copy(), esperado)
+
+
+def test_conversiones_opcionales(tmp_path):
+    ruta = _csv_mixto(tmp_path)
+    df = cache_columnar.cargar_dataframe(ruta, categorias=True, fechas=True)
+
+    assert isinstance(df['nombre'].dtype, pd.CategoricalDtype)
+    assert df['nombre'].isna().tolist() == [False, True, False]
+    assert pd.api.types.is_datetime64_dtype(df['fecha'])
+    assert cache_columnar.cargar_dataframe(ruta)['fecha'].dtype == pd.read_csv(ruta)['fecha'].dtype
+
+
+def test_reconstruccion_publica_un_directorio_nuevo(tmp_path):
+    ruta = tmp_path / 'datos.csv'
+    ruta.write_text('a\n1\n', encoding='utf-8')
+    directorio = tmp_path / cache_columnar.DIRECTORIO_CACHE / 'datos'
+
+    anterior = cache_columnar.cargar_columnas(str(ruta))['a']
+    for valor in (22, 333, 4444):
+        ruta.write_text(f'a\n{valor}\n', encoding='utf-8')
+        assert cache_columnar.cargar_columnas(str(ruta))['a'][0] == valor
+
+    # El memmap de una versión anterior sigue siendo legible
+    assert anterior[0] == 1
+    versiones = sorted(p.name for p in directorio.iterdir() if p.is_dir())
+    vigente = json.loads((directorio / 'manifiesto.json').read_text(encoding='utf-8'))['datos']
+    assert vigente in versiones and len(versiones) == 2
+    assert all(nombre.startswith(cache_columnar.PREFIJO_DATOS) for nombre in versiones)